@@ -16,9 +16,18 @@ such as BaseModel, User, City, Place, Review, State, and Amenity,
 and uses the storage module to manage data storage and retrieval.
 """
 
+import io
 import re
+import ast
 import sys
 import cmd
+import json
+import time
+import shlex
+import argparse
+import contextlib
+from uuid import uuid4
+from datetime import datetime
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
@@ -29,6 +38,13 @@ from models.user import User
 from models import storage
 
 
+class RequestError(Exception):
+    """
+    The error of a request of the JSON lines protocol,
+    its message is the error of the response
+    """
+
+
 class HBNBCommand(cmd.Cmd):
     """
     HBNBCommand - Python Console for HBNB Project
@@ -49,6 +65,9 @@ class HBNBCommand(cmd.Cmd):
     misc_header = "Additional Information"
     ruler = "="
 
+    # the commands that can be called as <class>.<command>(<args>)
+    __dotted = ["update", "all", "show", "create", "destroy", "count"]
+
     __classes = {
         "BaseModel": BaseModel,
         "User": User,
@@ -58,6 +77,8 @@ class HBNBCommand(cmd.Cmd):
         "State": State,
         "Amenity": Amenity,
     }
+    # a value of the update command: quoted text, a json list or a word
+    __token = r""""[^"]*"|'[^']*'|\[[^\]]*\]|\S+"""
     __types = {
         "name": str,
         "stat_id": str,
@@ -84,6 +105,7 @@ class HBNBCommand(cmd.Cmd):
         Quit the interpreter.
         This command allows the user to exit the interpreter gracefully.
         """
+        storage.flush()
         exit()
 
     def help_quit(self):
@@ -99,6 +121,7 @@ class HBNBCommand(cmd.Cmd):
         This command allows the user to exit the interpreter
         gracefully using the EOF (End of File) input.
         """
+        storage.flush()
         exit()
 
     def help_EOF(self):
@@ -140,8 +163,9 @@ class HBNBCommand(cmd.Cmd):
     def do_show(self, args):
         """
         Prints the string representation of an instance based on
-        the class name and id
-        ex: show <class> <id>
+        the class name and id, --expand also prints its related objects
+        (State.cities, City.places, Place.reviews, User.places/reviews)
+        ex: show <class> <id> [--expand]
 
         Args:
             args (str): Any additional arguments passed with the command.
@@ -166,15 +190,17 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
 
-        try:
-            all_stored_objects = storage.all()
-            id = splitted_args[1]
-            key = f"{class_name}.{id}"
-            obj_str = all_stored_objects[key]
-            print(obj_str)
-        except KeyError:
+        obj = storage.get(class_name, splitted_args[1])
+        if obj is None:
             print("** no instance found **")
             return
+        print(obj)
+        if "--expand" in splitted_args[2:]:
+            # the relationship properties of the model class
+            for name, value in vars(type(obj)).items():
+                if isinstance(value, property):
+                    related = [str(child) for child in getattr(obj, name)]
+                    print(f"{name}: {related}")
 
     def help_show(self):
         """
@@ -182,13 +208,16 @@ class HBNBCommand(cmd.Cmd):
         """
         print("Prints the str repr of an instance")
         print("based on the class name and id")
-        print("Usage: show <class> <id>")
+        print("Usage: show <class> <id> [--expand]")
 
     def do_destroy(self, args):
         """
         Deletes an instance based on the class name and id
         (and save the changes).
-        Ex: destroy <class> <id>
+        --cascade also deletes the objects depending on it
+        (State -> City -> Place -> Review, User -> Place/Review)
+        in one save, --dry-run only prints what would be deleted.
+        Ex: destroy <class> <id> [--cascade] [--dry-run]
 
         Args:
             args (str): Any additional arguments passed with the command.
@@ -213,14 +242,22 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
 
-        try:
-            id = splitted_args[1]
-            key = f"{class_name}.{id}"
-            del storage.all()[key]
-            storage.save()
-        except KeyError:
+        obj = storage.get(class_name, splitted_args[1])
+        if obj is None:
             print("** no instance found **")
             return
+        options = splitted_args[2:]
+        if "--cascade" not in options and "--dry-run" not in options:
+            storage.delete(obj)
+            storage.save()
+            return
+        if "--cascade" in options:
+            counts = storage.delete_cascade(obj, "--dry-run" in options)
+        else:
+            counts = {class_name: 1}
+        if "--dry-run" not in options:
+            storage.save()
+        print(", ".join(f"{name}: {count}" for name, count in counts.items()))
 
     def help_destroy(self):
         """
@@ -228,7 +265,9 @@ class HBNBCommand(cmd.Cmd):
         """
         print("Deletes an instance based on the")
         print("class name and id (and save the changes)")
-        print("Usage: show <class> <id>")
+        print("--cascade: also its cities, places, reviews...")
+        print("--dry-run: only print the number of objects deleted")
+        print("Usage: destroy <class> <id> [--cascade] [--dry-run]")
 
     def do_all(self, args):
         """
@@ -237,21 +276,18 @@ class HBNBCommand(cmd.Cmd):
         Ex: `all BaseModel` or `all`.
         """
         splitted_args = args.split(" ")
-        objects = storage.all()
 
         if splitted_args[0] == "":
+            objects = storage.all()
             print([str(objects[i]) for i in objects.keys()])
         else:
             try:
                 class_name = splitted_args[0]
                 HBNBCommand.__classes[class_name]
-                print(
-                    [
-                        str(objects[i])
-                        for i in objects.keys()
-                        if i.startswith(class_name)
-                    ]
-                )
+                # only the objects of the class, not of every class
+                # whose name starts with the same letters
+                objects = storage.all(class_name)
+                print([str(objects[i]) for i in objects.keys()])
             except KeyError:
                 print("** class doesn't exist **")
                 return
@@ -267,8 +303,13 @@ class HBNBCommand(cmd.Cmd):
     def do_update(self, args):
         """
         Updates an instance based on the class name and id by
-        adding or updating attribute (and save the changes)
-        Ex: update <class> <id> <attribute> <value>
+        adding or updating attributes (and save the changes once),
+        values with spaces are quoted (the whole rest of the line is
+        the value of a single attribute unless every value is quoted
+        or every name is a known attribute),
+        lists are json lists or comma separated values
+        Ex: update <class> <id> <attribute> <value> [<attribute> <value>]
+        Ex: update <class> <id> {"<attribute>": <value>, ...}
 
         Args:
             args (str): Any additional arguments passed with the command.
@@ -293,11 +334,8 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
 
-        try:
-            id = splitted_args[1]
-            key = f"{class_name}.{id}"
-            needed_obj = storage.all()[key]
-        except KeyError:
+        needed_obj = storage.get(class_name, splitted_args[1])
+        if needed_obj is None:
             print("** no instance found **")
             return
 
@@ -305,60 +343,58 @@ class HBNBCommand(cmd.Cmd):
             print("** attribute name missing **")
             return
 
-        if len_spltd_args < 4:
+        text = " ".join(splitted_args[2:]).strip()
+        if text.startswith("{"):
+            # update <class> <id> {"<attribute>": <value>, ...}
+            attributes = self.__parse_dict(text)
+            if attributes is None:
+                print("** invalid dictionary **")
+                return
+        elif len_spltd_args < 4:
             print("** value missing **")
             return
+        else:
+            # update <class> <id> <attribute> <value> [...]
+            tokens = re.findall(HBNBCommand.__token, text)
+            if len(tokens) > 2 and not self.__are_pairs(needed_obj, tokens):
+                # one attribute whose value has spaces but no quotes
+                # (update <class> <id> first_name Betty Ann Holberton)
+                name, _, value = text.partition(" ")
+                tokens = [name, value.strip()]
+            if len(tokens) % 2 == 1:
+                print("** value missing **")
+                return
+            attributes = {
+                name.strip("'\""): value
+                for name, value in zip(tokens[::2], tokens[1::2])
+            }
 
-        attr_name = splitted_args[2]
-        attr_value = splitted_args[3:]
-
-        try:
-            # if the attribute already exists in the object
-            # the error may raises from below line
-            attr_type = type(getattr(needed_obj, attr_name))
-            # if the value of the attribute
-            # like this > "value" or 'value'
-            # (the string include single/double qoutes)
-            # remove single/double qoutes
-            casted_attr_value = attr_type(" ".join(attr_value).strip("'\""))
-            # set the new attr and save it
-            setattr(needed_obj, attr_name, casted_attr_value)
-            needed_obj.save()
-        except AttributeError:
-            try:
-                # if the attribute does'nt exists in the object
-                # and type exists in (HBNBCommand.__types)
-                attr_type = HBNBCommand.__types[attr_name]
-                setattr(
-                    needed_obj,
-                    attr_name,
-                    attr_type(" ".join(attr_value).strip("'\"")),
-                )
-                needed_obj.save()
-            except KeyError:
-                # if the attr not exists in the object
-                # and the name of it not exists in (HBNBCommand.__types)
-                setattr(
-                    needed_obj,
-                    attr_name,
-                    " ".join(attr_value).strip("'\""),
-                )
-                needed_obj.save()
+        error = self.__set_attributes(needed_obj, attributes)
+        if error is not None:
+            print(f"** {error} **")
+            return
+        needed_obj.save()
 
     def help_update(self):
         """
         Display help information for the 'update' command.
         """
         print("Updates an instance based on the class name and id")
-        print("by adding or updating attribute")
-        print("Usage: update <class> <id> <attribute> <value>")
+        print("by adding or updating attributes (saved once)")
+        print("Usage: update <class> <id> <attribute> <value> [...]")
+        print('(quote the values with spaces: name "John Smith",')
+        print('an unquoted rest of line is one value: name John Smith)')
+        print('Usage: update <class> <id> {"<attribute>": <value>, ...}')
 
     def do_count(self, args):
         """
-        write docs
+        Prints the number of instances of a class
+        Ex: count <class>
+
+        Args:
+            args (str): Any additional arguments passed with the command.
         """
         splitted_args = args.split(" ")
-        objects = storage.all()
 
         if splitted_args[0] == "":
             print("** class name missing **")
@@ -367,21 +403,948 @@ class HBNBCommand(cmd.Cmd):
             try:
                 cls_name = splitted_args[0]
                 HBNBCommand.__classes[cls_name]
-                print(
-                    "{}".format(
-                        len(
-                            [
-                                1
-                                for i in objects.keys()
-                                if i.startswith(f"{cls_name}")
-                            ]
-                        )
-                    )
-                )
+                print("{}".format(storage.count(cls_name)))
             except KeyError:
                 print("** class doesn't exist **")
                 return
 
+    def do_set(self, args):
+        """
+        Changes a setting of the interpreter, prints its value
+        when no value is given
+        Ex: set flush <policy>
+
+        Args:
+            args (str): Any additional arguments passed with the command.
+        """
+        splitted_args = args.split()
+
+        if len(splitted_args) == 0:
+            print("** setting name missing **")
+            return
+
+        if splitted_args[0] != "flush":
+            print("** setting doesn't exist **")
+            return
+
+        if len(splitted_args) < 2:
+            print(storage.get_flush_policy())
+            return
+
+        try:
+            storage.set_flush_policy(splitted_args[1])
+        except ValueError:
+            print("** invalid flush policy **")
+
+    def help_set(self):
+        """
+        Display help information for the 'set' command.
+        """
+        print("Changes a setting (prints it without a value)")
+        print("flush: immediate, ops:<N>, interval:<milliseconds> or exit")
+        print("Usage: set flush [<policy>]")
+
+    def do_begin(self, args):
+        """
+        Opens a transaction: the changes made until `commit` are saved
+        by one write, `rollback` undoes them
+        Ex: begin
+
+        Args:
+            args (str): Any additional arguments passed with the command.
+        """
+        try:
+            storage.begin()
+        except ValueError:
+            print("** transaction already open **")
+
+    def help_begin(self):
+        """
+        Display help information for the 'begin' command.
+        """
+        print("Opens a transaction, its changes are saved by commit")
+        print("and undone by rollback (quit without commit drops them)")
+        print("Usage: begin")
+
+    def do_commit(self, args):
+        """
+        Saves the changes of the open transaction in one write
+        Ex: commit
+
+        Args:
+            args (str): Any additional arguments passed with the command.
+        """
+        try:
+            storage.commit()
+        except ValueError:
+            print("** no transaction open **")
+
+    def help_commit(self):
+        """
+        Display help information for the 'commit' command.
+        """
+        print("Saves the changes of the open transaction in one write")
+        print("Usage: commit")
+
+    def do_rollback(self, args):
+        """
+        Undoes the changes of the open transaction
+        Ex: rollback
+
+        Args:
+            args (str): Any additional arguments passed with the command.
+        """
+        try:
+            storage.rollback()
+        except ValueError:
+            print("** no transaction open **")
+
+    def help_rollback(self):
+        """
+        Display help information for the 'rollback' command.
+        """
+        print("Undoes the changes of the open transaction")
+        print("Usage: rollback")
+
+    def do_bulk(self, args):
+        """
+        Creates, updates or destroys many instances of a class at once
+        with one save, prints the number of instances changed.
+        the records (one json object per line) or the ids (one per line)
+        are read from a file, or from stdin until its end with -
+        Ex: bulk create <class> <file>
+        Ex: bulk update <class> <file> <attribute> <value> [...]
+        Ex: bulk destroy <class> <file>
+
+        Args:
+            args (str): Any additional arguments passed with the command.
+        """
+        try:
+            splitted_args = shlex.split(args)
+        except ValueError:
+            print("** invalid arguments **")
+            return
+
+        if len(splitted_args) == 0:
+            print("** bulk command missing **")
+            return
+
+        action = splitted_args[0]
+        if action not in ("create", "update", "destroy"):
+            print("** bulk command doesn't exist **")
+            return
+
+        if len(splitted_args) < 2:
+            print("** class name missing **")
+            return
+
+        class_name = splitted_args[1]
+        if class_name not in HBNBCommand.__classes:
+            print("** class doesn't exist **")
+            return
+
+        if len(splitted_args) < 3:
+            print("** file missing **")
+            return
+
+        attributes = {}
+        pairs = splitted_args[3:]
+        if action == "update":
+            if len(pairs) == 0:
+                print("** attribute name missing **")
+                return
+            if len(pairs) % 2 == 1:
+                print("** value missing **")
+                return
+            try:
+                for name, value in zip(pairs[::2], pairs[1::2]):
+                    attributes[name] = self.__cast_value(
+                        HBNBCommand.__classes[class_name], name, value
+                    )
+            except (TypeError, ValueError):
+                print("** invalid value **")
+                return
+
+        try:
+            if splitted_args[2] == "-":
+                lines = sys.stdin.read().splitlines()
+            else:
+                with open(splitted_args[2]) as file:
+                    lines = file.read().splitlines()
+        except OSError:
+            print("** can't read file **")
+            return
+        lines = [line.strip() for line in lines if line.strip() != ""]
+
+        if action == "create":
+            try:
+                objs = [self.__build(class_name, line) for line in lines]
+            except (TypeError, ValueError):
+                print("** invalid record **")
+                return
+
+        try:
+            if action == "create":
+                count = storage.bulk_new(objs)
+            elif action == "update":
+                count = storage.bulk_update(class_name, lines, **attributes)
+            else:
+                count = storage.bulk_delete(class_name, lines)
+        except KeyError:
+            print("** no instance found **")
+            return
+        except ValueError:
+            # a unique attribute (User.email) taken or given twice
+            print("** value already exists **")
+            return
+        print(count)
+
+    def help_bulk(self):
+        """
+        Display help information for the 'bulk' command.
+        """
+        print("Creates, updates or destroys many instances at once")
+        print("from a file (- for stdin): one json record or id per line")
+        print("Usage: bulk create <class> <file>")
+        print("Usage: bulk update <class> <file> <attribute> <value> [...]")
+        print("Usage: bulk destroy <class> <file>")
+
+    def __build(self, class_name, line):
+        """
+        Returns a new instance of a class from a json record,
+        it is not stored yet (`storage.bulk_new()` stores it)
+
+        Raises:
+            ValueError: if the line is not a json object
+            (or its dates are invalid)
+        """
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError(f"invalid record: {line}")
+        # BaseModel takes datetime objects as they are (no strptime)
+        now = datetime.now()
+        attributes = {"id": str(uuid4()), "created_at": now}
+        attributes["updated_at"] = now
+        attributes.update(record)
+        attributes.pop("__class__", None)
+        return HBNBCommand.__classes[class_name](**attributes)
+
+    def do_where(self, args):
+        """
+        Prints the string representation of the instances of a class
+        meeting conditions, ordered and limited
+        Ex: where Place city_id=<id> price_by_night__lte=100 limit=10
+        operators: <attr>=, __in=a,b, __gt=, __gte=, __lt=, __lte=,
+        __between=low,high and the options order_by=[-]<attr>, limit=<n>
+
+        Args:
+            args (str): Any additional arguments passed with the command.
+        """
+        parsed = self.__parse_query(args)
+        if parsed is None:
+            return
+        try:
+            objects = storage.query(parsed[0], **parsed[1])
+        except ValueError:
+            print("** invalid query **")
+            return
+        print([str(obj) for obj in objects])
+
+    def help_where(self):
+        """
+        Display help information for the 'where' command.
+        """
+        print("Prints the instances of a class meeting conditions")
+        print("<attr>=<value> or <attr>__<op>=<value>, op: in (a,b),")
+        print("gt, gte, lt, lte, between (low,high)")
+        print("Usage: where <class> <conditions>... "
+              "[order_by=[-]<attr>] [limit=<n>]")
+
+    def do_explain(self, args):
+        """
+        Prints how the `where` command would find the instances
+        Ex: explain Place city_id=<id>
+
+        Args:
+            args (str): Any additional arguments passed with the command.
+        """
+        parsed = self.__parse_query(args)
+        if parsed is None:
+            return
+        try:
+            print(storage.explain(parsed[0], **parsed[1]))
+        except ValueError:
+            print("** invalid query **")
+
+    def help_explain(self):
+        """
+        Display help information for the 'explain' command.
+        """
+        print("Prints the plan of a where command (index or scan)")
+        print("Usage: explain <class> <conditions>...")
+
+    def do_near(self, args):
+        """
+        Prints the places at most <km> kilometers from a point,
+        the nearest first
+        Ex: near <latitude> <longitude> <km>
+
+        Args:
+            args (str): Any additional arguments passed with the command.
+        """
+        numbers = self.__parse_numbers(args, 3)
+        if numbers is None:
+            return
+        try:
+            places = storage.within_radius(*numbers)
+        except ValueError:
+            print("** invalid coordinates **")
+            return
+        print([str(place) for place in places])
+
+    def help_near(self):
+        """
+        Display help information for the 'near' command.
+        """
+        print("Prints the places at most <km> kilometers from a point")
+        print("Usage: near <latitude> <longitude> <km>")
+
+    def do_bbox(self, args):
+        """
+        Prints the places inside a box of latitude/longitude
+        Ex: bbox <min_lat> <min_lon> <max_lat> <max_lon>
+
+        Args:
+            args (str): Any additional arguments passed with the command.
+        """
+        numbers = self.__parse_numbers(args, 4)
+        if numbers is None:
+            return
+        try:
+            places = storage.within_bbox(*numbers)
+        except ValueError:
+            print("** invalid coordinates **")
+            return
+        print([str(place) for place in places])
+
+    def help_bbox(self):
+        """
+        Display help information for the 'bbox' command.
+        """
+        print("Prints the places inside a box of latitude/longitude")
+        print("Usage: bbox <min_lat> <min_lon> <max_lat> <max_lon>")
+
+    def do_nearest(self, args):
+        """
+        Prints the <k> places nearest to a point, the nearest first
+        Ex: nearest <latitude> <longitude> <k>
+
+        Args:
+            args (str): Any additional arguments passed with the command.
+        """
+        numbers = self.__parse_numbers(args, 3)
+        if numbers is None:
+            return
+        lat, lon, k = numbers
+        try:
+            if k != int(k):
+                raise ValueError(k)
+            places = storage.nearest(lat, lon, int(k))
+        except (ValueError, OverflowError):
+            print("** invalid coordinates **")
+            return
+        print([str(place) for place in places])
+
+    def help_nearest(self):
+        """
+        Display help information for the 'nearest' command.
+        """
+        print("Prints the <k> places nearest to a point")
+        print("Usage: nearest <latitude> <longitude> <k>")
+
+    def do_search(self, args):
+        """
+        Prints the instances of a class whose text contains words,
+        the most relevant first
+        Ex: search Review quiet clean
+
+        Args:
+            args (str): Any additional arguments passed with the command.
+        """
+        splitted_args = args.split()
+
+        if len(splitted_args) == 0:
+            print("** class name missing **")
+            return
+
+        class_name = splitted_args[0]
+        if class_name not in HBNBCommand.__classes:
+            print("** class doesn't exist **")
+            return
+
+        if len(splitted_args) < 2:
+            print("** search terms missing **")
+            return
+
+        try:
+            objects = storage.search(class_name, " ".join(splitted_args[1:]))
+        except ValueError:
+            print("** class is not searchable **")
+            return
+        print([str(obj) for obj in objects])
+
+    def help_search(self):
+        """
+        Display help information for the 'search' command.
+        """
+        print("Prints the instances of a class whose text contains words")
+        print("(Place name and description, Review text), best first")
+        print("Usage: search <class> <terms>...")
+
+    def __parse_numbers(self, args, count):
+        """
+        Parses the numbers given to the `near`, `bbox` and `nearest`
+        commands, the errors are printed
+
+        Returns:
+            list: `count` floats, or None if the arguments are invalid
+        """
+        splitted_args = args.split()
+        if len(splitted_args) < count:
+            print("** coordinates missing **")
+            return None
+        try:
+            return [float(arg) for arg in splitted_args[:count]]
+        except ValueError:
+            print("** invalid coordinates **")
+            return None
+
+    def __parse_query(self, args):
+        """
+        Parses the arguments of the `where` and `explain` commands,
+        the errors are printed
+
+        Returns:
+            tuple: (class name, keyword arguments of storage.query())
+            or None if the arguments are invalid
+        """
+        try:
+            splitted_args = shlex.split(args)
+        except ValueError:
+            print("** invalid query **")
+            return None
+
+        if len(splitted_args) == 0:
+            print("** class name missing **")
+            return None
+
+        class_name = splitted_args[0]
+        if class_name not in HBNBCommand.__classes:
+            print("** class doesn't exist **")
+            return None
+
+        options = {}
+        try:
+            for arg in splitted_args[1:]:
+                name, sep, value = arg.partition("=")
+                if sep == "":
+                    raise ValueError(arg)
+                attr, _, op = name.rpartition("__")
+                attr = attr or op
+                if name == "limit":
+                    options[name] = int(value)
+                elif name == "order_by":
+                    options[name] = value
+                elif op in ("in", "between", "all"):
+                    options[name] = [
+                        self.__cast(attr, item) for item in value.split(",")
+                    ]
+                else:
+                    options[name] = self.__cast(attr, value)
+        except ValueError:
+            print("** invalid query **")
+            return None
+        return class_name, options
+
+    def __cast_list(self, value):
+        """
+        Casts the text of a list: a json list ["a", "b"]
+        or comma separated values a,b (an empty text is an empty list)
+        """
+        value = value.strip()
+        if value.startswith("["):
+            try:
+                items = json.loads(value)
+            except ValueError:
+                items = None
+            if isinstance(items, list):
+                return items
+        value = value.strip("'\"")
+        return [item.strip() for item in value.split(",") if item.strip()]
+
+    def __cast_value(self, obj, attr_name, value):
+        """
+        Casts a value given to the update commands for an attribute:
+        a text takes the type of the value the attribute has on the object
+        (or class), else the type from HBNBCommand.__types (str if not
+        there), json values (dictionary form) only the type from __types
+
+        Raises:
+            ValueError: if the value is not a value of that type
+        """
+        if not isinstance(value, str):
+            attr_type = HBNBCommand.__types.get(attr_name)
+            return value if attr_type is None else attr_type(value)
+        try:
+            attr_type = type(getattr(obj, attr_name))
+        except AttributeError:
+            return self.__cast(attr_name, value)
+        if attr_type is list:
+            # amenity_ids: a json list or comma separated ids
+            return self.__cast_list(value)
+        # remove the single/double quotes around the value
+        return attr_type(value.strip("'\""))
+
+    def __set_attributes(self, obj, attributes):
+        """
+        Casts the values of attributes (see `__cast_value()`) and sets them
+        on an instance, without saving it. every attribute is checked
+        first, nothing is set if one fails
+
+        Returns:
+            str: the error, None if the attributes are set
+        """
+        try:
+            attributes = {
+                name: self.__cast_value(obj, name, value)
+                for name, value in attributes.items()
+            }
+        except (TypeError, ValueError):
+            return "invalid value"
+
+        for name, value in attributes.items():
+            if isinstance(getattr(type(obj), name, None), property):
+                # a relationship property (State.cities...)
+                return f"{name} can't be set"
+            try:
+                storage.check_unique(obj, name, value)
+            except ValueError:
+                # a unique attribute (User.email) taken by another object
+                return f"{name} already exists"
+
+        for name, value in attributes.items():
+            setattr(obj, name, value)
+        return None
+
+    def __are_pairs(self, obj, tokens):
+        """
+        Tells if the tokens of an update command are <attribute> <value>
+        pairs: every value is quoted (or a json list), or every name
+        is an attribute of the instance (or its class) or a typed one
+
+        Returns:
+            bool: True if the tokens are pairs
+        """
+        if len(tokens) % 2 == 1:
+            return False
+        names = [name.strip("'\"") for name in tokens[::2]]
+        values = tokens[1::2]
+        if all(value[0] in "\"'[" for value in values):
+            return True
+        return all(
+            name in HBNBCommand.__types or name in obj.__dict__ or
+            hasattr(type(obj), name)
+            for name in names
+        )
+
+    def __parse_dict(self, text):
+        """
+        Parses the dictionary of the update commands,
+        json or python syntax ({'name': 'x'})
+
+        Returns:
+            dict: the attributes, None if the text is not a dictionary
+        """
+        try:
+            attributes = json.loads(text)
+        except ValueError:
+            try:
+                attributes = ast.literal_eval(text)
+            except (ValueError, SyntaxError):
+                return None
+        if not isinstance(attributes, dict):
+            return None
+        return {str(name): value for name, value in attributes.items()}
+
+    def __dotted_update_args(self, text):
+        """
+        Turns the arguments of <class>.update(<id>, <attribute>, <value>)
+        or <class>.update(<id>, <dictionary>) into those of `update`
+        """
+        obj_id, _, rest = text.partition(",")
+        obj_id = obj_id.strip().strip("'\"")
+        rest = rest.strip()
+        if rest.startswith("{"):
+            return f"{obj_id} {rest}"
+        tokens = [
+            token.rstrip(",")
+            for token in re.findall(HBNBCommand.__token, rest)
+        ]
+        return " ".join([obj_id] + [token for token in tokens if token])
+
+    def __cast(self, attr_name, value):
+        """
+        Casts the text of a value to the type of an attribute
+        (from HBNBCommand.__types, str for the other attributes)
+
+        Raises:
+            ValueError: if the text is not a value of that type
+        """
+        return HBNBCommand.__types.get(attr_name, str)(value.strip("'\""))
+
+    def run_batch(self, lines, flush_every=None, jsonl=False):
+        """
+        Runs the commands of a script, one per line, with the saves
+        deferred: the changes are written every @flush_every commands
+        and at the end. The number of commands, their throughput and
+        the errors of each command are reported to stderr.
+        blank lines and lines starting with # are skipped,
+        quit and EOF end the script.
+
+        Args:
+            lines (iterable): The lines of the script.
+            flush_every (int): Write the changes every N commands,
+            None to write them at the end only.
+            jsonl (bool): The lines are requests of the JSON lines
+            protocol (see `run_jsonl()`), not console commands.
+
+        Returns:
+            int: The number of commands that failed.
+        """
+        policy = storage.get_flush_policy()
+        try:
+            storage.set_flush_policy("exit")
+        except ValueError:
+            # the database storage commits every change, nothing to defer
+            policy = None
+        errors = {}
+        done = 0
+        start = time.perf_counter()
+        try:
+            for line in lines:
+                line = line.strip()
+                if line == "" or line.startswith("#"):
+                    continue
+                if jsonl:
+                    name, succeeded = self.__run_request(line)
+                else:
+                    name = self.__command_name(line)
+                    succeeded = name in ("quit", "EOF") or \
+                        self.__run_line(name, line)
+                if name in ("quit", "EOF"):
+                    break
+                done += 1
+                if not succeeded:
+                    name = name or "unknown"
+                    errors[name] = errors.get(name, 0) + 1
+                if flush_every is not None and done % flush_every == 0:
+                    storage.flush()
+        finally:
+            storage.flush()
+            if policy is not None:
+                storage.set_flush_policy(policy)
+        elapsed = time.perf_counter() - start
+
+        failed = sum(errors.values())
+        rate = done / elapsed if elapsed > 0 else 0
+        print(
+            f"{done} commands in {elapsed:.2f}s ({rate:.0f} commands/s), "
+            f"{failed} errors",
+            file=sys.stderr,
+        )
+        for name, count in sorted(errors.items()):
+            print(f"    {name}: {count} errors", file=sys.stderr)
+        return failed
+
+    def __command_name(self, line):
+        """
+        Returns the command a line runs, None if it runs none
+        """
+        match = re.match(r"^[a-zA-Z0-9]*\.(\w+)\(", line)
+        if match:
+            name = match.group(1)
+            return name if name in HBNBCommand.__dotted else None
+        name = self.parseline(line)[0]
+        if name is None or not hasattr(self, "do_" + name):
+            return None
+        return name
+
+    def __run_line(self, name, line):
+        """
+        Runs a line of a script, returns False if the command failed
+        (it printed an error or raised an exception)
+        """
+        if name is None:
+            print("** unknown command **")
+            return False
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                self.onecmd(line)
+        except Exception as error:
+            output.write(f"** {error} **\n")
+        text = output.getvalue()
+        sys.stdout.write(text)
+        return re.search(r"^\*\* ", text, re.MULTILINE) is None
+
+    def run_jsonl(self, lines):
+        """
+        Runs the JSON lines protocol: one json request per line, one json
+        response per request on stdout, in the same order, until the end
+        of the lines or a quit request. the changes are saved as usual
+        (run_batch(lines, jsonl=True) defers them).
+
+        A request: {"id": <any>, "command": "<command>", ...}
+            create: "class", "attributes" (optional) -> the new id
+            show: "class", "instance" -> the instance (to_dict())
+            all: "class" (optional) -> the instances
+            count: "class" -> the number of instances
+            update: "class", "instance", "attributes" -> null
+            destroy: "class", "instance", "cascade" and "dry_run"
+            (optional) -> {<class>: <number of instances deleted>}
+            where: "class", "where" ({<attribute>[__<operator>]: value}),
+            "order_by", "limit" (optional) -> the instances
+            begin, commit, rollback, flush, quit -> null
+        A response: {"id": <id of the request>, "ok": true, "result": ...}
+        or {"id": <id of the request>, "ok": false, "error": "<error>"}
+        with the errors of the console ("no instance found"...).
+
+        Args:
+            lines (iterable): The requests.
+        """
+        for line in lines:
+            line = line.strip()
+            if line == "":
+                continue
+            if self.__run_request(line)[0] == "quit":
+                break
+
+    def __run_request(self, line):
+        """
+        Runs a request of the JSON lines protocol and writes its response
+
+        Returns:
+            tuple: (the command of the request, False if it failed)
+        """
+        request_id = name = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError("invalid request")
+            request_id = request.get("id")
+            name = request.get("command")
+            if name is None:
+                raise RequestError("command missing")
+            if not isinstance(name, str) or name not in HBNBCommand.__requests:
+                # a list or a dict would not be a valid key either
+                name = None
+                raise RequestError("unknown command")
+            result = HBNBCommand.__requests[name](self, request)
+            response = {"id": request_id, "ok": True, "result": result}
+        except json.JSONDecodeError:
+            response = {"id": None, "ok": False, "error": "invalid json"}
+        except Exception as error:
+            response = {"id": request_id, "ok": False, "error": str(error)}
+        sys.stdout.write(json.dumps(response, default=str) + "\n")
+        sys.stdout.flush()
+        return name, response["ok"]
+
+    def __request_class(self, request):
+        """
+        Returns the class of a request
+
+        Raises:
+            RequestError: if the class is missing or doesn't exist
+        """
+        class_name = request.get("class")
+        if class_name is None:
+            raise RequestError("class name missing")
+        if not isinstance(class_name, str) or \
+                class_name not in HBNBCommand.__classes:
+            raise RequestError("class doesn't exist")
+        return HBNBCommand.__classes[class_name]
+
+    def __request_instance(self, request):
+        """
+        Returns the instance of a request
+
+        Raises:
+            RequestError: if the class or the instance is missing
+            or doesn't exist
+        """
+        cls = self.__request_class(request)
+        instance_id = request.get("instance")
+        if instance_id is None:
+            raise RequestError("instance id missing")
+        obj = storage.get(cls.__name__, str(instance_id))
+        if obj is None:
+            raise RequestError("no instance found")
+        return obj
+
+    def __request_attributes(self, request):
+        """
+        Returns the attributes of a request ({} if there are none)
+
+        Raises:
+            RequestError: if they are not a json object
+        """
+        attributes = request.get("attributes", {})
+        if not isinstance(attributes, dict):
+            raise RequestError("invalid attributes")
+        return attributes
+
+    def __request_create(self, request):
+        """
+        Creates an instance with attributes and saves it,
+        returns its id
+        """
+        cls = self.__request_class(request)
+        attributes = self.__request_attributes(request)
+        now = datetime.now()
+        # the instance is stored once its attributes are checked
+        obj = cls(id=str(uuid4()), created_at=now, updated_at=now)
+        error = self.__set_attributes(obj, attributes)
+        if error is not None:
+            raise RequestError(error)
+        storage.new(obj)
+        obj.save()
+        return obj.id
+
+    def __request_show(self, request):
+        """
+        Returns the attributes of an instance
+        """
+        return self.__request_instance(request).to_dict()
+
+    def __request_all(self, request):
+        """
+        Returns the attributes of every instance (of a class)
+        """
+        if request.get("class") is None:
+            objects = storage.all()
+        else:
+            objects = storage.all(self.__request_class(request).__name__)
+        return [obj.to_dict() for obj in objects.values()]
+
+    def __request_count(self, request):
+        """
+        Returns the number of instances of a class
+        """
+        return storage.count(self.__request_class(request).__name__)
+
+    def __request_update(self, request):
+        """
+        Sets attributes of an instance and saves it once
+        """
+        obj = self.__request_instance(request)
+        attributes = self.__request_attributes(request)
+        if len(attributes) == 0:
+            raise RequestError("attribute name missing")
+        error = self.__set_attributes(obj, attributes)
+        if error is not None:
+            raise RequestError(error)
+        obj.save()
+
+    def __request_destroy(self, request):
+        """
+        Deletes an instance (and its dependents with "cascade")
+        and saves, returns the number of instances deleted per class
+        """
+        obj = self.__request_instance(request)
+        dry_run = bool(request.get("dry_run"))
+        if request.get("cascade"):
+            counts = storage.delete_cascade(obj, dry_run)
+        else:
+            counts = {obj.__class__.__name__: 1}
+            if not dry_run:
+                storage.delete(obj)
+        if not dry_run:
+            storage.save()
+        return counts
+
+    def __request_where(self, request):
+        """
+        Returns the attributes of the instances of a class meeting
+        conditions (see `storage.query()`), ordered and limited
+        """
+        cls = self.__request_class(request)
+        predicates = request.get("where", {})
+        if not isinstance(predicates, dict):
+            raise RequestError("invalid query")
+        try:
+            objects = storage.query(
+                cls, request.get("order_by"), request.get("limit"),
+                **predicates
+            )
+        except (TypeError, ValueError):
+            raise RequestError("invalid query") from None
+        return [obj.to_dict() for obj in objects]
+
+    def __request_begin(self, request):
+        """
+        Opens a transaction
+        """
+        try:
+            storage.begin()
+        except ValueError:
+            raise RequestError("transaction already open") from None
+
+    def __request_commit(self, request):
+        """
+        Saves the changes of the open transaction
+        """
+        try:
+            storage.commit()
+        except ValueError:
+            raise RequestError("no transaction open") from None
+
+    def __request_rollback(self, request):
+        """
+        Undoes the changes of the open transaction
+        """
+        try:
+            storage.rollback()
+        except ValueError:
+            raise RequestError("no transaction open") from None
+
+    def __request_flush(self, request):
+        """
+        Writes the saves deferred so far
+        """
+        storage.flush()
+
+    def __request_quit(self, request):
+        """
+        Ends the requests, the changes are written
+        """
+        storage.flush()
+
+    # the commands of the JSON lines protocol
+    __requests = {
+        "create": __request_create,
+        "show": __request_show,
+        "all": __request_all,
+        "count": __request_count,
+        "update": __request_update,
+        "destroy": __request_destroy,
+        "where": __request_where,
+        "begin": __request_begin,
+        "commit": __request_commit,
+        "rollback": __request_rollback,
+        "flush": __request_flush,
+        "quit": __request_quit,
+    }
+
     def emptyline(self):
         """
         Do nothing when an empty line is entered.
@@ -392,19 +1355,90 @@ class HBNBCommand(cmd.Cmd):
         """
         Do for unrecognized commands.
         """
-        methods = ["update", "all", "show", "create", "destroy", "count"]
         # match syntax like this "<class>.<method>(<args>)"
-        # method should from @methods
-        pattern = r"^([a-zA-Z0-9]*)\.(" + "|".join(methods) + r")\((.*)\)$"
+        # method should from @__dotted
+        pattern = (
+            r"^([a-zA-Z0-9]*)\.(" + "|".join(HBNBCommand.__dotted) +
+            r")\((.*)\)$"
+        )
         match = re.match(pattern, args)
         if match:
             class_name = match.group(1)
             method_name = match.group(2)
             input_args = match.group(3)
+            if method_name == "update":
+                input_args = self.__dotted_update_args(input_args)
             HBNBCommand().onecmd(f"{method_name} {class_name} {input_args}")
         else:
             pass
 
 
+def positive_int(value):
+    """
+    Returns a command line value as a positive int
+
+    Raises:
+        argparse.ArgumentTypeError: if it is not one
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"not a positive number: {value}")
+    return number
+
+
+def main(argv=None):
+    """
+    Runs the console, interactive or on a script (--batch),
+    or the JSON lines protocol (--jsonl, see `HBNBCommand.run_jsonl()`)
+    ex: ./console.py --batch fix.txt --flush-every 1000
+    ex: ./console.py --batch - < fix.txt
+    ex: ./console.py --jsonl
+
+    Args:
+        argv (list): The command line arguments (default: sys.argv).
+
+    Returns:
+        int: The exit status, 1 if a command of the script failed.
+    """
+    parser = argparse.ArgumentParser(description="HBNB console")
+    parser.add_argument(
+        "--batch", metavar="FILE",
+        help="run the commands of FILE (- for stdin) with deferred saves",
+    )
+    parser.add_argument(
+        "--flush-every", metavar="N", type=positive_int,
+        help="with --batch, write the changes every N commands",
+    )
+    parser.add_argument(
+        "--jsonl", action="store_true",
+        help="read json requests from stdin (or --batch FILE), "
+        "write json responses",
+    )
+    args = parser.parse_args(argv)
+
+    if args.batch is None:
+        if args.flush_every is not None:
+            parser.error("--flush-every needs --batch")
+        if args.jsonl:
+            HBNBCommand().run_jsonl(sys.stdin)
+        else:
+            HBNBCommand().cmdloop()
+        return 0
+
+    options = (args.flush_every, args.jsonl)
+    try:
+        if args.batch == "-":
+            failed = HBNBCommand().run_batch(sys.stdin, *options)
+        else:
+            with open(args.batch, "r") as file:
+                failed = HBNBCommand().run_batch(file, *options)
+    except OSError as error:
+        parser.error(f"can't read {args.batch}: {error.strerror}")
+    return 1 if failed else 0
+
+
 if __name__ == "__main__":
-    HBNBCommand().cmdloop()
+    sys.exit(main())
@@ -1,5 +1,12 @@
-from models.engine.file_storage import FileStorage
+from os import getenv
 
-storage = FileStorage()
+if getenv("HBNB_TYPE_STORAGE") == "db":
+    from models.engine.db_storage import DBStorage
+
+    storage = DBStorage()
+else:
+    from models.engine.file_storage import FileStorage
+
+    storage = FileStorage()
 
 storage.reload()
@@ -33,12 +33,16 @@ class BaseModel:
         if kwargs is not None and len(kwargs.keys()) > 0:
             temp = kwargs.copy()
 
-            self.created_at = datetime.strptime(
-                temp["created_at"], "%Y-%m-%dT%H:%M:%S.%f"
-            )
-            self.updated_at = datetime.strptime(
-                temp["updated_at"], "%Y-%m-%dT%H:%M:%S.%f"
-            )
+            # the binary storage format gives datetime objects already
+            for name in ("created_at", "updated_at"):
+                if isinstance(temp[name], datetime):
+                    setattr(self, name, temp[name])
+                else:
+                    setattr(
+                        self,
+                        name,
+                        datetime.strptime(temp[name], "%Y-%m-%dT%H:%M:%S.%f"),
+                    )
 
             del temp["created_at"]
             del temp["updated_at"]
@@ -64,6 +68,32 @@ class BaseModel:
         self.updated_at = datetime.now()
         storage.save()
 
+    def __setattr__(self, name, value):
+        """
+        Sets an attribute and reports the change to the storage,
+        so the next save knows this object is dirty
+
+        Raises:
+            ValueError: if the attribute is unique and another object
+            already has the value (see `storage.before_set()`)
+        """
+        storage.before_set(self, name, value)
+        super().__setattr__(name, value)
+        storage.touch(self)
+
+    def related(self, cls_name, attr):
+        """
+        Returns the objects of a class whose attribute (a foreign key)
+        holds the id of this object, as a list,
+        through the index of that attribute (O(objects found))
+        ex: state.related("City", "state_id")
+
+        Args:
+            cls_name (str): the class name of the related objects.
+            attr (str): the foreign key attribute.
+        """
+        return list(storage.lookup(cls_name, attr, self.id).values())
+
     def to_dict(self):
         """
         Converts the object's attributes to a dictionary for serialization.
@@ -14,7 +14,17 @@ class City(BaseModel):
     Class Attributes:
         state_id (str): The identifier of the state associated with the city.
         name (str): The name of the city.
+
+    Properties:
+        places (list): The places of the city.
     """
 
     state_id = ""
     name = ""
+
+    @property
+    def places(self):
+        """
+        The places of the city (Place.city_id)
+        """
+        return self.related("Place", "city_id")
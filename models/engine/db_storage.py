@@ -0,0 +1,775 @@
+#!/usr/bin/python3
+"""
+representing a DBStorage Class
+
+This module defines the `DBStorage` class,
+a storage engine with the same surface as `FileStorage`
+that keeps the objects in a SQLite database (stdlib `sqlite3`).
+
+Every model class gets its own table:
+    id (primary key), created_at, updated_at,
+    one indexed column for each foreign key of the class
+    (city_id, user_id, place_id, state_id) and each unique attribute
+    (User.email, see `models/engine/indexes.py`)
+    and `data`, the json text of the whole object.
+
+Rows are turned into objects only when they are read, so a store can be
+bigger than memory, and a save only writes the rows that changed.
+The objects read are only kept while they are used (or changed and not
+saved yet), reading a row again gives the same object meanwhile.
+`query()` on attributes without a column, `search()`, `within_radius()`,
+`within_bbox()` and `nearest()` read every row of the class (the objects
+they return are kept as long as the result).
+It is selected with HBNB_TYPE_STORAGE=db (see `models/__init__.py`).
+"""
+import os
+import json
+import weakref
+import sqlite3
+import contextlib
+from datetime import datetime
+from models.engine.query import parse_predicates, select
+from models.engine.indexes import check_point, distance_km
+from models.engine.indexes import declared_indexes, dependents, unique_attrs
+from models.engine.transaction import UndoLog
+
+
+def _model_classes():
+    """
+    Returns {class name: class} of the models (one table each),
+    imported from their modules and not from the console: `reload()`
+    runs while `models` is imported, maybe by the console itself
+
+    Returns:
+        dict: the model classes by name
+    """
+    from models.base_model import BaseModel
+    from models.user import User
+    from models.city import City
+    from models.place import Place
+    from models.review import Review
+    from models.state import State
+    from models.amenity import Amenity
+
+    return {
+        cls.__name__: cls
+        for cls in (BaseModel, User, City, Place, Review, State, Amenity)
+    }
+
+
+class DBStorage:
+    """
+    DBStorage class responsible for storing objects in a SQLite database
+    and turning rows back into objects.
+
+    Class Attributes:
+        __db_path (str): The default path of the database file.
+    """
+
+    __db_path = "hbnb.db"
+
+    def __init__(self):
+        """
+        Initializes the storage from the environment
+
+        HBNB_DB_PATH: path of the database file (default: hbnb.db)
+        """
+        self.__db_path = os.getenv("HBNB_DB_PATH", DBStorage.__db_path)
+        self.__connection = None
+        # objects read or created in this process and still used, by key
+        # (the changed ones are also held by __changes until saved)
+        self.__objects = weakref.WeakValueDictionary()
+        # keys changed since the last save -> object (None if destroyed)
+        self.__changes = {}
+        # class name -> indexed columns of its table
+        self.__columns = {}
+        # class name -> model class, known once reloaded
+        self.__classes = {}
+        # the state of the objects changed by the open transaction
+        self.__undo = None
+
+    def all(self, cls=None):
+        """
+        Return a dictionary containing all stored objects,
+        every row is read (and turned into an object) if it was not yet.
+
+        Args:
+            cls (type | str): only return the objects of this class
+            (or class name), only its table is read.
+        """
+        if cls is None:
+            cls_names = list(self.__columns)
+        else:
+            cls_names = [cls if isinstance(cls, str) else cls.__name__]
+        objects = {}
+        for cls_name in cls_names:
+            if cls_name not in self.__columns:
+                continue
+            for row in self.__connect().execute(
+                f'SELECT id, data FROM "{cls_name}"'
+            ):
+                key = f"{cls_name}.{row[0]}"
+                if key not in self.__changes:
+                    objects[key] = self.__materialize(cls_name, row[1])
+        for key, obj in self.__changes.items():
+            if obj is not None and key.split(".")[0] in cls_names:
+                objects[key] = obj
+        return objects
+
+    def count(self, cls=None):
+        """
+        Returns the number of stored objects (of a class),
+        rows are counted by sqlite without being read.
+
+        Args:
+            cls (type | str): only count the objects of this class
+            (or class name).
+        """
+        if cls is None:
+            return sum(self.count(cls_name) for cls_name in self.__columns)
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        if cls_name not in self.__columns:
+            return 0
+        changed = [
+            (key.split(".", 1)[1], obj)
+            for key, obj in self.__changes.items()
+            if key.split(".")[0] == cls_name
+        ]
+        ids = [obj_id for obj_id, _ in changed]
+        # rows changed since the last save are counted from memory
+        (count,) = (
+            self.__connect()
+            .execute(
+                f'SELECT COUNT(*) FROM "{cls_name}" '
+                f'WHERE id NOT IN ({", ".join("?" * len(ids))})',
+                ids,
+            )
+            .fetchone()
+        )
+        return count + sum(1 for _, obj in changed if obj is not None)
+
+    def get(self, cls, id):
+        """
+        Returns one object by class and id (None if there is no such object),
+        only its row is read.
+
+        Args:
+            cls (type | str): The class (or class name) of the object.
+            id (str): The id of the object.
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        key = f"{cls_name}.{id}"
+        if key in self.__changes:
+            return self.__changes[key]
+        obj = self.__objects.get(key)
+        if obj is not None:
+            return obj
+        if cls_name not in self.__columns:
+            return None
+        row = (
+            self.__connect()
+            .execute(f'SELECT data FROM "{cls_name}" WHERE id = ?', (id,))
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return self.__materialize(cls_name, row[0])
+
+    def lookup(self, cls, attr, value):
+        """
+        Returns {key: object} of the objects of a class
+        whose attribute equals a value, foreign keys are looked up
+        through the index of their column, other attributes are checked
+        on every object of the class
+
+        Args:
+            cls (type | str): The class (or class name) of the objects.
+            attr (str): The attribute.
+            value: The searched value.
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        if attr not in self.__columns.get(cls_name, []):
+            return {
+                key: obj
+                for key, obj in self.all(cls_name).items()
+                if getattr(obj, attr, None) == value
+            }
+        objects = {}
+        for row in self.__connect().execute(
+            f'SELECT id, data FROM "{cls_name}" WHERE {attr} = ?', (value,)
+        ):
+            key = f"{cls_name}.{row[0]}"
+            if key not in self.__changes:
+                objects[key] = self.__materialize(cls_name, row[1])
+        for key, obj in self.__changes.items():
+            if key.split(".")[0] != cls_name or obj is None:
+                continue
+            if getattr(obj, attr, None) == value:
+                objects[key] = obj
+        return objects
+
+    def get_by(self, cls, **attributes):
+        """
+        Returns the object of a class whose attributes equal values,
+        None if there is none (see `FileStorage.get_by()`)
+
+        Raises:
+            ValueError: if no attribute is given.
+        """
+        if len(attributes) == 0:
+            raise ValueError("get_by needs an attribute")
+        found = self.query(
+            cls,
+            limit=1,
+            **{f"{attr}__eq": value for attr, value in attributes.items()},
+        )
+        return found[0] if len(found) > 0 else None
+
+    def query(self, cls, order_by=None, limit=None, **predicates):
+        """
+        Returns the objects of a class meeting predicates as a list,
+        an equality on a foreign key is looked up through its column index
+        (see `FileStorage.query()` for the arguments)
+
+        Raises:
+            ValueError: if a predicate, the limit or the order is invalid
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        conditions = parse_predicates(predicates)
+        condition = self.__indexed_condition(cls_name, conditions)
+        if condition is None:
+            candidates = self.all(cls_name).values()
+        else:
+            candidates = self.lookup(cls_name, *condition).values()
+        return select(candidates, conditions, order_by, limit)
+
+    def explain(self, cls, order_by=None, limit=None, **predicates):
+        """
+        Returns how `query()` would run with the same arguments, as a dict
+        (see `FileStorage.explain()`)
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        condition = self.__indexed_condition(
+            cls_name, parse_predicates(predicates)
+        )
+        if condition is None:
+            explained = {"plan": "scan", "candidates": self.count(cls_name)}
+        else:
+            (count,) = (
+                self.__connect()
+                .execute(
+                    f'SELECT COUNT(*) FROM "{cls_name}" '
+                    f"WHERE {condition[0]} = ?",
+                    (condition[1],),
+                )
+                .fetchone()
+            )
+            explained = {
+                "plan": "index",
+                "index": f"{cls_name}.{condition[0]}",
+                "kind": "sqlite",
+                "operator": "eq",
+                "candidates": count,
+            }
+        explained["order_by"] = order_by
+        explained["limit"] = limit
+        return explained
+
+    def __indexed_condition(self, cls_name, conditions):
+        """
+        Returns (column, value) of an equality condition on an indexed
+        foreign key column, or None if there is none
+        """
+        for attr, op, arg in conditions:
+            if op == "eq" and attr in self.__columns.get(cls_name, []):
+                return attr, arg
+        return None
+
+    def within_radius(self, lat, lon, km, cls="Place"):
+        """
+        Returns the objects at most `km` kilometers from a point
+        as a list, the nearest first, every object of the class is checked
+        (see `FileStorage.within_radius()`)
+        """
+        check_point(lat, lon)
+        if not km >= 0:
+            raise ValueError(f"invalid radius: {km}")
+        found = [
+            (distance, key, obj)
+            for distance, key, obj in self.__distances(cls, lat, lon)
+            if distance <= km
+        ]
+        return [obj for _, _, obj in sorted(found, key=lambda f: f[:2])]
+
+    def within_bbox(self, min_lat, min_lon, max_lat, max_lon, cls="Place"):
+        """
+        Returns the objects inside a box as a list,
+        every object of the class is checked
+        (see `FileStorage.within_bbox()`)
+        """
+        check_point(min_lat, min_lon)
+        check_point(max_lat, max_lon)
+        found = []
+        for obj in self.all(cls).values():
+            lat = getattr(obj, "latitude", None)
+            lon = getattr(obj, "longitude", None)
+            try:
+                check_point(lat, lon)
+            except (TypeError, ValueError):
+                continue
+            if not min_lat <= lat <= max_lat:
+                continue
+            if min_lon <= max_lon and not min_lon <= lon <= max_lon:
+                continue
+            if min_lon > max_lon and max_lon < lon < min_lon:
+                continue
+            found.append(obj)
+        return found
+
+    def nearest(self, lat, lon, k, cls="Place"):
+        """
+        Returns the `k` objects nearest to a point as a list,
+        the nearest first, every object of the class is checked
+        (see `FileStorage.nearest()`)
+        """
+        check_point(lat, lon)
+        if type(k) is not int or k < 0:
+            raise ValueError(f"invalid number of objects: {k}")
+        found = sorted(
+            self.__distances(cls, lat, lon), key=lambda f: f[:2]
+        )
+        return [obj for _, _, obj in found[:k]]
+
+    def search(self, cls, text, limit=None):
+        """
+        Returns the objects of a class whose text attributes contain
+        words of a text as a list, the most relevant first (BM25),
+        the text index is built from every object of the class
+        (see `FileStorage.search()`)
+
+        Raises:
+            ValueError: if the class has no text index
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        index = declared_indexes(cls_name).get("text")
+        if index is None:
+            raise ValueError(f"{cls_name} has no text index")
+        objects = self.all(cls_name)
+        index.build(objects)
+        return [objects[key] for _, key in index.search(text, limit)]
+
+    def __distances(self, cls, lat, lon):
+        """
+        Yields (distance in km, key, obj) of the objects of a class
+        that have a valid latitude and longitude
+        """
+        for key, obj in self.all(cls).items():
+            obj_lat = getattr(obj, "latitude", None)
+            obj_lon = getattr(obj, "longitude", None)
+            try:
+                check_point(obj_lat, obj_lon)
+            except (TypeError, ValueError):
+                continue
+            yield distance_km(lat, lon, obj_lat, obj_lon), key, obj
+
+    def new(self, obj):
+        """
+        Adds a new object to the storage, it is written by the next save.
+
+        Args:
+            obj (BaseModel): The object to be added.
+
+        Raises:
+            ValueError: if another object has the value of one of its
+            unique attributes.
+        """
+        key = f"{obj.__class__.__name__}.{obj.id}"
+        for attr in unique_attrs(obj.__class__.__name__):
+            self.check_unique(obj, attr, getattr(obj, attr, None))
+        if self.__undo is not None:
+            self.__undo.record(key, self.get(obj.__class__.__name__, obj.id))
+        self.__objects[key] = obj
+        self.__changes[key] = obj
+
+    def touch(self, obj):
+        """
+        Marks a stored object as changed so the next save writes its row,
+        objects that are not stored (yet) are ignored.
+
+        Args:
+            obj (BaseModel): The changed object.
+        """
+        obj_id = obj.__dict__.get("id")
+        if obj_id is None:
+            return
+        key = f"{obj.__class__.__name__}.{obj_id}"
+        if self.__objects.get(key) is obj:
+            self.__changes[key] = obj
+
+    def before_set(self, obj, attr, value):
+        """
+        Called by BaseModel before an attribute of an object is set,
+        checks the unique attributes and records the state of the object
+        in a transaction (see `FileStorage.before_set()`)
+        """
+        if "id" not in obj.__dict__:
+            # not initialized yet (BaseModel.__init__), so not stored
+            return
+        self.check_unique(obj, attr, value)
+        if self.__undo is None:
+            return
+        key = f"{obj.__class__.__name__}.{obj.__dict__.get('id')}"
+        if self.__objects.get(key) is obj:
+            self.__undo.record(key, obj)
+
+    def check_unique(self, obj, attr, value):
+        """
+        Raises ValueError if another object of the class of an object
+        already has a value of a unique attribute, looked up through
+        the index of its column (see `FileStorage.check_unique()`)
+        """
+        cls_name = obj.__class__.__name__
+        if attr not in unique_attrs(cls_name):
+            return
+        if value is None or value == "":
+            return
+        key = f"{cls_name}.{obj.__dict__.get('id')}"
+        for other in self.lookup(cls_name, attr, value):
+            if other != key:
+                raise ValueError(
+                    f"{cls_name}.{attr} already exists: {value}"
+                )
+
+    def delete(self, obj):
+        """
+        Removes an object from the storage,
+        its row is deleted by the next save.
+
+        Args:
+            obj (BaseModel): The object to be removed.
+
+        Raises:
+            KeyError: if the object is not stored.
+        """
+        key = f"{obj.__class__.__name__}.{obj.id}"
+        if self.get(obj.__class__.__name__, obj.id) is None:
+            raise KeyError(key)
+        if self.__undo is not None:
+            self.__undo.record(key, obj)
+        self.__objects.pop(key, None)
+        self.__changes[key] = None
+
+    def delete_cascade(self, obj, dry_run=False):
+        """
+        Removes an object and the objects depending on it,
+        found through the foreign key column indexes, their rows are
+        deleted by the next save (see `FileStorage.delete_cascade()`)
+
+        Returns:
+            dict: {class name: number of objects} removed
+            (or that would be removed).
+
+        Raises:
+            KeyError: if the object is not stored.
+        """
+        key = f"{obj.__class__.__name__}.{obj.id}"
+        if self.get(obj.__class__.__name__, obj.id) is None:
+            raise KeyError(key)
+        counts = {}
+        for key, child in dependents(obj, self.lookup).items():
+            cls_name = key.split(".")[0]
+            counts[cls_name] = counts.get(cls_name, 0) + 1
+            if not dry_run:
+                self.delete(child)
+        return counts
+
+    def bulk_new(self, objs):
+        """
+        Adds many new objects at once, written by one save in one sqlite
+        transaction (see `FileStorage.bulk_new()`)
+
+        Returns:
+            int: the number of objects added.
+
+        Raises:
+            ValueError: if a unique value is taken, or given twice.
+        """
+        objs = list(objs)
+        for cls_name in {obj.__class__.__name__ for obj in objs}:
+            for attr in unique_attrs(cls_name):
+                values = [
+                    getattr(obj, attr, None)
+                    for obj in objs
+                    if obj.__class__.__name__ == cls_name
+                ]
+                values = [value for value in values if value not in ("", None)]
+                if len(values) != len(set(values)):
+                    raise ValueError(f"{cls_name}.{attr} given twice")
+        for obj in objs:
+            for attr in unique_attrs(obj.__class__.__name__):
+                self.check_unique(obj, attr, getattr(obj, attr, None))
+        for obj in objs:
+            self.new(obj)
+        self.save()
+        return len(objs)
+
+    def bulk_update(self, cls, ids, **attributes):
+        """
+        Sets the same attributes on many objects of a class at once,
+        written by one save (see `FileStorage.bulk_update()`)
+
+        Returns:
+            int: the number of objects updated.
+
+        Raises:
+            KeyError: if an object is not stored (nothing is updated).
+            ValueError: if a unique value is taken, or given to
+            several objects.
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        objs = self.__bulk_get(cls_name, ids)
+        for attr in unique_attrs(cls_name):
+            value = attributes.get(attr)
+            if value is None or value == "":
+                continue
+            if len(objs) > 1:
+                raise ValueError(f"{cls_name}.{attr} given twice")
+            for obj in objs:
+                self.check_unique(obj, attr, value)
+        now = datetime.now()
+        for obj in objs:
+            if self.__undo is not None:
+                self.__undo.record(f"{cls_name}.{obj.id}", obj)
+            obj.__dict__.update(attributes)
+            obj.__dict__["updated_at"] = now
+            self.__changes[f"{cls_name}.{obj.id}"] = obj
+        self.save()
+        return len(objs)
+
+    def bulk_delete(self, cls, ids):
+        """
+        Removes many objects of a class at once, their rows are deleted
+        by one save (see `FileStorage.bulk_delete()`)
+
+        Returns:
+            int: the number of objects removed.
+
+        Raises:
+            KeyError: if an object is not stored (nothing is removed).
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        objs = self.__bulk_get(cls_name, ids)
+        for obj in objs:
+            self.delete(obj)
+        self.save()
+        return len(objs)
+
+    def __bulk_get(self, cls_name, ids):
+        """
+        Returns the objects of a class by id, as a list
+
+        Raises:
+            KeyError: if one of them is not stored.
+        """
+        objs = []
+        for obj_id in ids:
+            obj = self.get(cls_name, obj_id)
+            if obj is None:
+                raise KeyError(f"{cls_name}.{obj_id}")
+            objs.append(obj)
+        return objs
+
+    def save(self):
+        """
+        Writes the created, updated and deleted objects since the last save
+        in one sqlite transaction.
+        Saves requested in a transaction are left to its `commit()`.
+        """
+        if self.__undo is not None:
+            return
+        connection = self.__connect()
+        with connection:
+            for key, obj in self.__changes.items():
+                cls_name, obj_id = key.split(".", 1)
+                if obj is None:
+                    connection.execute(
+                        f'DELETE FROM "{cls_name}" WHERE id = ?', (obj_id,)
+                    )
+                    continue
+                obj_dict = obj.to_dict()
+                columns = ["id", "created_at", "updated_at"]
+                columns += self.__columns[cls_name] + ["data"]
+                values = [obj_id, obj_dict["created_at"]]
+                values.append(obj_dict["updated_at"])
+                values += [
+                    obj_dict.get(column)
+                    for column in self.__columns[cls_name]
+                ]
+                values.append(json.dumps(obj_dict))
+                connection.execute(
+                    f'INSERT OR REPLACE INTO "{cls_name}" '
+                    f'({", ".join(columns)}) '
+                    f'VALUES ({", ".join("?" * len(columns))})',
+                    values,
+                )
+        self.__changes.clear()
+
+    def begin(self):
+        """
+        Opens a transaction, saves are left to `commit()`
+        (see `FileStorage.begin()`)
+
+        Raises:
+            ValueError: if a transaction is already open.
+        """
+        if self.__undo is not None:
+            raise ValueError("a transaction is already open")
+        self.__undo = UndoLog(self.__changes)
+
+    def commit(self):
+        """
+        Closes the open transaction and writes its changes
+        in one sqlite transaction
+
+        Raises:
+            ValueError: if no transaction is open.
+        """
+        undo = self.__undo
+        if undo is None:
+            raise ValueError("no transaction is open")
+        self.__undo = None
+        if len(undo) > 0:
+            self.save()
+
+    def rollback(self):
+        """
+        Closes the open transaction and undoes its changes in memory,
+        nothing is written (see `FileStorage.rollback()`)
+
+        Raises:
+            ValueError: if no transaction is open.
+        """
+        undo = self.__undo
+        if undo is None:
+            raise ValueError("no transaction is open")
+        self.__undo = None
+        for key, obj in undo.undo().items():
+            if obj is None:
+                self.__objects.pop(key, None)
+            else:
+                self.__objects[key] = obj
+            if key in undo.changes:
+                self.__changes[key] = undo.changes[key]
+            else:
+                self.__changes.pop(key, None)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Runs a block in a transaction: it is committed if the block ends,
+        rolled back if the block raises (the error is raised again)
+        """
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def flush(self):
+        """
+        Nothing to do, every save is committed when it is called,
+        it exists to share the surface of `FileStorage`.
+        """
+
+    def set_flush_policy(self, policy):
+        """
+        Only "immediate" is supported, every save is committed at once
+
+        Raises:
+            ValueError: for any other policy
+        """
+        if policy != "immediate":
+            raise ValueError(f"unsupported flush policy: {policy}")
+
+    def get_flush_policy(self):
+        """
+        Returns the flush policy of the storage, always "immediate"
+        """
+        return "immediate"
+
+    def reload(self):
+        """
+        Opens the database and creates the missing tables and indexes,
+        rows are not read here but the first time they are needed.
+        """
+        self.__classes = _model_classes()
+        connection = self.__connect()
+        with connection:
+            for cls_name, cls in self.__classes.items():
+                foreign_keys = [
+                    name
+                    for name, value in vars(cls).items()
+                    if name.endswith("_id") and isinstance(value, str)
+                ]
+                indexed = foreign_keys + list(unique_attrs(cls_name))
+                self.__columns[cls_name] = indexed
+                columns = ["id TEXT PRIMARY KEY", "created_at TEXT"]
+                columns.append("updated_at TEXT")
+                columns += [f"{name} TEXT" for name in indexed]
+                columns.append("data TEXT NOT NULL")
+                connection.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{cls_name}" '
+                    f'({", ".join(columns)})'
+                )
+                existing = [
+                    row[1]
+                    for row in connection.execute(
+                        f'PRAGMA table_info("{cls_name}")'
+                    )
+                ]
+                for name in indexed:
+                    if name in existing:
+                        continue
+                    # tables made before the column was indexed
+                    connection.execute(
+                        f'ALTER TABLE "{cls_name}" ADD COLUMN {name} TEXT'
+                    )
+                    connection.execute(
+                        f'UPDATE "{cls_name}" '
+                        f"SET {name} = json_extract(data, '$.{name}')"
+                    )
+                for name in indexed:
+                    connection.execute(
+                        f'CREATE INDEX IF NOT EXISTS "{cls_name}_{name}" '
+                        f'ON "{cls_name}" ({name})'
+                    )
+
+    def __connect(self):
+        """
+        Returns the connection to the database, opens it the first time
+        """
+        if self.__connection is None:
+            self.__connection = sqlite3.connect(
+                self.__db_path, check_same_thread=False
+            )
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            self.__connection.execute("PRAGMA synchronous=NORMAL")
+        return self.__connection
+
+    def __materialize(self, cls_name, data):
+        """
+        Returns the object of a row, rows already read return the same object
+
+        Args:
+            cls_name (str): the class name (table) of the row
+            data (str): the json text of the row
+        """
+        value = json.loads(data)
+        key = f"{cls_name}.{value['id']}"
+        obj = self.__objects.get(key)
+        if obj is None:
+            obj = self.__classes[cls_name](**value)
+            self.__objects[key] = obj
+        return obj
@@ -5,8 +5,150 @@ representing a FileStorage Class
 This module defines the `FileStorage` class,
 which is responsible for serializing objects to json objects,
 storing json objects, deserializing json objects
+
+Journal mode (HBNB_STORAGE_JOURNAL=1):
+    instead of rewriting the whole file on every save, each save appends
+    one json line holding only the objects created, updated or destroyed
+    since the previous save to `<file_path>.journal`.
+    `reload()` loads the snapshot (`file_path`) then replays the journal,
+    and the journal is compacted into a new snapshot once it grows bigger
+    than the number of stored objects.
+
+Dirty tracking:
+    objects report attribute changes through `touch()`, so a save only
+    re-encodes the objects changed since the previous save and reuses the
+    cached json text of every other object.
+
+Sharded layout (HBNB_STORAGE_LAYOUT=sharded):
+    objects are stored in one file per class (`file.User.json`, ...),
+    a save only rewrites the shards of the classes that changed and
+    `reload()` parses the shards in parallel worker processes.
+
+Lazy reload (HBNB_STORAGE_LAZY=1):
+    `reload()` only indexes where each object is in the file
+    ({key: (path, offset, length)}), an object is built the first time
+    it is read through `all()` or `get()`, and objects never read are
+    copied as they are by the next save.
+
+Streaming reload:
+    files are parsed with an incremental parser that reads them in chunks
+    and yields one (key, value) pair at a time, each value is turned into
+    an object right away so the whole parsed file never sits in memory.
+
+Binary format (HBNB_STORAGE_FORMAT=binary):
+    objects are written as struct-packed records instead of json
+    (see `models/engine/serializers.py`), `reload()` detects
+    the format of each file so both formats can always be read.
+    lazy reload only indexes json files, binary files are loaded at once.
+    the journal is always written in json.
+
+Durability:
+    files are replaced atomically (temp file, fsync, rename) and
+    journal records are fsync'ed, concurrent saves are coalesced
+    into one write (group commit), HBNB_GROUP_COMMIT_MS makes every
+    save wait that long for more saves to join its write.
+
+Write-behind (HBNB_WRITE_BEHIND=1):
+    `save()` returns at once and a background writer thread encodes and
+    writes the changes, `flush()` waits until every requested save is
+    written, it is called by the console on quit and at interpreter exit.
+
+Partitions:
+    the keys are also kept per class ({class name: {key: object}}),
+    so `all(cls)` and `count(cls)` only cost as much as the class asked.
+
+Secondary indexes:
+    the indexes declared in `models/engine/indexes.py` (foreign keys...)
+    are built the first time a class is looked up, then kept up to date
+    by `new()`, `touch()` (attribute updates) and `delete()`,
+    `lookup()` costs as much as the objects it returns,
+    `delete_cascade()` walks them to remove an object with its dependents.
+    `bulk_new()`, `bulk_update()` and `bulk_delete()` change many objects
+    with one pass per index and one save.
+    unique indexes (User.email) reject a value another object of the
+    class has, on `new()` and on attribute updates (`check_unique()`),
+    and `get_by()` finds an object by them in O(1).
+    `query()` filters, orders and limits the objects of a class,
+    going through the index that gives the fewest candidates if any
+    (`explain()` tells which one).
+    `within_radius()`, `within_bbox()` and `nearest()` find places
+    through a grid index of their latitude/longitude.
+    `search()` ranks the objects of a class by the words of their text
+    attributes (Place.name/description, Review.text), the text indexes
+    are saved to `<file_path>.fts` by `flush()` (console quit, interpreter
+    exit, not the background writes) with the size and time of the data
+    files, and read back by the first search if those did not
+    change (startup does not read them).
+
+Transactions (`transaction()`, `begin()`, `commit()`, `rollback()`):
+    the saves requested in a transaction are written by one save when
+    it is committed, the state of every object it creates, updates or
+    deletes is kept (`models/engine/transaction.py`) so a rollback puts
+    the objects, the indexes and the dirty tracking back in memory.
+    a commit is written atomically: in the sharded layout, a commit
+    touching several shards is appended as one journal record (folded
+    into the shards by the next save), not written as one rename per
+    shard.
+
+Flush policy (HBNB_FLUSH_POLICY, `set_flush_policy()`):
+    decides which saves are written right away:
+        immediate: every save (default)
+        ops:<N>: every N-th save
+        interval:<T>: T milliseconds after the first unwritten save
+        exit: none, only `flush()` (console quit, interpreter exit) writes
+    saves that are not written yet stay in memory until the next write.
 """
+import os
+import io
+import re
+import sys
+import glob
 import json
+import stat
+import atexit
+import time
+import tempfile
+import threading
+import contextlib
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from models.engine.serializers import BinarySerializer, JSONSerializer, detect
+from models.engine.indexes import declared_indexes, dependents, unique_attrs
+from models.engine.query import choose_index, parse_predicates, select
+from models.engine.transaction import UndoLog
+
+
+def _read_shard(path):
+    """
+    Parses one shard file, runs in the worker processes of `reload()`
+
+    Args:
+        path (str): path of the shard
+
+    Returns:
+        list: the (key, attributes) pairs of the objects of the shard
+    """
+    with open(path, "rb") as file:
+        return list(detect(file).read(file))
+
+
+def _file_mode(path):
+    """
+    Returns the permissions a file replacing `path` gets:
+    the ones of `path`, or 0666 without the umask for a new file
+
+    Args:
+        path (str): the replaced file
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        pass
+    # the umask can only be read by setting it
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return 0o666 & ~umask
 
 
 class FileStorage:
@@ -17,16 +159,175 @@ class FileStorage:
     Class Attributes:
         __file_path (str): The path to the JSON file where objects are stored.
         __objects (dict): A dictionary that holds objects in memory.
+        __changes (dict): keys changed since the last save,
+        mapped to the changed object (or None if it was destroyed).
+        __cache (dict): keys mapped to (object, format, encoded object)
+        as it was encoded by the last save.
+        __lazy (dict): keys of the objects not built yet (lazy reload)
+        mapped to (path, offset, length) of their json text.
+        __journal_min (int): minimum number of journal records
+        before the journal may be compacted into the snapshot.
+        __parallel_min (int): minimum total size (in bytes) of the shards
+        before they are parsed in parallel.
+        __partitions (dict): class names mapped to {key: object}
+        of their objects (None for the objects not built yet).
+        __partitioned (tuple): the __objects and __lazy the partitions were
+        built for, they are rebuilt when one of them is replaced.
+        __indexes (dict): class names mapped to {index name: index}
+        of the indexes built so far, dropped with the partitions.
+        __lock (RLock): guards the objects and the dirty tracking
+        while a save encodes them.
+        __undo (UndoLog): the state of the objects changed by the open
+        transaction, None if no transaction is open.
     """
 
     __file_path = "file.json"
     __objects = {}
+    __changes = {}
+    __cache = {}
+    __lazy = {}
+    __partitions = {}
+    __partitioned = None
+    __indexes = {}
+    __undo = None
+    __journal_min = 1024
+    __parallel_min = 4 * 1024 * 1024
+    __lock = threading.RLock()
+
+    def __init__(self):
+        """
+        Initializes the storage from the environment
+
+        HBNB_FILE_PATH: path of the snapshot file (default: file.json)
+        HBNB_STORAGE_JOURNAL: "1" to append changes to a journal
+        HBNB_STORAGE_LAYOUT: "sharded" to store one file per class
+        HBNB_STORAGE_LAZY: "1" to build objects the first time they are read
+        HBNB_STORAGE_FORMAT: "binary" to write the compact binary format
+        HBNB_GROUP_COMMIT_MS: how long a save waits for more saves to join it
+        HBNB_WRITE_BEHIND: "1" to write saves from a background thread
+        HBNB_FLUSH_POLICY: which saves are written (default: immediate)
+        """
+        self.__file_path = os.getenv("HBNB_FILE_PATH", FileStorage.__file_path)
+        self.__journal_path = f"{self.__file_path}.journal"
+        self.__journal = os.getenv("HBNB_STORAGE_JOURNAL", "0") == "1"
+        self.__journal_records = 0
+        self.__sharded = os.getenv("HBNB_STORAGE_LAYOUT") == "sharded"
+        # classes whose shard is older than the objects in memory
+        self.__stale_shards = set()
+        self.__lazy_load = os.getenv("HBNB_STORAGE_LAZY", "0") == "1"
+        # path -> open file, to read the json text of lazy objects
+        self.__lazy_files = {}
+        if os.getenv("HBNB_STORAGE_FORMAT") == "binary":
+            self.__serializer = BinarySerializer()
+        else:
+            self.__serializer = JSONSerializer()
+        self.__commit_lock = threading.Lock()
+        delay = os.getenv("HBNB_GROUP_COMMIT_MS", "0")
+        self.__commit_delay = float(delay) / 1000
+        # save requests received and the last one written to the disk
+        self.__requests = 0
+        self.__committed = 0
+        # a committed transaction is waiting to be written by one write
+        self.__atomic_write = False
+        self.__text_path = f"{self.__file_path}.fts"
+        # the data files the saved text indexes were made for
+        self.__text_stamp = None
+        # the saved text indexes not used yet, None until the file is read
+        self.__saved_text = None
+        # the save requests received when the storage was reloaded
+        self.__reload_requests = 0
+        self.__write_behind = os.getenv("HBNB_WRITE_BEHIND", "0") == "1"
+        self.__writer = None
+        self.__wake_writer = threading.Event()
+        self.__flush_at_exit = False
+        self.__flush_timer = None
+        self.set_flush_policy(os.getenv("HBNB_FLUSH_POLICY", "immediate"))
+
+    def set_flush_policy(self, policy):
+        """
+        Sets which saves are written to the disk right away
+
+        Args:
+            policy (str): "immediate", "ops:<N>" (every N saves),
+            "interval:<T>" (T milliseconds after a save) or "exit"
+
+        Raises:
+            ValueError: if the policy is not one of them
+        """
+        kind, _, value = policy.partition(":")
+        try:
+            if kind in ("immediate", "exit") and value == "":
+                limit = None
+            elif kind == "ops":
+                limit = int(value)
+            elif kind == "interval":
+                limit = float(value) / 1000
+            else:
+                raise ValueError
+        except ValueError:
+            raise ValueError(f"invalid flush policy: {policy}") from None
+        if limit is not None and not limit > 0:
+            raise ValueError(f"invalid flush policy: {policy}")
+        self.__flush_policy = (kind, limit)
+        self.__flush_policy_name = policy
+        if kind != "immediate":
+            self.__register_exit_flush()
+
+    def get_flush_policy(self):
+        """
+        Returns the flush policy of the storage, as it was set
+        """
+        return self.__flush_policy_name
+
+    def all(self, cls=None):
+        """
+        Return a dictionary containing all objects currently loaded in memory,
+        objects not built yet (lazy reload) are built first.
+
+        Args:
+            cls (type | str): only return the objects of this class
+            (or class name), as a new dictionary.
+        """
+        with FileStorage.__lock:
+            if cls is None:
+                for key in list(FileStorage.__lazy):
+                    self.__materialize(key)
+                return FileStorage.__objects
+            cls_name = cls if isinstance(cls, str) else cls.__name__
+            partition = self.__partition(cls_name)
+            for key in [key for key, obj in partition.items() if obj is None]:
+                self.__materialize(key)
+            return dict(partition)
 
-    def all(self):
+    def count(self, cls=None):
         """
-        Return a dictionary containing all objects currently loaded in memory.
+        Returns the number of stored objects (of a class),
+        objects not built yet are counted without building them.
+
+        Args:
+            cls (type | str): only count the objects of this class
+            (or class name).
+        """
+        with FileStorage.__lock:
+            if cls is None:
+                return len(FileStorage.__objects) + len(FileStorage.__lazy)
+            cls_name = cls if isinstance(cls, str) else cls.__name__
+            return len(self.__partition(cls_name))
+
+    def get(self, cls, id):
         """
-        return FileStorage.__objects
+        Returns one object by class and id (None if there is no such object)
+
+        Args:
+            cls (type | str): The class (or class name) of the object.
+            id (str): The id of the object.
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        key = f"{cls_name}.{id}"
+        with FileStorage.__lock:
+            if key in FileStorage.__lazy:
+                return self.__materialize(key)
+            return FileStorage.__objects.get(key)
 
     def new(self, obj):
         """
@@ -34,21 +335,1121 @@ class FileStorage:
 
         Args:
             obj (BaseModel): The object to be added to the dictionary.
+
+        Raises:
+            ValueError: if another object has the value of one of its
+            unique attributes (see `check_unique()`).
         """
         class_name = obj.__class__.__name__
-        self.all()[f"{class_name}.{obj.id}"] = obj
+        key = f"{class_name}.{obj.id}"
+        with FileStorage.__lock:
+            for attr in unique_attrs(class_name):
+                self.check_unique(obj, attr, getattr(obj, attr, None))
+            if FileStorage.__undo is not None:
+                FileStorage.__undo.record(key, self.get(class_name, obj.id))
+            FileStorage.__objects[key] = obj
+            FileStorage.__lazy.pop(key, None)
+            FileStorage.__changes[key] = obj
+            self.__partition_set(key, obj)
+
+    def touch(self, obj):
+        """
+        Marks a stored object as changed so the next save persists it,
+        objects that are not stored (yet) are ignored.
+
+        Args:
+            obj (BaseModel): The changed object.
+        """
+        obj_id = obj.__dict__.get("id")
+        if obj_id is None:
+            return
+        key = f"{obj.__class__.__name__}.{obj_id}"
+        with FileStorage.__lock:
+            if FileStorage.__objects.get(key) is obj:
+                FileStorage.__changes[key] = obj
+                self.__partition_set(key, obj)
+
+    def before_set(self, obj, attr, value):
+        """
+        Called by BaseModel before an attribute of an object is set:
+        checks the unique attributes (see `check_unique()`) and, in a
+        transaction, records the state of the object for `rollback()`.
+
+        Args:
+            obj (BaseModel): The object.
+            attr (str): The attribute.
+            value: The value the object takes.
+
+        Raises:
+            ValueError: if another object already has a unique value.
+        """
+        if "id" not in obj.__dict__:
+            # not initialized yet (BaseModel.__init__), so not stored
+            return
+        self.check_unique(obj, attr, value)
+        if FileStorage.__undo is None:
+            return
+        key = f"{obj.__class__.__name__}.{obj.__dict__.get('id')}"
+        with FileStorage.__lock:
+            if FileStorage.__undo is not None:
+                if FileStorage.__objects.get(key) is obj:
+                    FileStorage.__undo.record(key, obj)
+
+    def check_unique(self, obj, attr, value):
+        """
+        Raises ValueError if an object can not take a value because
+        another object of its class already has it and the attribute has
+        a unique index (User.email), the check costs O(1).
+        called by `new()` and before every attribute update (`before_set()`),
+        empty values may be shared.
+
+        Args:
+            obj (BaseModel): The object.
+            attr (str): The attribute.
+            value: The value the object would take.
+        """
+        cls_name = obj.__class__.__name__
+        if attr not in unique_attrs(cls_name):
+            return
+        key = f"{cls_name}.{obj.__dict__.get('id')}"
+        with FileStorage.__lock:
+            index = self.__built_indexes(cls_name, [attr])[attr]
+            if index.conflict(key, value) is not None:
+                raise ValueError(
+                    f"{cls_name}.{attr} already exists: {value}"
+                )
+
+    def delete(self, obj):
+        """
+        Removes an object from the in-memory dictionary __objects,
+        the next save will remove it from the file.
+
+        Args:
+            obj (BaseModel): The object to be removed.
+
+        Raises:
+            KeyError: if the object is not stored.
+        """
+        key = f"{obj.__class__.__name__}.{obj.id}"
+        with FileStorage.__lock:
+            del FileStorage.__objects[key]
+            if FileStorage.__undo is not None:
+                FileStorage.__undo.record(key, obj)
+            FileStorage.__changes[key] = None
+            self.__partition_pop(key)
+            FileStorage.__cache.pop(key, None)
+
+    def delete_cascade(self, obj, dry_run=False):
+        """
+        Removes an object and the objects depending on it (see CASCADES in
+        `models/engine/indexes.py`: State -> City -> Place -> Review,
+        User -> Place/Review), found through the foreign key indexes,
+        the next save removes them all at once.
+
+        Args:
+            obj (BaseModel): The object to be removed.
+            dry_run (bool): only count the objects, remove nothing.
+
+        Returns:
+            dict: {class name: number of objects} removed
+            (or that would be removed).
+
+        Raises:
+            KeyError: if the object is not stored.
+        """
+        key = f"{obj.__class__.__name__}.{obj.id}"
+        with FileStorage.__lock:
+            if self.get(obj.__class__, obj.id) is not obj:
+                raise KeyError(key)
+            found = dependents(obj, self.lookup)
+            counts = {}
+            for key, child in found.items():
+                cls_name = key.split(".")[0]
+                counts[cls_name] = counts.get(cls_name, 0) + 1
+                if not dry_run:
+                    self.delete(child)
+        return counts
+
+    def bulk_new(self, objs):
+        """
+        Adds many new objects at once: their unique attributes are checked
+        first (nothing is added if one is taken), the built indexes are
+        updated in one pass per index and one save writes them.
+
+        Args:
+            objs (iterable): The objects to be added.
+
+        Returns:
+            int: the number of objects added.
+
+        Raises:
+            ValueError: if a unique value is taken, or given twice.
+        """
+        entries = {f"{obj.__class__.__name__}.{obj.id}": obj for obj in objs}
+        with FileStorage.__lock:
+            for cls_name, batch in self.__batches(entries).items():
+                for attr in unique_attrs(cls_name):
+                    values = {
+                        key: getattr(obj, attr, None)
+                        for key, obj in batch.items()
+                    }
+                    self.__check_unique_batch(cls_name, attr, values)
+            for key, obj in entries.items():
+                if FileStorage.__undo is not None:
+                    cls_name, _, obj_id = key.partition(".")
+                    FileStorage.__undo.record(key, self.get(cls_name, obj_id))
+                FileStorage.__objects[key] = obj
+                FileStorage.__lazy.pop(key, None)
+                FileStorage.__changes[key] = obj
+            self.__bulk_index(entries)
+        self.save()
+        return len(entries)
+
+    def bulk_update(self, cls, ids, **attributes):
+        """
+        Sets the same attributes on many objects of a class at once
+        (and their `updated_at`), the built indexes are updated in one
+        pass per index and one save writes them.
+        ex: bulk_update(Review, ids, place_id="...")
+
+        Args:
+            cls (type | str): The class (or class name) of the objects.
+            ids (iterable): The ids of the objects.
+            attributes: attribute=value pairs.
+
+        Returns:
+            int: the number of objects updated.
+
+        Raises:
+            KeyError: if an object is not stored (nothing is updated).
+            ValueError: if a unique value is taken, or given to
+            several objects.
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        with FileStorage.__lock:
+            entries = self.__bulk_get(cls_name, ids)
+            for attr in unique_attrs(cls_name):
+                if attr in attributes:
+                    values = {key: attributes[attr] for key in entries}
+                    self.__check_unique_batch(cls_name, attr, values)
+            now = datetime.now()
+            for key, obj in entries.items():
+                if FileStorage.__undo is not None:
+                    FileStorage.__undo.record(key, obj)
+                obj.__dict__.update(attributes)
+                obj.__dict__["updated_at"] = now
+                FileStorage.__changes[key] = obj
+            self.__bulk_index(entries)
+        self.save()
+        return len(entries)
+
+    def bulk_delete(self, cls, ids):
+        """
+        Removes many objects of a class at once, the built indexes are
+        updated in one pass per index and one save removes them.
+
+        Args:
+            cls (type | str): The class (or class name) of the objects.
+            ids (iterable): The ids of the objects.
+
+        Returns:
+            int: the number of objects removed.
+
+        Raises:
+            KeyError: if an object is not stored (nothing is removed).
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        with FileStorage.__lock:
+            entries = self.__bulk_get(cls_name, ids)
+            for key, obj in entries.items():
+                del FileStorage.__objects[key]
+                if FileStorage.__undo is not None:
+                    FileStorage.__undo.record(key, obj)
+                FileStorage.__changes[key] = None
+                FileStorage.__cache.pop(key, None)
+            self.__bulk_index(entries, remove=True)
+        self.save()
+        return len(entries)
+
+    def __bulk_get(self, cls_name, ids):
+        """
+        Returns {key: object} of objects of a class by id
+
+        Raises:
+            KeyError: if one of them is not stored.
+        """
+        entries = {}
+        for obj_id in ids:
+            obj = self.get(cls_name, obj_id)
+            if obj is None:
+                raise KeyError(f"{cls_name}.{obj_id}")
+            entries[f"{cls_name}.{obj_id}"] = obj
+        return entries
+
+    def __batches(self, entries):
+        """
+        Returns {class name: {key: object}} of objects
+        """
+        batches = {}
+        for key, obj in entries.items():
+            batches.setdefault(key.split(".")[0], {})[key] = obj
+        return batches
+
+    def __check_unique_batch(self, cls_name, attr, values):
+        """
+        Raises ValueError if one of the values a batch of objects would
+        take for a unique attribute is taken by an object out of the batch
+        or given to two objects of the batch (empty values may be shared)
+
+        Args:
+            cls_name (str): the class name
+            attr (str): the unique attribute
+            values (dict): {key: value} the objects would take
+        """
+        index = self.__built_indexes(cls_name, [attr])[attr]
+        seen = set()
+        for key, value in values.items():
+            if value is None or value == "":
+                continue
+            other = index.conflict(key, value)
+            if value in seen or (other is not None and other not in values):
+                raise ValueError(f"{cls_name}.{attr} already exists: {value}")
+            seen.add(value)
+
+    def __bulk_index(self, entries, remove=False):
+        """
+        Adds (or removes) objects to the partitions and the built indexes,
+        one pass per index, nothing is done if the partitions are out
+        of date (rebuilt later)
+
+        Args:
+            entries (dict): {key: object} of the objects
+            remove (bool): remove the objects instead
+        """
+        if not self.__partitions_valid():
+            return
+        for cls_name, batch in self.__batches(entries).items():
+            partition = FileStorage.__partitions.setdefault(cls_name, {})
+            for key, obj in batch.items():
+                if remove:
+                    partition.pop(key, None)
+                else:
+                    partition[key] = obj
+            for index in FileStorage.__indexes.get(cls_name, {}).values():
+                for key, obj in batch.items():
+                    if remove:
+                        index.remove(key)
+                    else:
+                        index.add(key, obj)
+
+    def lookup(self, cls, attr, value):
+        """
+        Returns {key: object} of the objects of a class
+        whose attribute equals a value, through the index of the attribute
+        (every object of the class is checked if it has no index)
+
+        Args:
+            cls (type | str): The class (or class name) of the objects.
+            attr (str): The attribute.
+            value: The searched value.
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        with FileStorage.__lock:
+            index = self.__built_indexes(cls_name, [attr]).get(attr)
+            if index is not None and index.kind in ("hash", "unique"):
+                return index.lookup(value)
+            return {
+                key: obj
+                for key, obj in self.all(cls_name).items()
+                if getattr(obj, attr, None) == value
+            }
+
+    def get_by(self, cls, **attributes):
+        """
+        Returns the object of a class whose attributes equal values,
+        None if there is none, through the cheapest index (O(1) for a
+        unique attribute) ex: get_by(User, email="...")
+
+        Args:
+            cls (type | str): The class (or class name) of the object.
+            attributes: attribute=value pairs.
+
+        Raises:
+            ValueError: if no attribute is given.
+        """
+        if len(attributes) == 0:
+            raise ValueError("get_by needs an attribute")
+        found = self.query(
+            cls,
+            limit=1,
+            **{f"{attr}__eq": value for attr, value in attributes.items()},
+        )
+        return found[0] if len(found) > 0 else None
+
+    def query(self, cls, order_by=None, limit=None, **predicates):
+        """
+        Returns the objects of a class meeting predicates as a list
+        ex: query(Place, city_id=..., price_by_night__lte=100, limit=10)
+
+        Args:
+            cls (type | str): The class (or class name) of the objects.
+            order_by (str): the attribute to order by ("-<attr>": descending).
+            limit (int): the maximum number of objects.
+            predicates: <attribute>[__<operator>]=<value>
+            (see `models/engine/query.py`).
+
+        Raises:
+            ValueError: if a predicate, the limit or the order is invalid
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        conditions = parse_predicates(predicates)
+        attrs = [attr for attr, _, _ in conditions]
+        with FileStorage.__lock:
+            indexes = self.__built_indexes(cls_name, attrs)
+            plan = choose_index(indexes, conditions)
+            if plan is None:
+                candidates = self.all(cls_name).values()
+            else:
+                _, (_, op, arg), index = plan
+                candidates = index.search(op, arg).values()
+            return select(candidates, conditions, order_by, limit)
+
+    def explain(self, cls, order_by=None, limit=None, **predicates):
+        """
+        Returns how `query()` would run with the same arguments, as a dict:
+            plan: "index" or "scan"
+            index, kind, operator: the index it goes through (if any)
+            candidates: the number of objects it checks
+
+        Args:
+            the same as `query()`
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        conditions = parse_predicates(predicates)
+        attrs = [attr for attr, _, _ in conditions]
+        with FileStorage.__lock:
+            indexes = self.__built_indexes(cls_name, attrs)
+            plan = choose_index(indexes, conditions)
+            if plan is None:
+                count = self.count(cls_name)
+                explained = {"plan": "scan", "candidates": count}
+            else:
+                estimate, (_, op, _), index = plan
+                explained = {
+                    "plan": "index",
+                    "index": f"{cls_name}.{index.name}",
+                    "kind": index.kind,
+                    "operator": op,
+                    "candidates": estimate,
+                }
+        explained["order_by"] = order_by
+        explained["limit"] = limit
+        return explained
+
+    def within_radius(self, lat, lon, km, cls="Place"):
+        """
+        Returns the objects at most `km` kilometers from a point
+        as a list, the nearest first
+
+        Args:
+            lat (float): the latitude of the point.
+            lon (float): the longitude of the point.
+            km (float): the radius, in kilometers.
+            cls (type | str): the class (or class name) of the objects.
+
+        Raises:
+            ValueError: if a coordinate or the radius is invalid
+            or the class has no location index
+        """
+        with FileStorage.__lock:
+            found = self.__location_index(cls).within_radius(lat, lon, km)
+            return [obj for _, _, obj in found]
+
+    def within_bbox(self, min_lat, min_lon, max_lat, max_lon, cls="Place"):
+        """
+        Returns the objects inside a box as a list,
+        min_lon > max_lon for a box crossing the 180th meridian
+
+        Args:
+            min_lat, min_lon, max_lat, max_lon (float): the box.
+            cls (type | str): the class (or class name) of the objects.
+
+        Raises:
+            ValueError: if a coordinate is invalid
+            or the class has no location index
+        """
+        with FileStorage.__lock:
+            index = self.__location_index(cls)
+            found = index.within_bbox(min_lat, min_lon, max_lat, max_lon)
+            return list(found.values())
+
+    def nearest(self, lat, lon, k, cls="Place"):
+        """
+        Returns the `k` objects nearest to a point as a list,
+        the nearest first
+
+        Args:
+            lat (float): the latitude of the point.
+            lon (float): the longitude of the point.
+            k (int): the number of objects.
+            cls (type | str): the class (or class name) of the objects.
+
+        Raises:
+            ValueError: if a coordinate or k is invalid
+            or the class has no location index
+        """
+        with FileStorage.__lock:
+            found = self.__location_index(cls).nearest(lat, lon, k)
+            return [obj for _, _, obj in found]
+
+    def search(self, cls, text, limit=None):
+        """
+        Returns the objects of a class whose text attributes contain
+        words of a text as a list, the most relevant first (BM25)
+
+        Args:
+            cls (type | str): the class (or class name) of the objects.
+            text (str): the searched words.
+            limit (int): the maximum number of objects.
+
+        Raises:
+            ValueError: if the class has no text index
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        with FileStorage.__lock:
+            index = self.__built_indexes(cls_name, ["text"]).get("text")
+            if index is None:
+                raise ValueError(f"{cls_name} has no text index")
+            # saved by flush(), at the latest when the interpreter exits
+            self.__register_exit_flush()
+            found = [
+                self.get(cls_name, key.split(".", 1)[1])
+                for _, key in index.search(text, limit)
+            ]
+        return [obj for obj in found if obj is not None]
+
+    def __data_stamp(self):
+        """
+        Returns [path, size, modification time] of the data files
+        (snapshot or shards and journal) as they are on the disk
+        """
+        paths = self.__data_paths()
+        if os.path.exists(self.__journal_path):
+            paths.append(self.__journal_path)
+        stamp = []
+        for path in paths:
+            stat = os.stat(path)
+            stamp.append([path, stat.st_size, stat.st_mtime_ns])
+        return stamp
+
+    def __save_text_indexes(self):
+        """
+        Saves the built text indexes to `<file_path>.fts` (if they or
+        the data files changed since they were saved or loaded):
+            {"stamp": <the data files>}
+            {<class name>: {<key>: {<word>: <count>}}}
+        """
+        with FileStorage.__lock:
+            if not self.__partitions_valid():
+                return
+            indexes = {
+                cls_name: indexes["text"]
+                for cls_name, indexes in FileStorage.__indexes.items()
+                if "text" in indexes
+            }
+            if len(indexes) == 0:
+                return
+            stamp = self.__data_stamp()
+            if len(stamp) == 0:
+                # nothing written yet, the indexes are not worth keeping
+                return
+            changed = any(index.changed for index in indexes.values())
+            if not changed and stamp == self.__text_stamp:
+                return
+            # copies: they are encoded without holding the lock
+            documents = {
+                cls_name: index.dump() for cls_name, index in indexes.items()
+            }
+            for index in indexes.values():
+                index.changed = False
+            self.__text_stamp = stamp
+        content = json.dumps({"stamp": stamp}) + "\n"
+        content += json.dumps(documents)
+        self.__replace(self.__text_path, content.encode(), {})
+
+    def __load_text_index(self, cls_name, index):
+        """
+        Fills the empty text index of a class with the one saved to
+        `<file_path>.fts` (read the first time a text index is needed),
+        the objects changed since the reload are indexed again
+
+        Returns:
+            bool: False if there is no saved index to use (build it)
+        """
+        if self.__requests != self.__reload_requests:
+            # saved since the reload, the saved indexes may miss it
+            self.__saved_text = {}
+        if self.__saved_text is None:
+            self.__saved_text = self.__read_text_indexes()
+        documents = self.__saved_text.pop(cls_name, None)
+        if documents is None:
+            return False
+        index.load(documents)
+        for key, obj in FileStorage.__changes.items():
+            if key.split(".")[0] != cls_name:
+                continue
+            if obj is None:
+                index.remove(key)
+            else:
+                index.add(key, obj)
+        return True
+
+    def __read_text_indexes(self):
+        """
+        Returns {class name: documents} of the text indexes saved to
+        `<file_path>.fts`, {} if the data files changed since they were saved
+        """
+        try:
+            with open(self.__text_path, "r") as file:
+                stamp = json.loads(file.readline())["stamp"]
+                if stamp != self.__data_stamp():
+                    return {}
+                saved = json.loads(file.readline())
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}
+        if not isinstance(saved, dict):
+            return {}
+        self.__text_stamp = stamp
+        return saved
+
+    def __location_index(self, cls):
+        """
+        Returns the (built) location index of a class
+
+        Raises:
+            ValueError: if the class has no location index
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        index = self.__built_indexes(cls_name, ["location"]).get("location")
+        if index is None:
+            raise ValueError(f"{cls_name} has no location index")
+        return index
 
     def save(self):
         """
         Serializes and saves all objects in __objects
         to a JSON file (__file_path).
+        In journal mode only the changed objects are appended to the journal.
+        In write-behind mode the save is only queued to the writer thread.
+        The flush policy may leave the save to a later write.
+
+        Files are never overwritten in place: they are written to a temp file,
+        fsync'ed and renamed over the old one. Saves requested while another
+        save is writing wait for it and are then written together
+        by one write (group commit).
+        Saves requested in a transaction are left to its `commit()`.
+        """
+        with FileStorage.__lock:
+            if FileStorage.__undo is not None:
+                return
+            self.__requests += 1
+            request = self.__requests
+        kind, limit = self.__flush_policy
+        if kind == "exit":
+            return
+        if kind == "ops" and request - self.__committed < limit:
+            return
+        if kind == "interval":
+            self.__start_flush_timer(limit)
+            return
+        if self.__write_behind:
+            self.__start_writer()
+            self.__wake_writer.set()
+        else:
+            self.__commit(request)
+
+    def begin(self):
+        """
+        Opens a transaction: the saves requested until `commit()`
+        are written by one write when it is committed,
+        and `rollback()` puts back the objects as they were.
+        there is one transaction at a time for the whole storage.
+
+        Raises:
+            ValueError: if a transaction is already open.
+        """
+        with FileStorage.__lock:
+            if FileStorage.__undo is not None:
+                raise ValueError("a transaction is already open")
+            FileStorage.__undo = UndoLog(FileStorage.__changes)
+
+    def commit(self):
+        """
+        Closes the open transaction and writes its changes with one save
+
+        Raises:
+            ValueError: if no transaction is open.
+        """
+        with FileStorage.__lock:
+            undo = FileStorage.__undo
+            if undo is None:
+                raise ValueError("no transaction is open")
+            FileStorage.__undo = None
+            if len(undo) > 0:
+                self.__atomic_write = True
+        if len(undo) > 0:
+            self.save()
+
+    def rollback(self):
+        """
+        Closes the open transaction and undoes its changes in memory:
+        created objects are removed, updated objects get their attributes
+        back and deleted objects are stored again, nothing is written.
+
+        Raises:
+            ValueError: if no transaction is open.
+        """
+        with FileStorage.__lock:
+            undo = FileStorage.__undo
+            if undo is None:
+                raise ValueError("no transaction is open")
+            FileStorage.__undo = None
+            for key, obj in undo.undo().items():
+                if obj is None:
+                    FileStorage.__objects.pop(key, None)
+                    self.__partition_pop(key)
+                    FileStorage.__cache.pop(key, None)
+                else:
+                    FileStorage.__objects[key] = obj
+                    self.__partition_set(key, obj)
+                if key in undo.changes:
+                    FileStorage.__changes[key] = undo.changes[key]
+                else:
+                    FileStorage.__changes.pop(key, None)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Runs a block in a transaction: it is committed if the block ends,
+        rolled back if the block raises (the error is raised again)
+        ex: with storage.transaction(): ...
+        """
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def flush(self):
+        """
+        Writes every save requested so far (if any) before returning,
+        saves queued to the writer thread included.
+        Nothing is written while a transaction is open, the changes it
+        made would be written before it is committed.
+        """
+        with FileStorage.__lock:
+            if FileStorage.__undo is not None:
+                return
+            request = self.__requests
+        self.__commit(request)
+        self.__save_text_indexes()
+
+    def __commit(self, request):
+        """
+        Writes the changes to the disk unless a write prepared after
+        the save request `request` already did it
+
+        Args:
+            request (int): the number of the save request
+        """
+        with self.__commit_lock:
+            if self.__committed >= request:
+                # a write prepared after this request already wrote it
+                return
+            if self.__commit_delay > 0:
+                # let the saves requested meanwhile join this write
+                time.sleep(self.__commit_delay)
+            with FileStorage.__lock:
+                request = self.__requests
+                changes = dict(FileStorage.__changes)
+                atomic = self.__atomic_write
+                self.__atomic_write = False
+                kind, operations, classes = self.__prepare(atomic)
+                FileStorage.__changes.clear()
+            try:
+                self.__apply(kind, operations, classes)
+            except BaseException:
+                # the changes are still not on disk, keep them dirty
+                with FileStorage.__lock:
+                    for key, obj in changes.items():
+                        FileStorage.__changes.setdefault(key, obj)
+                    self.__atomic_write |= atomic
+                raise
+            self.__committed = request
+
+    def __start_writer(self):
+        """
+        Starts the background writer thread (write-behind mode) once,
+        what it did not write yet is flushed at interpreter exit
+        """
+        if self.__writer is not None:
+            return
+        with FileStorage.__lock:
+            if self.__writer is not None:
+                return
+            self.__writer = threading.Thread(
+                target=self.__write_behind_loop, daemon=True
+            )
+            self.__writer.start()
+        self.__register_exit_flush()
+
+    def __register_exit_flush(self):
+        """
+        Makes the interpreter exit write the saves not written yet (once)
+        """
+        with FileStorage.__lock:
+            if not self.__flush_at_exit:
+                self.__flush_at_exit = True
+                atexit.register(self.flush)
+
+    def __start_flush_timer(self, delay):
+        """
+        Schedules a flush `delay` seconds from now (interval flush policy),
+        unless one is already scheduled
+        """
+        with FileStorage.__lock:
+            if self.__flush_timer is not None:
+                return
+            self.__flush_timer = threading.Timer(delay, self.__timed_flush)
+            self.__flush_timer.daemon = True
+            self.__flush_timer.start()
+
+    def __timed_flush(self):
+        """
+        Body of the flush timer: writes the saves received so far
+        """
+        with FileStorage.__lock:
+            self.__flush_timer = None
+        self.__background_flush()
+
+    def __write_behind_loop(self):
+        """
+        Body of the writer thread: waits for save requests and writes them,
+        requests received during a write are written by the next one
+        """
+        while True:
+            self.__wake_writer.wait()
+            self.__wake_writer.clear()
+            self.__background_flush()
+
+    def __background_flush(self):
+        """
+        Writes the saves requested so far from a background thread (writer,
+        flush timer), where nobody would catch an error.
+        The text indexes are left to `flush()`, not dumped on every write.
+        """
+        with FileStorage.__lock:
+            if FileStorage.__undo is not None:
+                return
+            request = self.__requests
+        try:
+            self.__commit(request)
+        except Exception as error:
+            # the changes stay dirty, the next save or flush retries
+            print(f"** save failed: {error} **", file=sys.stderr)
+
+    def __prepare(self, atomic=False):
+        """
+        Encodes what the next write has to write, it is called with
+        the lock held so the objects do not change meanwhile
+
+        Args:
+            atomic (bool): the changes hold a committed transaction,
+            they are written by one write (a journal record if they
+            span several shards)
+
+        Returns:
+            tuple: ("journal" or "snapshot", the file operations,
+            the classes whose objects are written)
+        """
+        classes = {key.split(".")[0] for key in FileStorage.__changes}
+        count = len(FileStorage.__objects) + len(FileStorage.__lazy)
+        if self.__journal and self.__journal_records < max(
+            FileStorage.__journal_min, count
+        ):
+            if len(FileStorage.__changes) == 0:
+                return "journal", [], classes
+            append = ("append", self.__journal_path, self.__journal_record())
+            return "journal", [append], classes
+        if atomic and self.__sharded and len(classes) > 1:
+            # one rename per shard: a crash could leave half of the
+            # transaction on disk, one journal record can not be torn
+            append = ("append", self.__journal_path, self.__journal_record())
+            return "journal", [append], classes
+
+        keys = list(FileStorage.__objects) + list(FileStorage.__lazy)
+        operations = []
+        if self.__sharded:
+            classes |= self.__stale_shards
+            shards = {cls_name: [] for cls_name in classes}
+            for key in keys:
+                shard = shards.get(key.split(".")[0])
+                if shard is not None:
+                    shard.append(key)
+            for cls_name, shard_keys in shards.items():
+                path = self.__shard_path(cls_name)
+                if len(shard_keys) > 0:
+                    operations.append(self.__render(path, shard_keys))
+                else:
+                    operations.append(("remove", path))
+        else:
+            operations.append(self.__render(self.__file_path, keys))
+        return "snapshot", operations, classes
+
+    def __apply(self, kind, operations, classes):
+        """
+        Writes prepared file operations to the disk,
+        then drops the journal if a snapshot was written
+
+        Args:
+            kind (str): "journal" or "snapshot"
+            operations (list): ("append", path, data),
+            ("replace", path, data, moved lazy offsets) or ("remove", path)
+            classes (set): the classes whose objects are written
+        """
+        for operation in operations:
+            if operation[0] == "append":
+                with open(operation[1], "ab") as file:
+                    file.write(operation[2])
+                    file.flush()
+                    os.fsync(file.fileno())
+            elif operation[0] == "replace":
+                self.__replace(*operation[1:])
+            else:
+                try:
+                    os.remove(operation[1])
+                except FileNotFoundError:
+                    pass
+
+        if kind == "journal":
+            self.__journal_records += len(operations)
+            self.__stale_shards |= classes
+            return
+        try:
+            os.remove(self.__journal_path)
+        except FileNotFoundError:
+            pass
+        self.__journal_records = 0
+        self.__stale_shards -= classes
+
+    def __render(self, path, keys):
+        """
+        Encodes stored objects as the content of a file,
+        objects not built yet (lazy reload) are copied from their old place
+
+        Args:
+            path (str): the file to (over)write
+            keys (list): the keys of the objects to write
+
+        Returns:
+            tuple: ("replace", path, content, new offsets of copied objects)
+        """
+        records = []
+        copied = []
+        for key in keys:
+            if key in FileStorage.__lazy:
+                if self.__serializer.name == "json":
+                    records.append((key, self.__read_lazy(key)))
+                    copied.append(key)
+                    continue
+                self.__materialize(key)
+            obj = FileStorage.__objects[key]
+            records.append((key, self.__encode(key, obj)))
+
+        content = io.BytesIO()
+        offsets = self.__serializer.write(content, records)
+        moved = {key: offsets[key] for key in copied}
+        return "replace", path, content.getvalue(), moved
+
+    def __replace(self, path, content, moved):
+        """
+        Replaces a file atomically: the content is written to a temp file
+        in the same directory, fsync'ed, then renamed over the file,
+        a crash leaves either the old or the new file, never a truncated one,
+        the file keeps its permissions (the temp file is created 0600)
+
+        Args:
+            path (str): the file to replace
+            content (bytes): its new content
+            moved (dict): new offsets of the lazy objects copied in it
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(
+            dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp"
+        )
+        try:
+            os.fchmod(fd, _file_mode(path))
+            with os.fdopen(fd, "wb") as file:
+                file.write(content)
+                file.flush()
+                os.fsync(file.fileno())
+            with FileStorage.__lock:
+                os.replace(temp_path, path)
+                self.__close_lazy(path)
+                for key, entry in moved.items():
+                    if key in FileStorage.__lazy:
+                        FileStorage.__lazy[key] = (path,) + entry
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        try:
+            # make the rename itself durable
+            dir_fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
+
+    def __shard_path(self, cls_name):
+        """
+        Returns the path of the shard of a class,
+        `file.json` -> `file.<cls_name>.json`
+        """
+        root, ext = os.path.splitext(self.__file_path)
+        return f"{root}.{cls_name}{ext}"
+
+    def __journal_record(self):
+        """
+        Returns the changes since the last save as one journal record
+        {"put": {<key>: <dict>, ...}, "del": [<key>, ...]}
+        a record is appended with one write so a torn last line
+        is just ignored when replaying.
+        """
+        put = []
+        deleted = []
+        for key, obj in FileStorage.__changes.items():
+            if obj is None:
+                deleted.append(key)
+            elif self.__serializer.name == "json":
+                text = self.__encode(key, obj).decode()
+                put.append(f"{json.dumps(key)}: {text}")
+            else:
+                put.append(f"{json.dumps(key)}: {json.dumps(obj.to_dict())}")
+        record = '{"put": {' + ", ".join(put) + '}, "del": '
+        record += json.dumps(deleted) + "}\n"
+        return record.encode()
+
+    def __encode(self, key, obj):
+        """
+        Returns the encoded object (bytes) with the serializer of the storage,
+        only dirty objects (or objects never encoded before) are re-encoded
+
+        Args:
+            key (str): the key of the object in __objects
+            obj (BaseModel): the object to encode
+        """
+        name = self.__serializer.name
+        cached = FileStorage.__cache.get(key)
+        if cached is not None and cached[0] is obj and cached[1] == name:
+            if key not in FileStorage.__changes:
+                return cached[2]
+        data = self.__serializer.encode(obj)
+        FileStorage.__cache[key] = (obj, name, data)
+        return data
+
+    def __partition(self, cls_name):
+        """
+        Returns {key: object} of a class (object is None if not built yet),
+        the partitions are rebuilt if __objects was replaced
+
+        Args:
+            cls_name (str): the class name
         """
-        serialized_objects = {}
-        for k, v in self.all().items():
-            serialized_objects[k] = v.to_dict()
+        if not self.__partitions_valid():
+            partitions = {}
+            for key, obj in FileStorage.__objects.items():
+                partitions.setdefault(key.split(".")[0], {})[key] = obj
+            for key in FileStorage.__lazy:
+                partitions.setdefault(key.split(".")[0], {})[key] = None
+            FileStorage.__partitions = partitions
+            FileStorage.__indexes = {}
+            FileStorage.__partitioned = (
+                FileStorage.__objects,
+                FileStorage.__lazy,
+            )
+        return FileStorage.__partitions.get(cls_name, {})
 
-        with open(FileStorage.__file_path, "w") as file:
-            json.dump(serialized_objects, file)
+    def __partitions_valid(self):
+        """
+        Tells if the partitions were built for the current __objects
+        and __lazy (and kept up to date since)
+        """
+        if FileStorage.__partitioned is None:
+            return False
+        objects, lazy = FileStorage.__partitioned
+        return objects is FileStorage.__objects and lazy is FileStorage.__lazy
+
+    def __partition_set(self, key, obj):
+        """
+        Adds (or replaces) a key in the partition of its class,
+        nothing is done if the partitions are out of date (rebuilt later)
+
+        Args:
+            key (str): the key of the object
+            obj (BaseModel): the object, None if it is not built yet
+        """
+        if self.__partitions_valid():
+            cls_name = key.split(".")[0]
+            FileStorage.__partitions.setdefault(cls_name, {})[key] = obj
+            if obj is not None:
+                for index in FileStorage.__indexes.get(cls_name, {}).values():
+                    index.add(key, obj)
+
+    def __partition_pop(self, key):
+        """
+        Removes a key from the partition of its class
+        """
+        if self.__partitions_valid():
+            cls_name = key.split(".")[0]
+            FileStorage.__partitions.get(cls_name, {}).pop(key, None)
+            for index in FileStorage.__indexes.get(cls_name, {}).values():
+                index.remove(key)
+
+    def __built_indexes(self, cls_name, names):
+        """
+        Returns {index name: index} of some indexes of a class,
+        an index is built from the objects the first time it is used,
+        then kept up to date
+
+        Args:
+            cls_name (str): the class name
+            names (list): the index names (the attribute of the index
+            for hash and sorted indexes)
+        """
+        # drops the indexes if __objects was replaced
+        self.__partition(cls_name)
+        built = FileStorage.__indexes.setdefault(cls_name, {})
+        indexes = {}
+        for name, index in declared_indexes(cls_name).items():
+            if name not in names:
+                continue
+            if name not in built:
+                if name != "text" or not self.__load_text_index(
+                    cls_name, index
+                ):
+                    index.build(self.all(cls_name))
+                built[name] = index
+            indexes[name] = built[name]
+        return indexes
 
     def reload(self):
         """
@@ -58,13 +1459,31 @@ class FileStorage:
         This method is typically called when the program starts
         to populate the __objects dictionary with data from the file.
         """
-        try:
-            with open(FileStorage.__file_path, "r") as file:
-                from console import HBNBCommand
+        # offsets of objects not built yet may be out of date now
+        self.__close_lazy()
+        FileStorage.__lazy.clear()
+        # rebuilt from the loaded objects the first time they are needed
+        FileStorage.__partitioned = None
+        if self.__lazy_load:
+            self.__index_files()
+        elif self.__sharded:
+            self.__load_shards()
+        else:
+            self.__load_snapshot()
+        self.__replay_journal()
+        # the saved text indexes are read by the first search
+        self.__text_stamp = None
+        self.__saved_text = None
+        self.__reload_requests = self.__requests
 
-                temp = json.load(file)
-                # we should return the dict object
-                # (the values of keys in the temp dict) to BaseModel objects
+    def __load_snapshot(self):
+        """
+        Loads the objects of the snapshot file (if it exists)
+        """
+        try:
+            with open(self.__file_path, "rb") as file:
+                # we should return the dict objects
+                # (the values of the json object) to BaseModel objects
                 # the loaded objects will be like This
                 # {<class_name>.id: {created_at:..., updated_at:...., ...}}
                 # and we want to return the value to object to be like This
@@ -78,8 +1497,177 @@ class FileStorage:
                 # {created_at:..., ...}.to_dict() and this will raise error
                 # because dict object deos'nt have to_dict() method,
                 # the owner of to_dict method is BaseModel, got it?
-                for key, value in temp.items():
-                    cls_name = key.split(".")[0]
-                    self.all()[key] = HBNBCommand.classes()[cls_name](**value)
+                self.__load(detect(file).read(file))
+        except FileNotFoundError:
+            pass
+
+    def __data_paths(self):
+        """
+        Returns the paths of the existing snapshot file or shards
+        """
+        if self.__sharded:
+            # file.json -> file.<class name>.json
+            root, ext = os.path.splitext(self.__file_path)
+            shard = re.compile(
+                re.escape(root) + r"\.[A-Za-z_]\w*" + re.escape(ext) + "$"
+            )
+            pattern = glob.escape(root) + ".*" + glob.escape(ext)
+            paths = sorted(
+                path for path in glob.glob(pattern) if shard.match(path)
+            )
+        else:
+            paths = [self.__file_path]
+        return [path for path in paths if os.path.exists(path)]
+
+    def __index_files(self):
+        """
+        Indexes the offset and length of the json text of every object
+        of the snapshot file or shards without building the objects,
+        a file not written one object per line is loaded as usual
+        """
+        for path in self.__data_paths():
+            entries = self.__index_file(path)
+            if entries is None:
+                self.__stream_file(path)
+                continue
+            for key in entries:
+                FileStorage.__objects.pop(key, None)
+                FileStorage.__changes.pop(key, None)
+                FileStorage.__cache.pop(key, None)
+            FileStorage.__lazy.update(entries)
+
+    def __index_file(self, path):
+        """
+        Returns {key: (path, offset, length)} for the objects of a file,
+        or None if the file is not a json file written one object per line
+
+        Args:
+            path (str): the snapshot file or shard
+        """
+        with open(path, "rb") as file:
+            serializer = detect(file)
+            if serializer.name != "json":
+                return None
+            entries = serializer.index(file)
+        if entries is None:
+            return None
+        return {key: (path,) + entry for key, entry in entries.items()}
+
+    def __read_lazy(self, key):
+        """
+        Returns the json text (bytes) of an object not built yet
+        """
+        path, offset, length = FileStorage.__lazy[key]
+        file = self.__lazy_files.get(path)
+        if file is None:
+            file = open(path, "rb")
+            self.__lazy_files[path] = file
+        file.seek(offset)
+        return file.read(length)
+
+    def __close_lazy(self, path=None):
+        """
+        Closes the open file of a path (or all of them),
+        it is done once the file was rewritten
+        """
+        paths = list(self.__lazy_files) if path is None else [path]
+        for path in paths:
+            file = self.__lazy_files.pop(path, None)
+            if file is not None:
+                file.close()
+
+    def __materialize(self, key):
+        """
+        Builds a lazy object from its json text and stores it in __objects
+
+        Args:
+            key (str): the key of the object
+
+        Returns:
+            BaseModel: the built object
+        """
+        from console import HBNBCommand
+
+        text = self.__read_lazy(key)
+        cls_name = key.split(".")[0]
+        obj = HBNBCommand.classes()[cls_name](**json.loads(text))
+        del FileStorage.__lazy[key]
+        FileStorage.__objects[key] = obj
+        self.__partition_set(key, obj)
+        FileStorage.__cache[key] = (obj, "json", text)
+        return obj
+
+    def __load_shards(self):
+        """
+        Loads every existing shard, big stores are parsed in parallel
+        by a pool of worker processes (one shard per task)
+        """
+        paths = self.__data_paths()
+        size = sum(os.path.getsize(path) for path in paths)
+        parallel = len(paths) > 1 and size >= FileStorage.__parallel_min
+        if parallel and "fork" in multiprocessing.get_all_start_methods():
+            # fork: a fresh interpreter would import `models`
+            # which reloads the storage again
+            context = multiprocessing.get_context("fork")
+            workers = min(len(paths), os.cpu_count() or 1)
+            with ProcessPoolExecutor(workers, mp_context=context) as pool:
+                for temp in pool.map(_read_shard, paths):
+                    self.__load(temp)
+        else:
+            for path in paths:
+                self.__stream_file(path)
+
+    def __replay_journal(self):
+        """
+        Applies the journal records (if any) on top of the loaded snapshot
+        """
+        self.__journal_records = 0
+        try:
+            with open(self.__journal_path, "r") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # torn write of the last record, nothing after it
+                        break
+                    self.__load(record["put"].items())
+                    self.__stale_shards.update(
+                        key.split(".")[0]
+                        for key in list(record["put"]) + record["del"]
+                    )
+                    for key in record["del"]:
+                        FileStorage.__objects.pop(key, None)
+                        FileStorage.__lazy.pop(key, None)
+                        FileStorage.__changes.pop(key, None)
+                        FileStorage.__cache.pop(key, None)
+                    self.__journal_records += 1
         except FileNotFoundError:
             pass
+
+    def __stream_file(self, path):
+        """
+        Loads the objects of a snapshot file or shard
+        one at a time as the file is parsed
+
+        Args:
+            path (str): the snapshot file or shard
+        """
+        with open(path, "rb") as file:
+            self.__load(detect(file).read(file))
+
+    def __load(self, serialized_objects):
+        """
+        Turns (<class_name>.id, dict) pairs into objects in __objects
+
+        Args:
+            serialized_objects (iterable): the loaded json objects pairs
+        """
+        from console import HBNBCommand
+
+        for key, value in serialized_objects:
+            cls_name = key.split(".")[0]
+            FileStorage.__objects[key] = HBNBCommand.classes()[cls_name](
+                **value
+            )
+            FileStorage.__lazy.pop(key, None)
+            FileStorage.__changes.pop(key, None)
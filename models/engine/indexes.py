@@ -0,0 +1,999 @@
+#!/usr/bin/python3
+"""
+representing the secondary indexes of FileStorage
+
+This module defines the indexes kept by `FileStorage`
+next to the stored objects, so objects can be found by the value
+of an attribute without reading every object:
+
+    HashIndex: objects by the exact value of one attribute
+    UniqueIndex: a HashIndex on an attribute no two objects may share
+    SortedIndex: objects ordered by a number, for range queries
+    GridIndex: objects by their place on a grid of latitude/longitude cells
+    TextIndex: an inverted index of the words of text attributes (BM25)
+    BitmapIndex: objects by the values of a list attribute, as bitsets
+
+`DECLARED_INDEXES` lists the indexes of every class,
+the storage builds them the first time they are used
+then keeps them up to date on new, update and delete.
+`CASCADES` lists the objects deleted with an object (`dependents()`),
+they are found through the foreign key indexes.
+"""
+import re
+import math
+import bisect
+from collections import Counter
+
+EARTH_RADIUS_KM = 6371.0088
+# length of one degree of latitude
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """
+    Returns the great-circle distance (haversine) between two points
+    given in degrees, in kilometers
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(
+        lat2
+    ) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(lat, lon, km):
+    """
+    Returns the (min_lat, min_lon, max_lat, max_lon) box holding every
+    point at most `km` kilometers from a point, min_lon > max_lon when
+    the box crosses the 180th meridian
+    """
+    delta_lat = km / KM_PER_DEGREE
+    min_lat, max_lat = lat - delta_lat, lat + delta_lat
+    if min_lat <= -90 or max_lat >= 90 or delta_lat >= 90:
+        # the circle holds a pole: every longitude
+        return max(min_lat, -90), -180, min(max_lat, 90), 180
+    ratio = math.sin(km / EARTH_RADIUS_KM) / math.cos(math.radians(lat))
+    if ratio >= 1:
+        return min_lat, -180, max_lat, 180
+    delta_lon = math.degrees(math.asin(ratio))
+    min_lon = (lon - delta_lon + 180) % 360 - 180
+    max_lon = (lon + delta_lon + 180) % 360 - 180
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def check_point(lat, lon):
+    """
+    Raises ValueError if a latitude or longitude is out of its range
+    (or not a number)
+    """
+    if not -90 <= lat <= 90:
+        raise ValueError(f"invalid latitude: {lat}")
+    if not -180 <= lon <= 180:
+        raise ValueError(f"invalid longitude: {lon}")
+
+
+class HashIndex:
+    """
+    HashIndex maps each value of one attribute to the objects having it,
+    a lookup costs as much as the objects it returns.
+
+    Attributes:
+        attr (str): the indexed attribute.
+        name (str): the name of the index, the indexed attribute.
+        operators (tuple): the query operators the index can answer
+        (see `models/engine/query.py`).
+    """
+
+    kind = "hash"
+    operators = ("eq", "in")
+
+    def __init__(self, attr):
+        """
+        Initializes an empty index
+
+        Args:
+            attr (str): the indexed attribute
+        """
+        self.attr = attr
+        self.name = attr
+        # value -> {key: obj}
+        self.__entries = {}
+        # key -> the value it is indexed under
+        self.__values = {}
+
+    def __len__(self):
+        """
+        Returns the number of indexed objects
+        """
+        return len(self.__values)
+
+    def build(self, objects):
+        """
+        Indexes many objects at once
+
+        Args:
+            objects (dict): {key: obj} of the objects
+        """
+        for key, obj in objects.items():
+            self.add(key, obj)
+
+    def add(self, key, obj):
+        """
+        Indexes an object (again, if its value changed)
+
+        Args:
+            key (str): the key of the object in the storage
+            obj (BaseModel): the object
+        """
+        value = getattr(obj, self.attr, None)
+        try:
+            hash(value)
+        except TypeError:
+            # lists and dicts can not be looked up by value
+            self.remove(key)
+            return
+        if key in self.__values:
+            old = self.__values[key]
+            if old == value and type(old) is type(value):
+                self.__entries[old][key] = obj
+                return
+            self.remove(key)
+        self.__entries.setdefault(value, {})[key] = obj
+        self.__values[key] = value
+
+    def remove(self, key):
+        """
+        Removes an object from the index (if it is indexed)
+
+        Args:
+            key (str): the key of the object in the storage
+        """
+        if key not in self.__values:
+            return
+        value = self.__values.pop(key)
+        entries = self.__entries[value]
+        del entries[key]
+        if len(entries) == 0:
+            del self.__entries[value]
+
+    def lookup(self, value):
+        """
+        Returns {key: obj} of the objects whose attribute equals a value
+
+        Args:
+            value: the searched value
+        """
+        try:
+            return dict(self.__entries.get(value, {}))
+        except TypeError:
+            return {}
+
+    def estimate(self, op, arg):
+        """
+        Returns the number of objects `search(op, arg)` would return,
+        or None if the index can not answer it
+        """
+        values = [arg] if op == "eq" else arg
+        count = 0
+        for value in values:
+            try:
+                count += len(self.__entries.get(value, ()))
+            except TypeError:
+                pass
+        return count
+
+    def search(self, op, arg):
+        """
+        Returns {key: obj} of the objects whose attribute is equal to
+        a value (op "eq") or to one of a list of values (op "in")
+        """
+        if op == "eq":
+            return self.lookup(arg)
+        found = {}
+        for value in arg:
+            found.update(self.lookup(value))
+        return found
+
+
+class UniqueIndex(HashIndex):
+    """
+    UniqueIndex is a HashIndex on an attribute no two objects of a class
+    may share (User.email), `conflict()` tells in O(1) if a value is
+    already taken. empty values ("" or None, the defaults) may be shared.
+    """
+
+    kind = "unique"
+
+    def conflict(self, key, value):
+        """
+        Returns the key of another object having a value,
+        None if there is none or the value is empty
+
+        Args:
+            key (str): the key of the object that would take the value
+            value: the value
+        """
+        if value is None or value == "":
+            return None
+        for other in self.lookup(value):
+            if other != key:
+                return other
+        return None
+
+
+class SortedIndex:
+    """
+    SortedIndex keeps the objects ordered by the value of a numeric
+    attribute, a range of values is found by bisection so a range query
+    costs O(log N) plus the objects it returns.
+    objects whose value is not a number (or is NaN) are not indexed.
+
+    Attributes:
+        attr (str): the indexed attribute.
+        name (str): the name of the index, the indexed attribute.
+        operators (tuple): the query operators the index can answer
+        (see `models/engine/query.py`).
+    """
+
+    kind = "sorted"
+    operators = ("eq", "in", "gt", "gte", "lt", "lte", "between")
+
+    def __init__(self, attr):
+        """
+        Initializes an empty index
+
+        Args:
+            attr (str): the indexed attribute
+        """
+        self.attr = attr
+        self.name = attr
+        # (value, key) of the indexed objects, sorted
+        self.__entries = []
+        # the values alone, sorted the same way, to bisect a range
+        self.__sorted_values = []
+        # key -> (value, obj)
+        self.__objects = {}
+
+    def __len__(self):
+        """
+        Returns the number of indexed objects
+        """
+        return len(self.__objects)
+
+    @staticmethod
+    def __is_number(value):
+        """
+        Tells if a value can be ordered with the other indexed values
+        """
+        return isinstance(value, (int, float)) and value == value
+
+    def build(self, objects):
+        """
+        Indexes many objects at once in an empty index,
+        they are sorted once instead of being inserted one by one
+
+        Args:
+            objects (dict): {key: obj} of the objects
+        """
+        attr = self.attr
+        entries = []
+        for key, obj in objects.items():
+            value = getattr(obj, attr, None)
+            if isinstance(value, (int, float)) and value == value:
+                self.__objects[key] = (value, obj)
+                entries.append((value, key))
+        entries.sort()
+        self.__entries = entries
+        self.__sorted_values = [value for value, _ in entries]
+
+    def add(self, key, obj):
+        """
+        Indexes an object (again, if its value changed)
+
+        Args:
+            key (str): the key of the object in the storage
+            obj (BaseModel): the object
+        """
+        value = getattr(obj, self.attr, None)
+        if key in self.__objects:
+            old = self.__objects[key][0]
+            if old == value and type(old) is type(value):
+                self.__objects[key] = (value, obj)
+                return
+            self.remove(key)
+        if not SortedIndex.__is_number(value):
+            return
+        pos = bisect.bisect_left(self.__entries, (value, key))
+        self.__entries.insert(pos, (value, key))
+        self.__sorted_values.insert(pos, value)
+        self.__objects[key] = (value, obj)
+
+    def remove(self, key):
+        """
+        Removes an object from the index (if it is indexed)
+
+        Args:
+            key (str): the key of the object in the storage
+        """
+        if key not in self.__objects:
+            return
+        value = self.__objects.pop(key)[0]
+        pos = bisect.bisect_left(self.__entries, (value, key))
+        del self.__entries[pos]
+        del self.__sorted_values[pos]
+
+    def __bounds(self, op, arg):
+        """
+        Returns the (start, end) positions in the sorted entries
+        of the values meeting a condition, or None if `arg` is not a number
+        """
+        values = self.__sorted_values
+        bounds = arg if op == "between" else (arg,)
+        if not all(SortedIndex.__is_number(value) for value in bounds):
+            return None
+        if op == "eq":
+            return (
+                bisect.bisect_left(values, arg),
+                bisect.bisect_right(values, arg),
+            )
+        if op == "gt":
+            return bisect.bisect_right(values, arg), len(values)
+        if op == "gte":
+            return bisect.bisect_left(values, arg), len(values)
+        if op == "lt":
+            return 0, bisect.bisect_left(values, arg)
+        if op == "lte":
+            return 0, bisect.bisect_right(values, arg)
+        start = bisect.bisect_left(values, arg[0])
+        return start, bisect.bisect_right(values, arg[1])
+
+    def __ranges(self, op, arg):
+        """
+        Returns the (start, end) positions of the values meeting
+        a condition, one range per value for op "in", or None
+        """
+        if op != "in":
+            bounds = self.__bounds(op, arg)
+            return None if bounds is None else [bounds]
+        ranges = []
+        for value in set(arg):
+            bounds = self.__bounds("eq", value)
+            if bounds is None:
+                return None
+            ranges.append(bounds)
+        return ranges
+
+    def estimate(self, op, arg):
+        """
+        Returns the number of objects `search(op, arg)` would return,
+        or None if the index can not answer it (a value is not a number)
+        """
+        ranges = self.__ranges(op, arg)
+        if ranges is None:
+            return None
+        return sum(max(end - start, 0) for start, end in ranges)
+
+    def search(self, op, arg):
+        """
+        Returns {key: obj} of the objects whose attribute meets
+        a condition, in the order of the values
+
+        Args:
+            op (str): one of `operators`
+            arg: the value of the condition (a (low, high) pair for
+            "between", a list of values for "in")
+        """
+        found = {}
+        for start, end in self.__ranges(op, arg) or []:
+            for _, key in self.__entries[start:end]:
+                found[key] = self.__objects[key][1]
+        return found
+
+
+class GridIndex:
+    """
+    GridIndex puts the objects in the cells of a grid of
+    latitude/longitude, a box or radius search only reads the cells
+    it covers and the nearest objects are searched in growing circles.
+    objects without a valid latitude and longitude are not indexed.
+
+    Attributes:
+        attr (None): the index does not answer query predicates.
+        name (str): the name of the index, "location".
+        lat_attr (str): the latitude attribute.
+        lon_attr (str): the longitude attribute.
+        cell (float): the size of a cell, in degrees.
+        operators (tuple): no query operator.
+    """
+
+    kind = "grid"
+    operators = ()
+
+    def __init__(self, lat_attr, lon_attr, cell=0.1):
+        """
+        Initializes an empty index
+
+        Args:
+            lat_attr (str): the latitude attribute
+            lon_attr (str): the longitude attribute
+            cell (float): the size of a cell, in degrees
+        """
+        self.attr = None
+        self.name = "location"
+        self.lat_attr = lat_attr
+        self.lon_attr = lon_attr
+        self.cell = cell
+        # (row, column) -> {key: obj}
+        self.__cells = {}
+        # key -> (lat, lon, cell)
+        self.__points = {}
+
+    def __len__(self):
+        """
+        Returns the number of indexed objects
+        """
+        return len(self.__points)
+
+    def __cell_of(self, lat, lon):
+        """
+        Returns the (row, column) of the cell of a point
+        """
+        return math.floor(lat / self.cell), math.floor(lon / self.cell)
+
+    def build(self, objects):
+        """
+        Indexes many objects at once
+
+        Args:
+            objects (dict): {key: obj} of the objects
+        """
+        for key, obj in objects.items():
+            self.add(key, obj)
+
+    def add(self, key, obj):
+        """
+        Indexes an object (again, if it moved)
+
+        Args:
+            key (str): the key of the object in the storage
+            obj (BaseModel): the object
+        """
+        lat = getattr(obj, self.lat_attr, None)
+        lon = getattr(obj, self.lon_attr, None)
+        point = self.__points.get(key)
+        if point is not None and point[:2] == (lat, lon):
+            self.__cells[point[2]][key] = obj
+            return
+        self.remove(key)
+        try:
+            check_point(lat, lon)
+        except (TypeError, ValueError):
+            return
+        cell = self.__cell_of(lat, lon)
+        self.__cells.setdefault(cell, {})[key] = obj
+        self.__points[key] = (lat, lon, cell)
+
+    def remove(self, key):
+        """
+        Removes an object from the index (if it is indexed)
+
+        Args:
+            key (str): the key of the object in the storage
+        """
+        point = self.__points.pop(key, None)
+        if point is None:
+            return
+        objects = self.__cells[point[2]]
+        del objects[key]
+        if len(objects) == 0:
+            del self.__cells[point[2]]
+
+    def __box_cells(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        Yields the {key: obj} of the non empty cells touching a box
+        (min_lon <= max_lon), the cells are read from the grid
+        when the box covers fewer cells than there are non empty cells
+        """
+        min_row, min_col = self.__cell_of(min_lat, min_lon)
+        max_row, max_col = self.__cell_of(max_lat, max_lon)
+        covered = (max_row - min_row + 1) * (max_col - min_col + 1)
+        if covered > len(self.__cells):
+            for (row, col), objects in self.__cells.items():
+                if min_row <= row <= max_row and min_col <= col <= max_col:
+                    yield objects
+            return
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                objects = self.__cells.get((row, col))
+                if objects is not None:
+                    yield objects
+
+    def within_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        Returns {key: obj} of the objects inside a box,
+        min_lon > max_lon for a box crossing the 180th meridian
+
+        Raises:
+            ValueError: if a coordinate is out of its range
+        """
+        check_point(min_lat, min_lon)
+        check_point(max_lat, max_lon)
+        if min_lon <= max_lon:
+            boxes = [(min_lon, max_lon)]
+        else:
+            boxes = [(min_lon, 180), (-180, max_lon)]
+        found = {}
+        for low, high in boxes:
+            for objects in self.__box_cells(min_lat, low, max_lat, high):
+                for key, obj in objects.items():
+                    lat, lon, _ = self.__points[key]
+                    if min_lat <= lat <= max_lat and low <= lon <= high:
+                        found[key] = obj
+        return found
+
+    def within_radius(self, lat, lon, km):
+        """
+        Returns [(distance in km, key, obj)] of the objects at most
+        `km` kilometers from a point, the nearest first
+
+        Raises:
+            ValueError: if a coordinate is out of its range
+            or the radius is negative
+        """
+        check_point(lat, lon)
+        if not km >= 0:
+            raise ValueError(f"invalid radius: {km}")
+        found = []
+        for key, obj in self.within_bbox(*radius_bbox(lat, lon, km)).items():
+            point = self.__points[key]
+            distance = distance_km(lat, lon, point[0], point[1])
+            if distance <= km:
+                found.append((distance, key, obj))
+        found.sort(key=lambda item: item[:2])
+        return found
+
+    def nearest(self, lat, lon, k):
+        """
+        Returns [(distance in km, key, obj)] of the `k` objects
+        nearest to a point, the nearest first.
+        the radius searched is doubled until it holds `k` objects,
+        any object out of it is farther than all of them
+
+        Raises:
+            ValueError: if a coordinate is out of its range
+            or k is negative
+        """
+        check_point(lat, lon)
+        if type(k) is not int or k < 0:
+            raise ValueError(f"invalid number of objects: {k}")
+        k = min(k, len(self.__points))
+        km = self.cell * KM_PER_DEGREE
+        while True:
+            found = self.within_radius(lat, lon, km)
+            if len(found) >= k or km >= math.pi * EARTH_RADIUS_KM:
+                return found[:k]
+            km *= 2
+
+
+class TextIndex:
+    """
+    TextIndex is an inverted index of the words of text attributes:
+    each word maps to the objects containing it (posting lists),
+    searches are ranked with BM25.
+    it keeps the keys of the objects, not the objects, so it can be
+    saved to a file and loaded back (see `dump()` and `load()`).
+
+    Attributes:
+        attr (None): the index does not answer query predicates.
+        name (str): the name of the index, "text".
+        attrs (tuple): the indexed attributes.
+        operators (tuple): no query operator.
+        changed (bool): True if the index changed since it was
+        dumped or loaded.
+    """
+
+    kind = "text"
+    operators = ()
+    k1 = 1.2
+    b = 0.75
+    __word = re.compile(r"\w+")
+
+    def __init__(self, *attrs):
+        """
+        Initializes an empty index
+
+        Args:
+            attrs (str): the indexed attributes
+        """
+        self.attr = None
+        self.name = "text"
+        self.attrs = attrs
+        self.changed = False
+        # word -> {key: number of times the word is in the object}
+        self.__postings = {}
+        # key -> Counter of the words of the object
+        self.__documents = {}
+        # key -> the indexed values, to skip objects whose text is the same
+        self.__texts = {}
+        # key -> number of words of the object
+        self.__lengths = {}
+        self.__total_words = 0
+
+    def __len__(self):
+        """
+        Returns the number of indexed objects
+        """
+        return len(self.__documents)
+
+    @classmethod
+    def tokenize(cls, text):
+        """
+        Returns the words of a text, lowercased
+        """
+        return cls.__word.findall(text.lower())
+
+    def build(self, objects):
+        """
+        Indexes many objects at once
+
+        Args:
+            objects (dict): {key: obj} of the objects
+        """
+        for key, obj in objects.items():
+            self.add(key, obj)
+
+    def add(self, key, obj):
+        """
+        Indexes an object (again, if its text changed)
+
+        Args:
+            key (str): the key of the object in the storage
+            obj (BaseModel): the object
+        """
+        values = tuple(getattr(obj, attr, None) for attr in self.attrs)
+        if self.__texts.get(key) == values:
+            return
+        words = Counter()
+        for value in values:
+            if value is not None:
+                words.update(TextIndex.tokenize(str(value)))
+        self.__texts[key] = values
+        if self.__documents.get(key) == words:
+            return
+        self.__insert(key, words)
+
+    def __insert(self, key, words):
+        """
+        Replaces the words of an object in the index
+        """
+        self.remove(key)
+        self.__documents[key] = words
+        self.__lengths[key] = sum(words.values())
+        self.__total_words += self.__lengths[key]
+        for word, count in words.items():
+            self.__postings.setdefault(word, {})[key] = count
+        self.changed = True
+
+    def remove(self, key):
+        """
+        Removes an object from the index (if it is indexed)
+
+        Args:
+            key (str): the key of the object in the storage
+        """
+        self.__texts.pop(key, None)
+        words = self.__documents.pop(key, None)
+        if words is None:
+            return
+        self.__total_words -= self.__lengths.pop(key)
+        for word in words:
+            posting = self.__postings[word]
+            del posting[key]
+            if len(posting) == 0:
+                del self.__postings[word]
+        self.changed = True
+
+    def search(self, text, limit=None):
+        """
+        Returns [(score, key)] of the objects containing
+        at least one word of a text, the best BM25 score first
+
+        Args:
+            text (str): the searched words
+            limit (int): the maximum number of results
+        """
+        count = len(self.__documents)
+        if count == 0:
+            return []
+        average = self.__total_words / count
+        scores = {}
+        for word in set(TextIndex.tokenize(text)):
+            posting = self.__postings.get(word)
+            if posting is None:
+                continue
+            found = len(posting)
+            idf = math.log(1 + (count - found + 0.5) / (found + 0.5))
+            for key, frequency in posting.items():
+                length = self.__lengths[key]
+                norm = self.k1 * (1 - self.b + self.b * length / average)
+                score = idf * frequency * (self.k1 + 1) / (frequency + norm)
+                scores[key] = scores.get(key, 0) + score
+        ranked = sorted(
+            ((score, key) for key, score in scores.items()),
+            key=lambda item: (-item[0], item[1]),
+        )
+        return ranked if limit is None else ranked[:limit]
+
+    def dump(self):
+        """
+        Returns the index as {key: {word: count}},
+        the posting lists are rebuilt from it by `load()`
+        """
+        return {key: dict(words) for key, words in self.__documents.items()}
+
+    def load(self, documents):
+        """
+        Fills an empty index from the output of `dump()`
+
+        Args:
+            documents (dict): {key: {word: count}}
+        """
+        for key, words in documents.items():
+            self.__insert(key, Counter(words))
+        self.changed = False
+
+
+class BitmapIndex:
+    """
+    BitmapIndex maps each value found in a list attribute
+    (Place.amenity_ids) to a bitset (int) of the objects holding it,
+    an object being one bit: its slot. slots are dense, the slot of
+    a removed object is given to the next new one, so the bitsets
+    stay as short as the number of objects.
+    the objects holding all of some values are the AND of their bitsets.
+
+    Attributes:
+        attr (str): the indexed attribute.
+        name (str): the name of the index, the indexed attribute.
+        operators (tuple): the query operators the index can answer
+        (see `models/engine/query.py`).
+    """
+
+    kind = "bitmap"
+    operators = ("all",)
+
+    def __init__(self, attr):
+        """
+        Initializes an empty index
+
+        Args:
+            attr (str): the indexed attribute
+        """
+        self.attr = attr
+        self.name = attr
+        # value -> bitset of the slots of the objects holding it
+        self.__bitmaps = {}
+        # key -> (slot, indexed values, obj)
+        self.__entries = {}
+        # slot -> key (None for a free slot)
+        self.__keys = []
+        self.__free_slots = []
+        # bitset of the used slots
+        self.__used = 0
+
+    def __len__(self):
+        """
+        Returns the number of indexed objects
+        """
+        return len(self.__entries)
+
+    def build(self, objects):
+        """
+        Indexes many objects at once
+
+        Args:
+            objects (dict): {key: obj} of the objects
+        """
+        for key, obj in objects.items():
+            self.add(key, obj)
+
+    def __values_of(self, obj):
+        """
+        Returns the hashable values of the list attribute of an object
+        """
+        values = getattr(obj, self.attr, None)
+        if not isinstance(values, (list, tuple, set, frozenset)):
+            return frozenset()
+        hashable = set()
+        for value in values:
+            try:
+                hash(value)
+            except TypeError:
+                continue
+            hashable.add(value)
+        return frozenset(hashable)
+
+    def add(self, key, obj):
+        """
+        Indexes an object (again, if its values changed)
+
+        Args:
+            key (str): the key of the object in the storage
+            obj (BaseModel): the object
+        """
+        values = self.__values_of(obj)
+        entry = self.__entries.get(key)
+        if entry is not None and entry[1] == values:
+            self.__entries[key] = (entry[0], values, obj)
+            return
+        if entry is None:
+            if len(self.__free_slots) > 0:
+                slot = self.__free_slots.pop()
+                self.__keys[slot] = key
+            else:
+                slot = len(self.__keys)
+                self.__keys.append(key)
+            self.__used |= 1 << slot
+            old = frozenset()
+        else:
+            slot, old = entry[0], entry[1]
+        bit = 1 << slot
+        for value in old - values:
+            self.__clear(value, bit)
+        for value in values - old:
+            self.__bitmaps[value] = self.__bitmaps.get(value, 0) | bit
+        self.__entries[key] = (slot, values, obj)
+
+    def __clear(self, value, bit):
+        """
+        Clears the bit of an object in the bitset of a value
+        """
+        bitmap = self.__bitmaps[value] & ~bit
+        if bitmap == 0:
+            del self.__bitmaps[value]
+        else:
+            self.__bitmaps[value] = bitmap
+
+    def remove(self, key):
+        """
+        Removes an object from the index (if it is indexed)
+
+        Args:
+            key (str): the key of the object in the storage
+        """
+        entry = self.__entries.pop(key, None)
+        if entry is None:
+            return
+        slot, values, _ = entry
+        bit = 1 << slot
+        for value in values:
+            self.__clear(value, bit)
+        self.__used &= ~bit
+        self.__keys[slot] = None
+        self.__free_slots.append(slot)
+
+    def __bitset(self, arg):
+        """
+        Returns the bitset of the objects holding every value of a list
+        """
+        bitset = self.__used
+        for value in arg:
+            try:
+                bitset &= self.__bitmaps.get(value, 0)
+            except TypeError:
+                return 0
+            if bitset == 0:
+                break
+        return bitset
+
+    def estimate(self, op, arg):
+        """
+        Returns the number of objects `search(op, arg)` would return
+        """
+        return bin(self.__bitset(arg)).count("1")
+
+    def search(self, op, arg):
+        """
+        Returns {key: obj} of the objects whose list attribute holds
+        every value of a list (op "all")
+        """
+        bits = bin(self.__bitset(arg))[:1:-1]
+        found = {}
+        slot = bits.find("1")
+        while slot != -1:
+            key = self.__keys[slot]
+            found[key] = self.__entries[key][2]
+            slot = bits.find("1", slot + 1)
+        return found
+
+
+# class name -> (index class, arguments of the index) of each index
+DECLARED_INDEXES = {
+    "City": ((HashIndex, "state_id"),),
+    "Place": (
+        (HashIndex, "city_id"),
+        (HashIndex, "user_id"),
+        (SortedIndex, "number_rooms"),
+        (SortedIndex, "number_bathrooms"),
+        (SortedIndex, "max_guest"),
+        (SortedIndex, "price_by_night"),
+        (SortedIndex, "latitude"),
+        (SortedIndex, "longitude"),
+        (GridIndex, "latitude", "longitude"),
+        (TextIndex, "name", "description"),
+        (BitmapIndex, "amenity_ids"),
+    ),
+    "User": ((UniqueIndex, "email"),),
+    "Review": (
+        (HashIndex, "place_id"),
+        (HashIndex, "user_id"),
+        (TextIndex, "text"),
+    ),
+}
+
+# class name -> the attributes of its unique indexes (see `unique_attrs()`)
+UNIQUE_ATTRS = {
+    cls_name: tuple(
+        args[0]
+        for index_cls, *args in declared
+        if issubclass(index_cls, UniqueIndex)
+    )
+    for cls_name, declared in DECLARED_INDEXES.items()
+}
+
+# class name -> (class name, foreign key) of the objects depending on it
+CASCADES = {
+    "State": (("City", "state_id"),),
+    "City": (("Place", "city_id"),),
+    "Place": (("Review", "place_id"),),
+    "User": (("Place", "user_id"), ("Review", "user_id")),
+}
+
+
+def declared_indexes(cls_name):
+    """
+    Returns new empty indexes of a class as declared in DECLARED_INDEXES,
+    {index name: index}
+
+    Args:
+        cls_name (str): the class name
+    """
+    indexes = {}
+    for index_cls, *args in DECLARED_INDEXES.get(cls_name, ()):
+        index = index_cls(*args)
+        indexes[index.name] = index
+    return indexes
+
+
+def unique_attrs(cls_name):
+    """
+    Returns the attributes of a class that have a UniqueIndex,
+    without making the indexes (called on every attribute update)
+
+    Args:
+        cls_name (str): the class name
+    """
+    return UNIQUE_ATTRS.get(cls_name, ())
+
+
+def dependents(obj, lookup):
+    """
+    Returns {key: object} of an object and of every object depending on
+    it through CASCADES (the cities of a state, their places, ...),
+    the object first, each object is found once
+
+    Args:
+        obj (BaseModel): the object
+        lookup (callable): lookup(cls_name, attr, value) -> {key: object},
+        the lookup of the storage, through its foreign key indexes
+    """
+    found = {f"{obj.__class__.__name__}.{obj.id}": obj}
+    pending = [obj]
+    while len(pending) > 0:
+        parent = pending.pop()
+        for cls_name, attr in CASCADES.get(parent.__class__.__name__, ()):
+            for key, child in lookup(cls_name, attr, parent.id).items():
+                if key not in found:
+                    found[key] = child
+                    pending.append(child)
+    return found
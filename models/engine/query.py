@@ -0,0 +1,139 @@
+#!/usr/bin/python3
+"""
+representing the queries of the storage engines
+
+This module parses the predicates given to `storage.query()`,
+checks them on objects and picks the index a query goes through.
+
+A predicate is <attribute>[__<operator>]=<value>, the operators are:
+    eq (the default), in, gt, gte, lt, lte, between (a (low, high) pair)
+    and all (a list attribute holding every value of a list)
+ex: query(Place, city_id="...", price_by_night__between=(50, 100))
+"""
+import heapq
+import itertools
+
+OPERATORS = {
+    "eq": lambda value, arg: value == arg,
+    "in": lambda value, arg: value in arg,
+    "gt": lambda value, arg: value > arg,
+    "gte": lambda value, arg: value >= arg,
+    "lt": lambda value, arg: value < arg,
+    "lte": lambda value, arg: value <= arg,
+    "between": lambda value, arg: arg[0] <= value <= arg[1],
+    "all": lambda value, arg: all(item in value for item in arg),
+}
+
+
+def parse_predicates(predicates):
+    """
+    Returns the (attribute, operator, value) conditions of predicates
+
+    Args:
+        predicates (dict): <attribute>[__<operator>] -> value
+
+    Raises:
+        ValueError: if an operator is unknown or a value does not fit it
+    """
+    conditions = []
+    for name, arg in predicates.items():
+        attr, sep, op = name.rpartition("__")
+        if sep == "":
+            attr, op = name, "eq"
+        if attr == "" or op not in OPERATORS:
+            raise ValueError(f"invalid predicate: {name}")
+        if op in ("in", "all"):
+            if isinstance(arg, str):
+                raise ValueError(f"{name} needs a list of values")
+            arg = list(arg)
+        elif op == "between":
+            try:
+                low, high = arg
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} needs a (low, high) pair") from None
+            arg = (low, high)
+        conditions.append((attr, op, arg))
+    return conditions
+
+
+def matches(obj, conditions):
+    """
+    Tells if an object meets every condition,
+    values that can not be compared with the condition do not meet it
+
+    Args:
+        obj (BaseModel): the object
+        conditions (list): (attribute, operator, value) conditions
+    """
+    for attr, op, arg in conditions:
+        try:
+            if not OPERATORS[op](getattr(obj, attr, None), arg):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def choose_index(indexes, conditions):
+    """
+    Returns the index that gives the fewest candidates for the conditions,
+    as (estimated candidates, condition, index), or None if no index fits
+    (an index estimate is None when it can not answer a condition)
+
+    Args:
+        indexes (dict): {index name: index} of the queried class
+        conditions (list): (attribute, operator, value) conditions
+    """
+    best = None
+    for condition in conditions:
+        attr, op, arg = condition
+        for index in indexes.values():
+            if index.attr != attr or op not in index.operators:
+                continue
+            estimate = index.estimate(op, arg)
+            if estimate is None:
+                # the index can not answer this value (not a number...)
+                continue
+            if best is None or estimate < best[0]:
+                best = (estimate, condition, index)
+    return best
+
+
+def select(objects, conditions, order_by=None, limit=None):
+    """
+    Returns the objects meeting the conditions as a list,
+    ordered by an attribute and cut to a number of objects
+
+    Args:
+        objects (iterable): the candidate objects
+        conditions (list): (attribute, operator, value) conditions
+        order_by (str): the attribute to order by, "-<attribute>"
+        for the descending order
+        limit (int): the maximum number of objects
+
+    Raises:
+        ValueError: if the limit is negative or the values of the
+        order_by attribute can not be compared
+    """
+    if limit is not None and (type(limit) is not int or limit < 0):
+        raise ValueError(f"invalid limit: {limit}")
+    found = (obj for obj in objects if matches(obj, conditions))
+    if order_by is None:
+        return list(itertools.islice(found, limit))
+
+    attr = order_by.lstrip("-")
+    reverse = order_by.startswith("-")
+
+    def sort_key(obj):
+        value = getattr(obj, attr, None)
+        # objects without a value come last
+        return (value is None) != reverse, value
+
+    try:
+        if limit is None:
+            return sorted(found, key=sort_key, reverse=reverse)
+        if reverse:
+            return heapq.nlargest(limit, found, key=sort_key)
+        return heapq.nsmallest(limit, found, key=sort_key)
+    except TypeError:
+        raise ValueError(f"can not order by {attr}") from None
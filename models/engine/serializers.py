@@ -0,0 +1,421 @@
+#!/usr/bin/python3
+"""
+representing the on-disk formats of FileStorage
+
+This module defines the serializers used by `FileStorage`
+to write stored objects to a file and read them back:
+
+    JSONSerializer: one json object, one stored object per line
+    BinarySerializer: struct-packed records with a field table per class
+    and timestamps as integer microseconds
+
+`detect()` tells which serializer wrote a file.
+"""
+import re
+import io
+import json
+import struct
+import threading
+from datetime import datetime, timedelta
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def detect(file):
+    """
+    Returns the serializer that wrote a data file
+
+    Args:
+        file (file): the file opened in binary mode, it is left at its start
+    """
+    file.seek(0)
+    magic = file.read(len(BinarySerializer.magic))
+    file.seek(0)
+    if magic == BinarySerializer.magic:
+        return BinarySerializer()
+    return JSONSerializer()
+
+
+def _iter_json_items(file, chunk_size=64 * 1024):
+    """
+    Yields the (key, value) pairs of the json object stored in a file
+    one pair at a time, reading the file in chunks
+
+    Args:
+        file (file): the file opened in text mode
+        chunk_size (int): number of characters read at once
+
+    Raises:
+        ValueError: if the file is not a json object
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    # what comes next: "{", "first key" (or "}"), "key", ":", "value", ","
+    expected = "{"
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        if pos == len(buffer):
+            if eof:
+                raise ValueError("unexpected end of the json object")
+            buffer, pos = file.read(chunk_size), 0
+            eof = buffer == ""
+            continue
+        char = buffer[pos]
+        if expected in ("key", "value") or (
+            expected == "first key" and char != "}"
+        ):
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                # a number at the end of the buffer may go on in the file
+                complete = end < len(buffer) or eof
+            except ValueError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                # the item is cut by the end of the buffer, read it all
+                chunk = file.read(max(chunk_size, len(buffer) - pos))
+                eof = chunk == ""
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            pos = end
+            if expected != "value":
+                if not isinstance(item, str):
+                    raise ValueError("json object keys must be strings")
+                key, expected = item, ":"
+            else:
+                yield key, item
+                expected = ","
+        elif expected == "{" and char == "{":
+            pos += 1
+            expected = "first key"
+        elif expected == ":" and char == ":":
+            pos += 1
+            expected = "value"
+        elif expected == "," and char == ",":
+            pos += 1
+            expected = "key"
+        elif char == "}" and expected in ("first key", ","):
+            return
+        else:
+            raise ValueError(f"unexpected {char!r} in the json object")
+
+
+class JSONSerializer:
+    """
+    JSONSerializer writes stored objects as one json object
+    {"<class_name>.<id>": {...}, ...} with one stored object per line,
+    so the place of every object in the file can be indexed
+    without parsing it (see `index()`).
+    """
+
+    name = "json"
+
+    def encode(self, obj):
+        """
+        Returns the json text (bytes) of an object
+        """
+        return json.dumps(obj.to_dict()).encode()
+
+    def decode(self, data):
+        """
+        Returns the attributes (dict) of an object from its json text
+        """
+        return json.loads(data)
+
+    def write(self, file, records):
+        """
+        Writes encoded objects to a file
+
+        Args:
+            file (file): the file opened in binary mode
+            records (list): (key, encoded object) pairs
+
+        Returns:
+            dict: key -> (offset, length) of each encoded object in the file
+        """
+        offsets = {}
+        lines = []
+        offset = 2  # after "{\n"
+        for key, data in records:
+            prefix = f"{json.dumps(key)}: ".encode()
+            offsets[key] = (offset + len(prefix), len(data))
+            lines.append(prefix + data)
+            offset += len(prefix) + len(data) + 2  # ",\n"
+        file.write(b"{\n" + b",\n".join(lines) + b"\n}\n")
+        return offsets
+
+    def read(self, file):
+        """
+        Yields the (key, attributes) pairs of the objects of a file,
+        one at a time as the file is parsed
+
+        Args:
+            file (file): the file opened in binary mode
+        """
+        text_file = io.TextIOWrapper(file, encoding="utf-8")
+        try:
+            yield from _iter_json_items(text_file)
+        finally:
+            # give the file back instead of closing it with the wrapper
+            text_file.detach()
+
+    def index(self, file):
+        """
+        Returns {key: (offset, length)} of the objects of a file
+        without parsing them, or None if the file is not written
+        one object per line
+
+        Args:
+            file (file): the file opened in binary mode
+        """
+        entries = {}
+        file.seek(0)
+        first_line = file.readline()
+        if first_line.rstrip() != b"{":
+            return None
+        offset = len(first_line)
+        for line in file:
+            text = line.rstrip(b",\r\n")
+            sep = text.find(b'": {')
+            if text[:1] == b'"' and sep > 0 and text[-1:] == b"}":
+                key = text[1:sep].decode()
+                if "\\" in key:
+                    key = json.loads(text[: sep + 1])
+                entries[key] = (offset + sep + 3, len(text) - sep - 3)
+            elif text != b"}":
+                return None
+            offset += len(line)
+        return entries
+
+
+class BinarySerializer:
+    """
+    BinarySerializer writes stored objects as struct-packed records:
+
+        magic, number of field tables (u32), the field tables:
+            table id (u16), class name, number of fields (u16), field names
+        then one record per object:
+            record length (u32), table id (u16), id,
+            created_at and updated_at (i64 microseconds since 1970),
+            one tagged value per field of the table
+
+    a field table lists the attribute names (sorted) shared by the
+    objects of a class, so the names are written once instead of once
+    per object. a file only holds the tables of its records, at most
+    65536 of them.
+
+    Class Attributes:
+        magic (bytes): the first bytes of a binary file.
+        __shapes (dict): (class name, sorted field names) -> shape id,
+        shared by every serializer of the process so encoded objects
+        can be cached and written to any file, where each shape
+        gets the table id of that file.
+        __shape_tables (list): shape id -> (class name, field names).
+    """
+
+    name = "binary"
+    magic = b"HBNB\x00\x01"
+    __max_tables = 2**16
+    __shapes = {}
+    __shape_tables = []
+    __shapes_lock = threading.Lock()
+    __epoch = datetime(1970, 1, 1)
+    __microsecond = timedelta(microseconds=1)
+    __u16 = struct.Struct(">H")
+    __u32 = struct.Struct(">I")
+    __i64 = struct.Struct(">q")
+    __f64 = struct.Struct(">d")
+    __record = struct.Struct(">HH")
+    __encoded = struct.Struct(">IH")
+    __times = struct.Struct(">qq")
+    __skipped = ("id", "created_at", "updated_at", "__class__")
+
+    def encode(self, obj):
+        """
+        Returns the record (bytes) of an object, without its length,
+        it starts with the shape id (u32) `write()` turns into the
+        table id of the file
+        """
+        attributes = obj.__dict__
+        fields = tuple(sorted(
+            name
+            for name in attributes
+            if name not in BinarySerializer.__skipped
+        ))
+        shape = (obj.__class__.__name__, fields)
+        shape_id = BinarySerializer.__shapes.get(shape)
+        if shape_id is None:
+            with BinarySerializer.__shapes_lock:
+                shape_id = BinarySerializer.__shapes.get(shape)
+                if shape_id is None:
+                    shape_id = len(BinarySerializer.__shape_tables)
+                    BinarySerializer.__shape_tables.append(shape)
+                    BinarySerializer.__shapes[shape] = shape_id
+        obj_id = obj.id.encode()
+        data = bytearray(
+            BinarySerializer.__encoded.pack(shape_id, len(obj_id))
+        )
+        data += obj_id
+        epoch = BinarySerializer.__epoch
+        microsecond = BinarySerializer.__microsecond
+        data += BinarySerializer.__times.pack(
+            (obj.created_at - epoch) // microsecond,
+            (obj.updated_at - epoch) // microsecond,
+        )
+        for name in fields:
+            self.__pack_value(attributes[name], data)
+        return bytes(data)
+
+    def __pack_value(self, value, data):
+        """
+        Appends one tagged value to a record
+        """
+        if value is None:
+            data += b"n"
+        elif value is True or value is False:
+            data += b"t" if value else b"F"
+        elif type(value) is int and -(2**63) <= value < 2**63:
+            data += b"i" + BinarySerializer.__i64.pack(value)
+        elif type(value) is float:
+            data += b"f" + BinarySerializer.__f64.pack(value)
+        elif type(value) is str:
+            text = value.encode()
+            data += b"s" + BinarySerializer.__u32.pack(len(text)) + text
+        else:
+            text = json.dumps(value).encode()
+            data += b"j" + BinarySerializer.__u32.pack(len(text)) + text
+
+    def write(self, file, records):
+        """
+        Writes encoded objects to a file
+
+        Args:
+            file (file): the file opened in binary mode
+            records (list): (key, encoded object) pairs
+
+        Returns:
+            dict: key -> (offset, length) of each encoded object in the file
+
+        Raises:
+            ValueError: if the records have more than 65536 field tables
+        """
+        u16 = BinarySerializer.__u16
+        u32 = BinarySerializer.__u32
+        # shape id -> table id in this file, in the order of the records
+        tables = {}
+        for _, data in records:
+            (shape_id,) = u32.unpack_from(data, 0)
+            if shape_id not in tables:
+                if len(tables) == BinarySerializer.__max_tables:
+                    raise ValueError(
+                        "too many field tables for one binary file "
+                        f"(more than {BinarySerializer.__max_tables} "
+                        "different sets of attribute names)"
+                    )
+                tables[shape_id] = len(tables)
+        chunks = [BinarySerializer.magic, u32.pack(len(tables))]
+        for shape_id, table_id in tables.items():
+            cls_name, fields = BinarySerializer.__shape_tables[shape_id]
+            text = cls_name.encode()
+            chunks.append(u16.pack(table_id) + u16.pack(len(text)) + text)
+            chunks.append(u16.pack(len(fields)))
+            for name in fields:
+                text = name.encode()
+                chunks.append(u16.pack(len(text)) + text)
+        offset = sum(map(len, chunks))
+        offsets = {}
+        for key, data in records:
+            # the shape id (u32) becomes the table id (u16) of the file
+            size = len(data) - 2
+            table_id = tables[u32.unpack_from(data, 0)[0]]
+            chunks.append(u32.pack(size) + u16.pack(table_id))
+            chunks.append(memoryview(data)[4:])
+            offsets[key] = (offset + 4, size)
+            offset += 4 + size
+        file.write(b"".join(chunks))
+        return offsets
+
+    def read(self, file):
+        """
+        Yields the (key, attributes) pairs of the objects of a file,
+        one at a time as the file is read
+
+        Args:
+            file (file): the file opened in binary mode
+
+        Raises:
+            ValueError: if the file is not a (complete) binary file
+        """
+        if file.read(len(BinarySerializer.magic)) != BinarySerializer.magic:
+            raise ValueError("not a binary storage file")
+        tables = {}
+        (count,) = BinarySerializer.__u32.unpack(self.__read(file, 4))
+        for _ in range(count):
+            table_id = self.__read_u16(file)
+            cls_name = self.__read(file, self.__read_u16(file)).decode()
+            fields = tuple(
+                self.__read(file, self.__read_u16(file)).decode()
+                for _ in range(self.__read_u16(file))
+            )
+            tables[table_id] = (cls_name, fields)
+        while True:
+            size = file.read(4)
+            if size == b"":
+                return
+            (size,) = BinarySerializer.__u32.unpack(size)
+            yield self.__unpack(tables, self.__read(file, size))
+
+    def __unpack(self, tables, data):
+        """
+        Returns the (key, attributes) pair of a record
+        """
+        table_id, id_size = BinarySerializer.__record.unpack_from(data, 0)
+        pos = 4 + id_size
+        obj_id = data[4:pos].decode()
+        created, updated = BinarySerializer.__times.unpack_from(data, pos)
+        pos += 16
+        cls_name, fields = tables[table_id]
+        epoch = BinarySerializer.__epoch
+        attributes = {
+            "id": obj_id,
+            "created_at": epoch + timedelta(microseconds=created),
+            "updated_at": epoch + timedelta(microseconds=updated),
+        }
+        for name in fields:
+            tag = data[pos: pos + 1]
+            pos += 1
+            if tag == b"s" or tag == b"j":
+                (size,) = BinarySerializer.__u32.unpack_from(data, pos)
+                text = data[pos + 4: pos + 4 + size].decode()
+                pos += 4 + size
+                value = text if tag == b"s" else json.loads(text)
+            elif tag == b"i":
+                (value,) = BinarySerializer.__i64.unpack_from(data, pos)
+                pos += 8
+            elif tag == b"f":
+                (value,) = BinarySerializer.__f64.unpack_from(data, pos)
+                pos += 8
+            elif tag in (b"n", b"t", b"F"):
+                value = {b"n": None, b"t": True, b"F": False}[tag]
+            else:
+                raise ValueError(f"unknown value tag {tag!r}")
+            attributes[name] = value
+        return f"{cls_name}.{obj_id}", attributes
+
+    def __read(self, file, size):
+        """
+        Reads exactly `size` bytes of a file
+        """
+        data = file.read(size)
+        if len(data) != size:
+            raise ValueError("unexpected end of the binary storage file")
+        return data
+
+    def __read_u16(self, file):
+        """
+        Reads one unsigned 16 bits integer of a file
+        """
+        return BinarySerializer.__u16.unpack(self.__read(file, 2))[0]
@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+"""
+representing the transactions of the storage engines
+
+This module defines the `UndoLog` class, kept by a storage engine while
+a transaction is open (`storage.begin()` ... `storage.commit()`),
+it holds the state every object had before the transaction changed it,
+so `storage.rollback()` can put it back.
+"""
+import copy
+
+
+class UndoLog:
+    """
+    UndoLog records the state of each object the first time
+    a transaction creates, updates or deletes it.
+
+    Attributes:
+        changes (dict): the changes of the storage that were not saved
+        when the transaction began ({key: object or None}).
+    """
+
+    def __init__(self, changes):
+        """
+        Initializes an empty undo log
+
+        Args:
+            changes (dict): the unsaved changes of the storage
+        """
+        self.changes = dict(changes)
+        # key -> (object or None if the key was free, its attributes)
+        self.__states = {}
+
+    def __len__(self):
+        """
+        Returns the number of objects the transaction changed
+        """
+        return len(self.__states)
+
+    def record(self, key, obj):
+        """
+        Records what a key holds before the transaction changes it,
+        only the first change of a key is recorded
+
+        Args:
+            key (str): the key of the object in the storage
+            obj (BaseModel): the object the key holds, None if it holds none
+        """
+        if key in self.__states:
+            return
+        if obj is None:
+            self.__states[key] = (None, None)
+        else:
+            self.__states[key] = (obj, copy.deepcopy(obj.__dict__))
+
+    def undo(self):
+        """
+        Puts back the attributes of the recorded objects
+
+        Returns:
+            dict: {key: object} of what each recorded key held
+            when the transaction began (None if it held no object)
+        """
+        restored = {}
+        for key, (obj, state) in self.__states.items():
+            if obj is not None:
+                obj.__dict__.clear()
+                obj.__dict__.update(state)
+            restored[key] = obj
+        return restored
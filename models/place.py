@@ -25,6 +25,9 @@ class Place(BaseModel):
         longitude (float): The longitude coordinate of the place's location.
         amenity_ids (list): A list of identifiers for
         amenities available at the place.
+
+    Properties:
+        reviews (list): The reviews of the place.
     """
 
     city_id = ""
@@ -38,3 +41,10 @@ class Place(BaseModel):
     latitude = 0.0
     longitude = 0.0
     amenity_ids = []
+
+    @property
+    def reviews(self):
+        """
+        The reviews of the place (Review.place_id)
+        """
+        return self.related("Review", "place_id")
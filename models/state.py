@@ -13,6 +13,16 @@ class State(BaseModel):
 
     Class Attributes:
         name (str): The name of the state.
+
+    Properties:
+        cities (list): The cities of the state.
     """
 
     name = ""
+
+    @property
+    def cities(self):
+        """
+        The cities of the state (City.state_id)
+        """
+        return self.related("City", "state_id")
@@ -25,6 +25,10 @@ class User(BaseModel):
         password (str): The user's password.
         first_name (str): The first name of the user.
         last_name (str): The last name of the user.
+
+    Properties:
+        places (list): The places owned by the user.
+        reviews (list): The reviews written by the user.
     """
 
     email = ""
@@ -39,3 +43,17 @@ class User(BaseModel):
         kwargs: key, value pairs each key will be an attribute
         """
         super().__init__(*args, **kwargs)
+
+    @property
+    def places(self):
+        """
+        The places owned by the user (Place.user_id)
+        """
+        return self.related("Place", "user_id")
+
+    @property
+    def reviews(self):
+        """
+        The reviews written by the user (Review.user_id)
+        """
+        return self.related("Review", "user_id")
@@ -10,13 +10,29 @@ Unittest classes:
     TestHBNBCommand_all
     TestHBNBCommand_destroy
     TestHBNBCommand_update
+    TestHBNBCommand_count
+    TestHBNBCommand_set
+    TestHBNBCommand_transaction
+    TestHBNBCommand_bulk
+    TestHBNBCommand_batch
+    TestHBNBCommand_jsonl
+    TestHBNBCommand_where
+    TestHBNBCommand_near
+    TestHBNBCommand_search
 """
 import os
+import json
 import pep8
 import console
 import unittest
+from uuid import uuid4
 from models import storage
 from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.city import City
+from models.user import User
 from console import HBNBCommand
 from io import StringIO
 from unittest.mock import patch
@@ -115,7 +131,10 @@ class TestHBNBCommand_help(unittest.TestCase):
         h = (
             "Documented commands (type help <topic>):\n"
             "========================================\n"
-            "EOF  all  count  create  destroy  help  quit  show  update"
+            "EOF  bbox   bulk    count   destroy  help  nearest  rollback  "
+            "set   update\n"
+            "all  begin  commit  create  explain  near  quit     search    "
+            "show  where"
         )
         with patch("sys.stdout", new=StringIO()) as output:
             self.assertFalse(HBNBCommand().onecmd("help"))
@@ -133,6 +152,16 @@ class TestHBNBCommand_exit(unittest.TestCase):
         with self.assertRaises(SystemExit):
             HBNBCommand().do_EOF(" ")
 
+    def test_quit_flushes_storage(self):
+        with patch.object(storage, "flush") as flush:
+            with self.assertRaises(SystemExit):
+                HBNBCommand().do_quit(" ")
+            flush.assert_called_once_with()
+        with patch.object(storage, "flush") as flush:
+            with self.assertRaises(SystemExit):
+                HBNBCommand().do_EOF(" ")
+            flush.assert_called_once_with()
+
 
 class TestHBNBCommand_create(unittest.TestCase):
     """Unittests for testing create from the HBNB command interpreter."""
@@ -458,6 +487,27 @@ class TestHBNBCommand_show(unittest.TestCase):
             self.assertFalse(HBNBCommand().onecmd(command))
             self.assertEqual(obj.__str__(), output.getvalue().strip())
 
+    def test_show_expand(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("create User"))
+            testID = output.getvalue().strip()
+        us = storage.get("User", testID)
+        pl = Place()
+        pl.user_id = testID
+        with patch("sys.stdout", new=StringIO()) as output:
+            command = "show User {} --expand".format(testID)
+            self.assertFalse(HBNBCommand().onecmd(command))
+            self.assertEqual(
+                [str(us), "places: {}".format([str(pl)]), "reviews: []"],
+                output.getvalue().strip().split("\n"),
+            )
+        with patch("sys.stdout", new=StringIO()) as output:
+            command = "update User {} places x".format(testID)
+            self.assertFalse(HBNBCommand().onecmd(command))
+            self.assertEqual(
+                "** places can't be set **", output.getvalue().strip()
+            )
+
 
 class TestHBNBCommand_destroy(unittest.TestCase):
     """Unittests for testing destroy from the HBNB command interpreter."""
@@ -713,6 +763,36 @@ class TestHBNBCommand_destroy(unittest.TestCase):
             self.assertFalse(HBNBCommand().onecmd(command))
             self.assertNotIn(obj, storage.all())
 
+    def test_destroy_cascade(self):
+        st = State()
+        cy = City()
+        cy.state_id = st.id
+        pl = Place()
+        pl.city_id = cy.id
+        keys = ["State." + st.id, "City." + cy.id, "Place." + pl.id]
+        with patch("sys.stdout", new=StringIO()) as output:
+            command = "destroy State {} --dry-run".format(st.id)
+            self.assertFalse(HBNBCommand().onecmd(command))
+            self.assertEqual("State: 1", output.getvalue().strip())
+        with patch("sys.stdout", new=StringIO()) as output:
+            command = "destroy State {} --cascade --dry-run".format(st.id)
+            self.assertFalse(HBNBCommand().onecmd(command))
+            self.assertEqual(
+                "State: 1, City: 1, Place: 1", output.getvalue().strip()
+            )
+        for key in keys:
+            self.assertIn(key, storage.all())
+        with patch("sys.stdout", new=StringIO()) as output:
+            command = "destroy State {} --cascade".format(st.id)
+            self.assertFalse(HBNBCommand().onecmd(command))
+            self.assertEqual(
+                "State: 1, City: 1, Place: 1", output.getvalue().strip()
+            )
+        for key in keys:
+            self.assertNotIn(key, storage.all())
+        with open("file.json") as f:
+            self.assertNotIn(cy.id, f.read())
+
 
 class TestHBNBCommand_all(unittest.TestCase):
     """Unittests for testing all of the HBNB command interpreter."""
@@ -1093,6 +1173,157 @@ class TestHBNBCommand_update(unittest.TestCase):
         test_dict = storage.all()["Place.{}".format(testId)].__dict__
         self.assertEqual(7.2, test_dict["latitude"])
 
+    def test_update_list_attr(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create Place")
+            testId = output.getvalue().strip()
+        place = storage.get("Place", testId)
+        testCmd = 'update Place {} amenity_ids "a1,a2"'.format(testId)
+        self.assertFalse(HBNBCommand().onecmd(testCmd))
+        self.assertEqual(["a1", "a2"], place.amenity_ids)
+        testCmd = 'update Place {} amenity_ids ["a3", "a 4"]'.format(testId)
+        self.assertFalse(HBNBCommand().onecmd(testCmd))
+        self.assertEqual(["a3", "a 4"], place.amenity_ids)
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd(
+                "where Place amenity_ids__all=a3 limit=5"
+            )
+            self.assertIn(testId, output.getvalue())
+
+    def create(self, class_name):
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create " + class_name)
+        return output.getvalue().strip()
+
+    def test_update_many_pairs_saves_once(self):
+        testId = self.create("Place")
+        place = storage.get("Place", testId)
+        testCmd = (
+            'update Place {} name "My house" price_by_night 120 '
+            'latitude 1.5 amenity_ids ["a1", "a 2"]'.format(testId)
+        )
+        with patch.object(storage, "save", wraps=storage.save) as save:
+            self.assertFalse(HBNBCommand().onecmd(testCmd))
+        self.assertEqual(1, save.call_count)
+        self.assertEqual("My house", place.name)
+        self.assertEqual(120, place.price_by_night)
+        self.assertEqual(1.5, place.latitude)
+        self.assertEqual(["a1", "a 2"], place.amenity_ids)
+
+    def test_update_dictionary(self):
+        testId = self.create("Place")
+        place = storage.get("Place", testId)
+        testCmd = (
+            'update Place {} {{"name": "Flat", "price_by_night": "100", '
+            '"max_guest": 3.0, "amenity_ids": ["a1"]}}'.format(testId)
+        )
+        with patch.object(storage, "save", wraps=storage.save) as save:
+            self.assertFalse(HBNBCommand().onecmd(testCmd))
+        self.assertEqual(1, save.call_count)
+        self.assertEqual("Flat", place.name)
+        self.assertEqual(100, place.price_by_night)
+        self.assertEqual(3, place.max_guest)
+        self.assertEqual(int, type(place.max_guest))
+        self.assertEqual(["a1"], place.amenity_ids)
+
+    def test_update_dot_notation(self):
+        testId = self.create("Place")
+        place = storage.get("Place", testId)
+        testCmd = "Place.update({}, {{'name': 'Loft', 'max_guest': 4}})"
+        self.assertFalse(HBNBCommand().onecmd(testCmd.format(testId)))
+        self.assertEqual(("Loft", 4), (place.name, place.max_guest))
+        testCmd = 'Place.update("{}", "description", "Big loft")'
+        self.assertFalse(HBNBCommand().onecmd(testCmd.format(testId)))
+        self.assertEqual("Big loft", place.description)
+        testCmd = 'Place.update("{}", "name", "Attic", "number_rooms", 2)'
+        self.assertFalse(HBNBCommand().onecmd(testCmd.format(testId)))
+        self.assertEqual(("Attic", 2), (place.name, place.number_rooms))
+
+    def test_update_invalid_values(self):
+        testId = self.create("Place")
+        place = storage.get("Place", testId)
+        for testCmd, correct in (
+            ("update Place {} {{bad", "** invalid dictionary **"),
+            ("update Place {} {{\"name\":\"x\"", "** invalid dictionary **"),
+            ("update Place {} [1, 2]", "** value missing **"),
+            ("update Place {} name x max_guest many",
+             "** invalid value **"),
+            ("update Place {} name x reviews y",
+             "** reviews can't be set **"),
+        ):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(testCmd.format(testId)))
+                self.assertEqual(correct, output.getvalue().strip())
+        self.assertNotIn("name", place.__dict__)
+
+    def test_update_unquoted_value_with_spaces(self):
+        testId = self.create("Place")
+        place = storage.get("Place", testId)
+        testCmd = "update Place {} name John  Smith".format(testId)
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(testCmd))
+            self.assertEqual("", output.getvalue())
+        self.assertEqual("John  Smith", place.name)
+        testCmd = "update Place {} description a b c d".format(testId)
+        HBNBCommand().onecmd(testCmd)
+        self.assertEqual("a b c d", place.description)
+        testCmd = "update Place {} description Bob's big house"
+        HBNBCommand().onecmd(testCmd.format(testId))
+        self.assertEqual("Bob's big house", place.description)
+        self.assertNotIn("big", place.__dict__)
+        # pairs are pairs, the values with spaces are quoted
+        testCmd = 'update Place {} name "A B" max_guest 3'.format(testId)
+        HBNBCommand().onecmd(testCmd)
+        self.assertEqual("A B", place.name)
+        self.assertEqual(3, place.max_guest)
+        testCmd = 'update Place {} name "C" nickname "D E"'.format(testId)
+        HBNBCommand().onecmd(testCmd)
+        self.assertEqual("C", place.name)
+        self.assertEqual("D E", place.nickname)
+
+    def test_update_unquoted_three_words(self):
+        testId = self.create("User")
+        user = storage.get("User", testId)
+        testCmd = "update User {} first_name Betty Ann Holberton"
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(testCmd.format(testId)))
+            self.assertEqual("", output.getvalue())
+        self.assertEqual("Betty Ann Holberton", user.first_name)
+        self.assertNotIn("Ann", user.__dict__)
+        testCmd = "update User {} first_name Betty last_name Holberton"
+        HBNBCommand().onecmd(testCmd.format(testId))
+        self.assertEqual("Betty", user.first_name)
+        self.assertEqual("Holberton", user.last_name)
+
+    def test_update_taken_email(self):
+        ids = []
+        for _ in range(2):
+            with patch("sys.stdout", new=StringIO()) as output:
+                HBNBCommand().onecmd("create User")
+                ids.append(output.getvalue().strip())
+        email = "{}@hbnb.io".format(ids[0])
+        testCmd = "update User {} email {}".format(ids[0], email)
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(testCmd))
+            self.assertEqual("", output.getvalue())
+        testCmd = "update User {} email {}".format(ids[1], email)
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(testCmd))
+            self.assertEqual(
+                "** email already exists **", output.getvalue().strip()
+            )
+        testCmd = "update User {} first_name Bob email {}".format(
+            ids[1], email
+        )
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(testCmd))
+            self.assertEqual(
+                "** email already exists **", output.getvalue().strip()
+            )
+        self.assertEqual("", storage.get("User", ids[1]).first_name)
+        self.assertEqual("", storage.get("User", ids[1]).email)
+        self.assertEqual(ids[0], storage.get_by("User", email=email).id)
+
 
 class TestHBNBCommand_count(unittest.TestCase):
     """Unittests for testing count method of HBNB comand interpreter."""
@@ -1121,6 +1352,697 @@ class TestHBNBCommand_count(unittest.TestCase):
             self.assertFalse(HBNBCommand().onecmd("MyModel.count()"))
             """self.assertEqual("0", output.getvalue().strip())"""
 
+    def test_count_counts_only_the_class(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("count State"))
+            before = int(output.getvalue().strip())
+        with patch("sys.stdout", new=StringIO()):
+            HBNBCommand().onecmd("create State")
+            HBNBCommand().onecmd("create State")
+            HBNBCommand().onecmd("create City")
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("State.count()"))
+            self.assertEqual(before + 2, int(output.getvalue().strip()))
+
+    def test_count_missing_class(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("count"))
+            self.assertEqual(
+                "** class name missing **", output.getvalue().strip()
+            )
+
+
+class TestHBNBCommand_set(unittest.TestCase):
+    """Unittests for testing the set command of the HBNB interpreter."""
+
+    def tearDown(self):
+        storage.set_flush_policy("immediate")
+
+    def test_set_missing_setting(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("set"))
+            self.assertEqual(
+                "** setting name missing **", output.getvalue().strip()
+            )
+
+    def test_set_invalid_setting(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("set color red"))
+            self.assertEqual(
+                "** setting doesn't exist **", output.getvalue().strip()
+            )
+
+    def test_set_flush_policy(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("set flush ops:100"))
+            self.assertEqual("", output.getvalue().strip())
+        self.assertEqual("ops:100", storage.get_flush_policy())
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("set flush"))
+            self.assertEqual("ops:100", output.getvalue().strip())
+
+    def test_set_invalid_flush_policy(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("set flush sometimes"))
+            self.assertEqual(
+                "** invalid flush policy **", output.getvalue().strip()
+            )
+        self.assertEqual("immediate", storage.get_flush_policy())
+
+
+class TestHBNBCommand_transaction(unittest.TestCase):
+    """Unittests for testing begin, commit and rollback of the console."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+
+    def tearDown(self):
+        try:
+            storage.rollback()
+        except ValueError:
+            pass
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def create(self, class_name):
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create " + class_name)
+        return output.getvalue().strip()
+
+    def test_commit(self):
+        self.assertFalse(HBNBCommand().onecmd("begin"))
+        testID = self.create("City")
+        self.assertFalse(os.path.exists("file.json"))
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("commit"))
+            self.assertEqual("", output.getvalue())
+        with open("file.json") as f:
+            self.assertIn(testID, f.read())
+
+    def test_rollback(self):
+        testID = self.create("City")
+        HBNBCommand().onecmd("update City {} name Paris".format(testID))
+        self.assertFalse(HBNBCommand().onecmd("begin"))
+        HBNBCommand().onecmd("update City {} name Lyon".format(testID))
+        otherID = self.create("Place")
+        HBNBCommand().onecmd("destroy City {}".format(testID))
+        self.assertFalse(HBNBCommand().onecmd("rollback"))
+        self.assertEqual("Paris", storage.get("City", testID).name)
+        self.assertIsNone(storage.get("Place", otherID))
+        with open("file.json") as f:
+            self.assertNotIn(otherID, f.read())
+
+    def test_errors(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("commit"))
+            self.assertFalse(HBNBCommand().onecmd("rollback"))
+            self.assertEqual(
+                "** no transaction open **\n** no transaction open **",
+                output.getvalue().strip(),
+            )
+        HBNBCommand().onecmd("begin")
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("begin"))
+            self.assertEqual(
+                "** transaction already open **", output.getvalue().strip()
+            )
+
+
+class TestHBNBCommand_bulk(unittest.TestCase):
+    """Unittests for testing bulk from the HBNB command interpreter."""
+
+    path = "test_bulk.txt"
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+
+    def tearDown(self):
+        for path in ("file.json", self.path):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def write(self, lines):
+        with open(self.path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def bulk(self, args):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("bulk " + args))
+        return output.getvalue().strip()
+
+    def test_bulk_create_update_destroy(self):
+        place_id = str(uuid4())
+        self.write([
+            '{{"place_id": "{}", "text": "nice"}}'.format(place_id),
+            "",
+            '{{"place_id": "{}", "text": "great"}}'.format(place_id),
+        ])
+        self.assertEqual("2", self.bulk("create Review " + self.path))
+        found = storage.lookup(Review, "place_id", place_id)
+        self.assertEqual(2, len(found))
+        with open("file.json") as f:
+            self.assertIn(place_id, f.read())
+        ids = [key.split(".")[1] for key in found]
+        self.write(ids)
+        self.assertEqual(
+            "2", self.bulk('update Review {} text "so so"'.format(self.path))
+        )
+        self.assertEqual(
+            ["so so", "so so"], [rv.text for rv in found.values()]
+        )
+        with patch("sys.stdin", new=StringIO(ids[0] + "\n")):
+            self.assertEqual("1", self.bulk("destroy Review -"))
+        self.assertEqual(1, len(storage.lookup(Review, "place_id", place_id)))
+
+    def test_bulk_update_list(self):
+        self.write(['{"name": "house"}'])
+        self.bulk("create Place " + self.path)
+        pl = storage.get_by(Place, name="house")
+        self.write([pl.id])
+        self.bulk("update Place {} amenity_ids a1,a2".format(self.path))
+        self.assertEqual(["a1", "a2"], pl.amenity_ids)
+
+    def test_bulk_errors(self):
+        self.assertEqual("** bulk command missing **", self.bulk(""))
+        self.assertEqual(
+            "** bulk command doesn't exist **", self.bulk("copy Review x")
+        )
+        self.assertEqual("** class name missing **", self.bulk("create"))
+        self.assertEqual(
+            "** class doesn't exist **", self.bulk("create MyModel x")
+        )
+        self.assertEqual("** file missing **", self.bulk("destroy Review"))
+        self.assertEqual(
+            "** can't read file **", self.bulk("destroy Review nope.txt")
+        )
+        self.write(["nope"])
+        self.assertEqual(
+            "** attribute name missing **",
+            self.bulk("update Review " + self.path),
+        )
+        self.assertEqual(
+            "** value missing **",
+            self.bulk("update Review {} text".format(self.path)),
+        )
+        self.assertEqual(
+            "** invalid value **",
+            self.bulk("update Place {} max_guest x".format(self.path)),
+        )
+        self.assertEqual(
+            "** no instance found **",
+            self.bulk("destroy Review " + self.path),
+        )
+        self.assertEqual(
+            "** invalid record **", self.bulk("create Review " + self.path)
+        )
+        self.write(['["text"]'])
+        self.assertEqual(
+            "** invalid record **", self.bulk("create Review " + self.path)
+        )
+        email = "{}@hbnb.io".format(uuid4())
+        self.write(['{{"email": "{}"}}'.format(email)] * 2)
+        self.assertEqual(
+            "** value already exists **",
+            self.bulk("create User " + self.path),
+        )
+        self.assertIsNone(storage.get_by(User, email=email))
+
+
+class TestHBNBCommand_batch(unittest.TestCase):
+    """Unittests for testing the batch mode of the HBNB console."""
+
+    path = "test_batch.txt"
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+
+    def tearDown(self):
+        storage.set_flush_policy("immediate")
+        for path in ("file.json", self.path):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def batch(self, lines, flush_every=None):
+        with patch("sys.stdout", new=StringIO()) as output, \
+                patch("sys.stderr", new=StringIO()) as report:
+            failed = HBNBCommand().run_batch(lines, flush_every)
+        return failed, output.getvalue(), report.getvalue()
+
+    def test_batch_defers_saves(self):
+        writes = []
+        replace = FileStorage._FileStorage__replace
+
+        def counting_replace(storage, *args):
+            writes.append(args[0])
+            return replace(storage, *args)
+
+        with patch.object(
+            FileStorage, "_FileStorage__replace", counting_replace
+        ):
+            failed, output, report = self.batch(["create City"] * 5, 2)
+        self.assertEqual(0, failed)
+        # after the 2nd and 4th commands and at the end
+        self.assertEqual(3, len(writes))
+        self.assertEqual("immediate", storage.get_flush_policy())
+        ids = output.split()
+        self.assertEqual(5, len(ids))
+        with open("file.json") as f:
+            self.assertIn(ids[-1], f.read())
+        self.assertIn("5 commands in ", report)
+
+    def test_batch_errors(self):
+        failed, output, report = self.batch([
+            "# a comment",
+            "",
+            "create State",
+            "update State nope name x",
+            "show",
+            "State.count()",
+            "frobnicate",
+            "quit",
+            "create State",
+        ])
+        self.assertEqual(3, failed)
+        lines = output.splitlines()
+        self.assertEqual(5, len(lines))
+        self.assertEqual("** no instance found **", lines[1])
+        self.assertEqual("** unknown command **", lines[4])
+        report = report.splitlines()
+        self.assertTrue(report[0].startswith("5 commands in "))
+        self.assertTrue(report[0].endswith(", 3 errors"))
+        self.assertEqual(
+            ["    show: 1 errors", "    unknown: 1 errors",
+             "    update: 1 errors"],
+            report[1:],
+        )
+
+    def test_main(self):
+        with open(self.path, "w") as f:
+            f.write("create Amenity\n")
+        with patch("sys.stdout", new=StringIO()) as output, \
+                patch("sys.stderr", new=StringIO()):
+            self.assertEqual(0, console.main(["--batch", self.path]))
+        self.assertIsNotNone(storage.get("Amenity", output.getvalue().strip()))
+        with patch("sys.stdin", new=StringIO("show Amenity\n")), \
+                patch("sys.stdout", new=StringIO()), \
+                patch("sys.stderr", new=StringIO()):
+            self.assertEqual(1, console.main(["--batch", "-"]))
+        for argv in (["--flush-every", "2"],
+                     ["--batch", self.path, "--flush-every", "0"],
+                     ["--batch", "nope.txt"]):
+            with patch("sys.stderr", new=StringIO()):
+                with self.assertRaises(SystemExit):
+                    console.main(argv)
+
+
+class TestHBNBCommand_jsonl(unittest.TestCase):
+    """Unittests for testing the JSON lines protocol of the console."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+
+    def tearDown(self):
+        try:
+            storage.rollback()
+        except ValueError:
+            pass
+        storage.set_flush_policy("immediate")
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def run_jsonl(self, *requests):
+        lines = [
+            request if isinstance(request, str) else json.dumps(request)
+            for request in requests
+        ]
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().run_jsonl(lines)
+        return [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_create_show_update(self):
+        email = "{}@hbnb.io".format(uuid4())
+        created = self.run_jsonl({
+            "id": 1, "command": "create", "class": "User",
+            "attributes": {"email": email, "first_name": "Ann"},
+        })[0]
+        self.assertEqual(1, created["id"])
+        self.assertTrue(created["ok"])
+        user = storage.get("User", created["result"])
+        self.assertEqual(email, user.email)
+        with open("file.json") as f:
+            self.assertIn(email, f.read())
+        responses = self.run_jsonl(
+            {"id": 2, "command": "update", "class": "User",
+             "instance": user.id, "attributes": {"last_name": "Lee"}},
+            {"id": 3, "command": "show", "class": "User",
+             "instance": user.id},
+            {"id": 4, "command": "count", "class": "User"},
+        )
+        self.assertEqual({"id": 2, "ok": True, "result": None}, responses[0])
+        self.assertEqual("Lee", user.last_name)
+        self.assertEqual(user.to_dict(), responses[1]["result"])
+        self.assertEqual(len(storage.all("User")), responses[2]["result"])
+
+    def test_count_does_not_read_the_objects(self):
+        self.run_jsonl({"command": "create", "class": "Amenity"})
+        with patch.object(storage, "all", side_effect=AssertionError):
+            response = self.run_jsonl(
+                {"command": "count", "class": "Amenity"}
+            )[0]
+        self.assertEqual(storage.count("Amenity"), response["result"])
+
+    def test_create_casts_values(self):
+        place_id = self.run_jsonl({
+            "command": "create", "class": "Place",
+            "attributes": {"max_guest": "4", "latitude": 2},
+        })[0]["result"]
+        place = storage.get("Place", place_id)
+        self.assertEqual(4, place.max_guest)
+        self.assertEqual(float, type(place.latitude))
+
+    def test_where_and_destroy(self):
+        state_id = self.run_jsonl(
+            {"command": "create", "class": "State",
+             "attributes": {"name": "Texas"}}
+        )[0]["result"]
+        city_id = self.run_jsonl(
+            {"command": "create", "class": "City",
+             "attributes": {"state_id": state_id}}
+        )[0]["result"]
+        responses = self.run_jsonl(
+            {"command": "where", "class": "City",
+             "where": {"state_id": state_id}},
+            {"command": "destroy", "class": "State", "instance": state_id,
+             "cascade": True, "dry_run": True},
+            {"command": "destroy", "class": "State", "instance": state_id,
+             "cascade": True},
+        )
+        self.assertEqual([city_id], [c["id"] for c in responses[0]["result"]])
+        self.assertEqual({"State": 1, "City": 1}, responses[1]["result"])
+        self.assertEqual({"State": 1, "City": 1}, responses[2]["result"])
+        self.assertIsNone(storage.get("City", city_id))
+
+    def test_errors(self):
+        email = "{}@hbnb.io".format(uuid4())
+        self.run_jsonl({"command": "create", "class": "User",
+                        "attributes": {"email": email}})
+        count = len(storage.all("User"))
+        responses = self.run_jsonl(
+            "not json",
+            "[1]",
+            {"id": 1},
+            {"id": 2, "command": "fly"},
+            {"id": 3, "command": "show"},
+            {"id": 4, "command": "show", "class": "MyModel"},
+            {"id": 5, "command": "show", "class": "User"},
+            {"id": 6, "command": "show", "class": "User", "instance": "x"},
+            {"id": 7, "command": "create", "class": "User",
+             "attributes": {"email": email}},
+            {"id": 8, "command": "create", "class": "Place",
+             "attributes": {"max_guest": "many"}},
+            {"id": 9, "command": "create", "class": "State",
+             "attributes": {"cities": []}},
+            {"id": 10, "command": "create", "class": "State",
+             "attributes": "name"},
+            {"id": 11, "command": "where", "class": "Place",
+             "where": {"price__near": 1}},
+            {"id": 12, "command": "commit"},
+        )
+        self.assertEqual(
+            [None, None] + list(range(1, 13)),
+            [response["id"] for response in responses],
+        )
+        self.assertEqual([False] * 14, [r["ok"] for r in responses])
+        self.assertEqual(
+            ["invalid json", "invalid request", "command missing",
+             "unknown command", "class name missing", "class doesn't exist",
+             "instance id missing", "no instance found",
+             "email already exists", "invalid value", "cities can't be set",
+             "invalid attributes", "invalid query", "no transaction open"],
+            [response["error"] for response in responses],
+        )
+        self.assertEqual(count, len(storage.all("User")))
+
+    def test_command_not_a_string(self):
+        requests = [
+            {"id": 1, "command": ["create"]},
+            {"id": 2, "command": {"create": 1}},
+            {"id": 3, "command": 7},
+        ]
+        responses = self.run_jsonl(*requests)
+        self.assertEqual(
+            [(i, False, "unknown command") for i in range(1, 4)],
+            [(r["id"], r["ok"], r["error"]) for r in responses],
+        )
+        lines = [json.dumps(request) for request in requests]
+        with patch("sys.stdout", new=StringIO()), \
+                patch("sys.stderr", new=StringIO()) as report:
+            failed = HBNBCommand().run_batch(lines, jsonl=True)
+        self.assertEqual(3, failed)
+        self.assertIn("    unknown: 3 errors", report.getvalue())
+
+    def test_transaction_and_quit(self):
+        responses = self.run_jsonl(
+            {"command": "begin"},
+            {"command": "create", "class": "Amenity"},
+            {"command": "rollback"},
+            {"command": "quit"},
+            {"command": "count", "class": "Amenity"},
+        )
+        self.assertEqual(4, len(responses))
+        self.assertTrue(all(response["ok"] for response in responses))
+        self.assertIsNone(storage.get("Amenity", responses[1]["result"]))
+
+    def test_batch(self):
+        lines = [
+            json.dumps({"id": i, "command": "create", "class": "Review"})
+            for i in range(3)
+        ]
+        with patch("sys.stdout", new=StringIO()) as output, \
+                patch("sys.stderr", new=StringIO()) as report:
+            failed = HBNBCommand().run_batch(lines + ["{}"], jsonl=True)
+        self.assertEqual(1, failed)
+        responses = [
+            json.loads(line) for line in output.getvalue().splitlines()
+        ]
+        self.assertEqual("command missing", responses[3]["error"])
+        self.assertIn("4 commands in ", report.getvalue())
+        self.assertIn("    unknown: 1 errors", report.getvalue())
+        with open("file.json") as f:
+            content = f.read()
+        for response in responses[:3]:
+            self.assertIn("Review." + response["result"], content)
+
+
+class TestHBNBCommand_where(unittest.TestCase):
+    """Unittests for testing the where and explain commands."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        self.city_id = "city{}".format(id(self))
+        self.places = []
+        for price in (100, 50, 150):
+            with patch("sys.stdout", new=StringIO()) as output:
+                HBNBCommand().onecmd("create Place")
+                pl = storage.get("Place", output.getvalue().strip())
+            pl.city_id = self.city_id
+            pl.price_by_night = price
+            self.places.append(pl)
+
+    def tearDown(self):
+        for pl in self.places:
+            storage.delete(pl)
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def where(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+            return output.getvalue().strip()
+
+    def test_where(self):
+        output = self.where(
+            'where Place city_id="{}" price_by_night__gte=100 '
+            "order_by=-price_by_night".format(self.city_id)
+        )
+        self.assertEqual(
+            str([str(self.places[2]), str(self.places[0])]), output
+        )
+
+    def test_where_in_and_limit(self):
+        output = self.where(
+            "where Place city_id={} price_by_night__in=50,150 "
+            "order_by=price_by_night limit=1".format(self.city_id)
+        )
+        self.assertEqual(str([str(self.places[1])]), output)
+
+    def test_explain(self):
+        output = self.where("explain Place city_id={}".format(self.city_id))
+        self.assertIn("'plan': 'index'", output)
+        self.assertIn("'candidates': 3", output)
+
+    def test_where_errors(self):
+        self.assertEqual("** class name missing **", self.where("where"))
+        self.assertEqual(
+            "** class doesn't exist **", self.where("where MyModel")
+        )
+        for command in (
+            "where Place city_id",
+            "where Place price_by_night=cheap",
+            "where Place limit=x",
+            "where Place name__like=x",
+            'where Place name="x',
+            "explain Place name__like=x",
+        ):
+            self.assertEqual("** invalid query **", self.where(command))
+
+
+class TestHBNBCommand_near(unittest.TestCase):
+    """Unittests for testing the near, bbox and nearest commands."""
+
+    def setUp(self):
+        self.places = []
+        for lat, lon in ((-33.86, 151.2), (-33.87, 151.21)):
+            pl = Place()
+            pl.latitude = lat
+            pl.longitude = lon
+            self.places.append(pl)
+
+    def tearDown(self):
+        for pl in self.places:
+            storage.delete(pl)
+
+    def run_command(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+            return output.getvalue().strip()
+
+    def test_near(self):
+        self.assertEqual(
+            str([str(self.places[1]), str(self.places[0])]),
+            self.run_command("near -33.875 151.21 2"),
+        )
+
+    def test_bbox(self):
+        self.assertEqual(
+            str([str(self.places[1])]),
+            self.run_command("bbox -33.9 151.205 -33.8 151.3"),
+        )
+
+    def test_nearest(self):
+        self.assertEqual(
+            str([str(self.places[0])]),
+            self.run_command("nearest -33.86 151.19 1"),
+        )
+
+    def test_errors(self):
+        self.assertEqual(
+            "** coordinates missing **", self.run_command("near 1 2")
+        )
+        self.assertEqual(
+            "** coordinates missing **", self.run_command("bbox 1 2 3")
+        )
+        for command in (
+            "near a b c",
+            "near 95 0 10",
+            "near 0 0 -1",
+            "bbox 0 0 1 181",
+            "nearest 0 0 1.5",
+            "nearest 0 0 inf",
+        ):
+            self.assertEqual(
+                "** invalid coordinates **", self.run_command(command)
+            )
+
+
+class TestHBNBCommand_search(unittest.TestCase):
+    """Unittests for testing the search command."""
+
+    def setUp(self):
+        self.reviews = []
+        for text in ("quiet xylophone street", "xylophone xylophone"):
+            rv = Review()
+            rv.text = text
+            self.reviews.append(rv)
+
+    def tearDown(self):
+        for rv in self.reviews:
+            storage.delete(rv)
+
+    def run_command(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+            return output.getvalue().strip()
+
+    def test_search(self):
+        self.assertEqual(
+            str([str(self.reviews[1]), str(self.reviews[0])]),
+            self.run_command("search Review Xylophone"),
+        )
+        self.assertEqual(
+            str([str(self.reviews[0])]),
+            self.run_command("search Review quiet"),
+        )
+
+    def test_errors(self):
+        self.assertEqual(
+            "** class name missing **", self.run_command("search")
+        )
+        self.assertEqual(
+            "** class doesn't exist **", self.run_command("search MyModel a")
+        )
+        self.assertEqual(
+            "** search terms missing **", self.run_command("search Review")
+        )
+        self.assertEqual(
+            "** class is not searchable **", self.run_command("search User a")
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -4,6 +4,7 @@ Unittest classes:
     TestCity_instantiation
     TestCity_save
     TestCity_to_dict
+    TestCity_relations
 """
 import os
 import models
@@ -11,6 +12,7 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.city import City
+from models.place import Place
 
 
 class TestCity_instantiation(unittest.TestCase):
@@ -190,5 +192,16 @@ class TestCity_to_dict(unittest.TestCase):
             cy.to_dict(None)
 
 
+class TestCity_relations(unittest.TestCase):
+    """Unittests for testing the relationship properties of City."""
+
+    def test_places(self):
+        cy = City()
+        pl = Place()
+        pl.city_id = cy.id
+        self.assertEqual([pl], cy.places)
+        self.assertEqual([], City().places)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,389 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/db_storage.py.
+Unittest classes:
+    TestDBStorage_instantiation
+    TestDBStorage_methods
+"""
+import gc
+import os
+import sys
+import pep8
+import sqlite3
+import unittest
+import subprocess
+from datetime import datetime
+from unittest.mock import patch
+from models.base_model import BaseModel
+from models.engine.db_storage import DBStorage
+from models.user import User
+from models.place import Place
+from models.review import Review
+from models.city import City
+
+
+class TestDBStorage_instantiation(unittest.TestCase):
+    """Unittests for testing instantiation of the DBStorage class."""
+
+    def test_DBStorage_instantiation_no_args(self):
+        self.assertEqual(type(DBStorage()), DBStorage)
+
+    def test_DBStorage_instantiation_with_arg(self):
+        with self.assertRaises(TypeError):
+            DBStorage(None)
+
+    def test_storage_selected_from_environment(self):
+        env = dict(os.environ)
+        env["HBNB_TYPE_STORAGE"] = "db"
+        env["HBNB_DB_PATH"] = "test_select.db"
+        code = "import models; print(type(models.storage).__name__)"
+        try:
+            output = subprocess.run(
+                [sys.executable, "-c", code],
+                env=env,
+                capture_output=True,
+                text=True,
+            ).stdout
+        finally:
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove("test_select.db" + suffix)
+                except FileNotFoundError:
+                    pass
+        self.assertEqual("DBStorage", output.strip())
+
+    def test_import_console(self):
+        env = dict(os.environ)
+        env["HBNB_TYPE_STORAGE"] = "db"
+        env["HBNB_DB_PATH"] = "test_import.db"
+        code = (
+            "import console; st = console.State(); st.save(); "
+            "console.storage.get_by(console.State, id=st.id)"
+        )
+        try:
+            # the second run reads the row written by the first one
+            results = [
+                subprocess.run(
+                    [sys.executable, "-c", code],
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                )
+                for _ in range(2)
+            ]
+        finally:
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove("test_import.db" + suffix)
+                except FileNotFoundError:
+                    pass
+        for result in results:
+            self.assertEqual(0, result.returncode, result.stderr)
+
+
+class TestDBStorage_methods(unittest.TestCase):
+    """Unittests for testing methods of the DBStorage class."""
+
+    path = "test_storage.db"
+
+    def setUp(self):
+        with patch.dict(os.environ, {"HBNB_DB_PATH": self.path}):
+            self.storage = DBStorage()
+        self.storage.reload()
+
+    def tearDown(self):
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(self.path + suffix)
+            except FileNotFoundError:
+                pass
+
+    def reopen(self):
+        with patch.dict(os.environ, {"HBNB_DB_PATH": self.path}):
+            storage = DBStorage()
+        storage.reload()
+        return storage
+
+    def test_style_check(self):
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(["models/engine/db_storage.py"])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_new_and_get(self):
+        us = User()
+        self.storage.new(us)
+        self.assertIs(us, self.storage.get(User, us.id))
+        self.assertIs(us, self.storage.get("User", us.id))
+        self.assertIsNone(self.storage.get(User, "missing"))
+
+    def test_save_and_reload(self):
+        us = User()
+        us.email = "betty@hbnb.io"
+        pl = Place()
+        pl.user_id = us.id
+        self.storage.new(us)
+        self.storage.new(pl)
+        self.storage.save()
+        storage = self.reopen()
+        loaded = storage.get(User, us.id)
+        self.assertEqual("betty@hbnb.io", loaded.email)
+        self.assertEqual(us.created_at, loaded.created_at)
+        self.assertIs(loaded, storage.get(User, us.id))
+        self.assertEqual(
+            {"User." + us.id, "Place." + pl.id}, set(storage.all())
+        )
+
+    def test_read_objects_are_not_kept(self):
+        users = [User() for _ in range(3)]
+        for us in users:
+            self.storage.new(us)
+        self.storage.save()
+        ids = [us.id for us in users]
+        del users, us
+        storage = self.reopen()
+        self.assertEqual(3, len(storage.all(User)))
+        gc.collect()
+        self.assertEqual(0, len(storage._DBStorage__objects))
+        kept = storage.get(User, ids[0])
+        self.assertIs(kept, storage.get(User, ids[0]))
+        changed = storage.get(User, ids[1])
+        changed.first_name = "Betty"
+        storage.touch(changed)
+        del changed
+        gc.collect()
+        # the changed object is kept until it is saved
+        self.assertEqual("Betty", storage.get(User, ids[1]).first_name)
+        self.assertEqual(2, len(storage._DBStorage__objects))
+        storage.save()
+        gc.collect()
+        self.assertEqual(1, len(storage._DBStorage__objects))
+        self.assertEqual("Betty", storage.get(User, ids[1]).first_name)
+
+    def test_touch_and_delete(self):
+        bm = BaseModel()
+        rv = Review()
+        self.storage.new(bm)
+        self.storage.new(rv)
+        self.storage.save()
+        rv.text = "nice"
+        self.storage.touch(rv)
+        self.storage.delete(bm)
+        self.storage.save()
+        storage = self.reopen()
+        self.assertIsNone(storage.get(BaseModel, bm.id))
+        self.assertEqual("nice", storage.get(Review, rv.id).text)
+        with self.assertRaises(KeyError):
+            storage.delete(bm)
+
+    def test_all_and_count_of_a_class(self):
+        us = User()
+        rv = Review()
+        self.storage.new(us)
+        self.storage.new(rv)
+        self.storage.save()
+        other = User()
+        self.storage.new(other)
+        self.assertEqual(2, self.storage.count(User))
+        self.assertEqual(1, self.storage.count("Review"))
+        self.assertEqual(3, self.storage.count())
+        self.assertEqual(
+            {"User." + us.id, "User." + other.id},
+            set(self.storage.all(User)),
+        )
+        self.storage.delete(us)
+        self.assertEqual(1, self.storage.count(User))
+        self.assertEqual(["User." + other.id], list(self.storage.all("User")))
+        self.assertEqual(0, self.storage.count(Place))
+
+    def test_lookup(self):
+        pl = Place()
+        pl.city_id = "c1"
+        pl.name = "house"
+        self.storage.new(pl)
+        self.storage.save()
+        storage = self.reopen()
+        self.assertEqual(["Place." + pl.id], list(storage.lookup(
+            Place, "city_id", "c1"
+        )))
+        self.assertEqual(["Place." + pl.id], list(storage.lookup(
+            "Place", "name", "house"
+        )))
+        loaded = storage.get(Place, pl.id)
+        loaded.city_id = "c2"
+        storage.touch(loaded)
+        self.assertEqual({}, storage.lookup(Place, "city_id", "c1"))
+        self.assertEqual(
+            {"Place." + pl.id: loaded},
+            storage.lookup(Place, "city_id", "c2"),
+        )
+
+    def test_query_and_explain(self):
+        for price in (10, 20, 30):
+            pl = Place()
+            pl.city_id = "c1" if price < 30 else "c2"
+            pl.price_by_night = price
+            self.storage.new(pl)
+        self.storage.save()
+        storage = self.reopen()
+        found = storage.query(Place, city_id="c1", order_by="-price_by_night")
+        self.assertEqual([20, 10], [pl.price_by_night for pl in found])
+        plan = storage.explain(Place, city_id="c1")
+        self.assertEqual(("index", 2), (plan["plan"], plan["candidates"]))
+        found = storage.query(Place, price_by_night__gte=20)
+        self.assertEqual({20, 30}, {pl.price_by_night for pl in found})
+        self.assertEqual("scan", storage.explain(Place, name="x")["plan"])
+
+    def test_location_searches(self):
+        places = []
+        for lat, lon in ((48.85, 2.35), (48.86, 2.34), (51.5, -0.12)):
+            pl = Place()
+            pl.latitude = lat
+            pl.longitude = lon
+            self.storage.new(pl)
+            places.append(pl)
+        self.assertEqual(
+            places[1::-1], self.storage.within_radius(48.86, 2.35, 5)
+        )
+        self.assertEqual(
+            set(places[:2]), set(self.storage.within_bbox(48, 2, 49, 3))
+        )
+        self.assertEqual(places[2:0:-1], self.storage.nearest(51, 0, 2))
+
+    def test_search(self):
+        reviews = []
+        for text in ("great view", "great great host", "noisy"):
+            rv = Review()
+            rv.text = text
+            self.storage.new(rv)
+            reviews.append(rv)
+        self.assertEqual(reviews[1::-1], self.storage.search(Review, "great"))
+        with self.assertRaises(ValueError):
+            self.storage.search(User, "great")
+
+    def test_unique_email(self):
+        us = User()
+        us.__dict__["email"] = "a@hbnb.io"
+        self.storage.new(us)
+        self.storage.save()
+        storage = self.reopen()
+        self.assertEqual(us.id, storage.get_by(User, email="a@hbnb.io").id)
+        self.assertIsNone(storage.get_by(User, email="b@hbnb.io"))
+        other = User()
+        other.__dict__["email"] = "a@hbnb.io"
+        with self.assertRaises(ValueError):
+            storage.new(other)
+        storage.check_unique(storage.get(User, us.id), "email", "a@hbnb.io")
+        storage.check_unique(other, "email", "")
+        plan = storage.explain(User, email="a@hbnb.io")
+        self.assertEqual(("index", 1), (plan["plan"], plan["candidates"]))
+
+    def test_email_column_added_to_old_tables(self):
+        with sqlite3.connect(self.path) as connection:
+            connection.execute('DROP TABLE "User"')
+            connection.execute(
+                'CREATE TABLE "User" (id TEXT PRIMARY KEY, '
+                "created_at TEXT, updated_at TEXT, data TEXT NOT NULL)"
+            )
+            connection.execute(
+                'INSERT INTO "User" VALUES (?, ?, ?, ?)',
+                ("u1", "", "", '{"email": "a@hbnb.io"}'),
+            )
+        storage = self.reopen()
+        plan = storage.explain(User, email="a@hbnb.io")
+        self.assertEqual(("index", 1), (plan["plan"], plan["candidates"]))
+
+    def test_delete_cascade(self):
+        us = User()
+        pl = Place()
+        pl.user_id = us.id
+        rv = Review()
+        rv.place_id = pl.id
+        other = City()
+        for obj in (us, pl, rv, other):
+            self.storage.new(obj)
+        self.storage.save()
+        storage = self.reopen()
+        loaded = storage.get(User, us.id)
+        counts = storage.delete_cascade(loaded, dry_run=True)
+        self.assertEqual({"User": 1, "Place": 1, "Review": 1}, counts)
+        self.assertEqual(4, storage.count())
+        self.assertEqual(counts, storage.delete_cascade(loaded))
+        storage.save()
+        self.assertEqual(["City." + other.id], list(self.reopen().all()))
+        with self.assertRaises(KeyError):
+            storage.delete_cascade(loaded)
+
+    def test_transaction(self):
+        us = User()
+        self.storage.new(us)
+        self.storage.save()
+        storage = self.reopen()
+        loaded = storage.get(User, us.id)
+        with self.assertRaises(RuntimeError):
+            with storage.transaction():
+                storage.new(Place())
+                loaded.__dict__["first_name"] = "Betty"
+                storage.before_set(loaded, "last_name", "Holberton")
+                loaded.__dict__["last_name"] = "Holberton"
+                storage.delete(loaded)
+                storage.save()
+                raise RuntimeError
+        self.assertEqual(["User." + us.id], list(storage.all()))
+        self.assertEqual(1, self.reopen().count())
+        self.assertNotIn("last_name", loaded.__dict__)
+        with storage.transaction():
+            storage.new(Place())
+            storage.save()
+            self.assertEqual(1, self.reopen().count())
+        self.assertEqual(2, self.reopen().count())
+        with self.assertRaises(ValueError):
+            storage.commit()
+
+    def test_bulk(self):
+        now = datetime.now()
+        reviews = [
+            Review(id=str(i), created_at=now, updated_at=now, text="nice")
+            for i in range(4)
+        ]
+        self.assertEqual(4, self.storage.bulk_new(reviews))
+        self.assertEqual(4, self.reopen().count(Review))
+        self.assertEqual(
+            2, self.storage.bulk_update(Review, ["0", "1"], place_id="p1")
+        )
+        found = self.reopen().lookup(Review, "place_id", "p1")
+        self.assertEqual(2, len(found))
+        with self.assertRaises(KeyError):
+            self.storage.bulk_delete(Review, ["2", "nope"])
+        self.assertEqual(2, self.storage.bulk_delete(Review, ["2", "3"]))
+        self.assertEqual(2, self.reopen().count(Review))
+        users = [
+            User(id=str(i), created_at=now, updated_at=now, email="a@hbnb.io")
+            for i in range(2)
+        ]
+        with self.assertRaises(ValueError):
+            self.storage.bulk_new(users)
+        self.assertEqual(0, self.storage.count(User))
+
+    def test_tables_and_foreign_key_indexes(self):
+        with sqlite3.connect(self.path) as connection:
+            indexes = {
+                row[0]
+                for row in connection.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index'"
+                )
+            }
+            columns = [
+                row[1]
+                for row in connection.execute('PRAGMA table_info("Review")')
+            ]
+            mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertIn("Place_city_id", indexes)
+        self.assertIn("Place_user_id", indexes)
+        self.assertIn("Review_place_id", indexes)
+        self.assertIn("City_state_id", indexes)
+        self.assertIn("User_email", indexes)
+        self.assertIn("place_id", columns)
+        self.assertEqual("wal", mode)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,15 +3,43 @@
 Unittest classes:
     TestFileStorage_instantiation
     TestFileStorage_methods
+    TestFileStorage_journal
+    TestFileStorage_dirty_tracking
+    TestFileStorage_sharded
+    TestFileStorage_lazy
+    TestFileStorage_streaming
+    TestFileStorage_binary
+    TestFileStorage_durability
+    TestFileStorage_write_behind
+    TestFileStorage_flush_policy
+    TestFileStorage_partitions
+    TestFileStorage_indexes
+    TestFileStorage_query
+    TestFileStorage_spatial
+    TestFileStorage_search
+    TestFileStorage_unique
+    TestFileStorage_cascade
+    TestFileStorage_transaction
+    TestFileStorage_bulk
 """
 import os
+import sys
+import glob
 import pep8
 import json
+import stat
 import models
 import unittest
+import threading
+import time
+import subprocess
+from unittest.mock import patch
 from datetime import datetime
 from models.base_model import BaseModel
+from io import StringIO
 from models.engine.file_storage import FileStorage
+from models.engine.serializers import _iter_json_items
+from models.engine.indexes import TextIndex
 from models.user import User
 from models.state import State
 from models.place import Place
@@ -74,8 +102,9 @@ class TestFileStorage_methods(unittest.TestCase):
         self.assertEqual(dict, type(models.storage.all()))
 
     def test_all_with_arg(self):
+        self.assertIs(models.storage.all(), models.storage.all(None))
         with self.assertRaises(TypeError):
-            models.storage.all(None)
+            models.storage.all(None, None)
 
     def test_new(self):
         bm = BaseModel()
@@ -189,5 +218,1422 @@ class TestFileStorage_methods(unittest.TestCase):
             models.storage.reload(None)
 
 
+class TestFileStorage_journal(unittest.TestCase):
+    """Unittests for testing the journal mode of the FileStorage class."""
+
+    path = "test_journal.json"
+
+    def setUp(self):
+        env = {"HBNB_FILE_PATH": self.path, "HBNB_STORAGE_JOURNAL": "1"}
+        with patch.dict(os.environ, env):
+            self.storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        for path in (self.path, self.path + ".journal"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_save_appends_changes_only(self):
+        bm = BaseModel()
+        self.storage.save()
+        us = User()
+        self.storage.save()
+        self.assertFalse(os.path.exists(self.path))
+        with open(self.path + ".journal", "r") as f:
+            lines = f.readlines()
+        self.assertEqual(2, len(lines))
+        self.assertIn("BaseModel." + bm.id, lines[0])
+        self.assertNotIn("BaseModel." + bm.id, lines[1])
+        self.assertIn("User." + us.id, lines[1])
+
+    def test_reload_replays_journal(self):
+        bm = BaseModel()
+        us = User()
+        self.storage.save()
+        us.first_name = "Betty"
+        self.storage.touch(us)
+        self.storage.delete(bm)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        objs = self.storage.all()
+        self.assertNotIn("BaseModel." + bm.id, objs)
+        self.assertEqual("Betty", objs["User." + us.id].first_name)
+
+    def test_reload_ignores_torn_record(self):
+        bm = BaseModel()
+        self.storage.save()
+        with open(self.path + ".journal", "a") as f:
+            f.write('{"put": {"User.1": {')
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(["BaseModel." + bm.id], list(self.storage.all()))
+
+    def test_journal_compaction(self):
+        FileStorage._FileStorage__journal_min = 2
+        bm = BaseModel()
+        try:
+            for _ in range(3):
+                self.storage.touch(bm)
+                self.storage.save()
+        finally:
+            FileStorage._FileStorage__journal_min = 1024
+        self.assertTrue(os.path.exists(self.path))
+        self.assertFalse(os.path.exists(self.path + ".journal"))
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertIn("BaseModel." + bm.id, self.storage.all())
+
+
+class TestFileStorage_dirty_tracking(unittest.TestCase):
+    """Unittests for testing that saves only re-encode changed objects."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def count_encoded(self, save=models.storage.save):
+        encoded = []
+        to_dict = BaseModel.to_dict
+
+        def counting_to_dict(obj):
+            encoded.append(obj.id)
+            return to_dict(obj)
+
+        with patch.object(BaseModel, "to_dict", counting_to_dict):
+            save()
+        return encoded
+
+    def test_clean_objects_are_not_encoded(self):
+        bm = BaseModel()
+        us = User()
+        self.assertEqual(2, len(self.count_encoded()))
+        self.assertEqual([], self.count_encoded())
+        us.first_name = "Betty"
+        self.assertEqual([us.id], self.count_encoded())
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual("Betty", saved["User." + us.id]["first_name"])
+        self.assertIn("BaseModel." + bm.id, saved)
+
+    def test_save_method_marks_object_dirty(self):
+        bm = BaseModel()
+        self.count_encoded()
+        self.assertEqual([bm.id], self.count_encoded(bm.save))
+
+    def test_deleted_objects_are_not_saved(self):
+        bm = BaseModel()
+        models.storage.save()
+        models.storage.delete(bm)
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertNotIn(bm.id, f.read())
+
+
+class TestFileStorage_sharded(unittest.TestCase):
+    """Unittests for testing the per-class sharded layout."""
+
+    path = "test_sharded.json"
+
+    def setUp(self):
+        env = {"HBNB_FILE_PATH": self.path, "HBNB_STORAGE_LAYOUT": "sharded"}
+        with patch.dict(os.environ, env):
+            self.storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        for name in ("BaseModel", "User", "Place", "Review"):
+            try:
+                os.remove("test_sharded.{}.json".format(name))
+            except FileNotFoundError:
+                pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_one_file_per_class(self):
+        us = User()
+        pl = Place()
+        self.storage.save()
+        self.assertFalse(os.path.exists(self.path))
+        with open("test_sharded.User.json", "r") as f:
+            self.assertEqual(["User." + us.id], list(json.load(f)))
+        with open("test_sharded.Place.json", "r") as f:
+            self.assertEqual(["Place." + pl.id], list(json.load(f)))
+
+    def test_save_rewrites_changed_shards_only(self):
+        User()
+        Place()
+        self.storage.save()
+        os.remove("test_sharded.User.json")
+        Place().name = "house"
+        self.storage.save()
+        self.assertFalse(os.path.exists("test_sharded.User.json"))
+        with open("test_sharded.Place.json", "r") as f:
+            self.assertEqual(2, len(json.load(f)))
+
+    def test_empty_shard_is_removed(self):
+        rv = Review()
+        self.storage.save()
+        self.storage.delete(rv)
+        self.storage.save()
+        self.assertFalse(os.path.exists("test_sharded.Review.json"))
+
+    def test_reload_parallel(self):
+        keys = set()
+        for cls in (BaseModel, User, Place, Review):
+            for _ in range(5):
+                obj = cls()
+                keys.add("{}.{}".format(cls.__name__, obj.id))
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        with patch.object(FileStorage, "_FileStorage__parallel_min", 0):
+            self.storage.reload()
+        self.assertEqual(keys, set(self.storage.all()))
+        self.assertIsInstance(self.storage.all()[keys.pop()], BaseModel)
+
+
+class TestFileStorage_lazy(unittest.TestCase):
+    """Unittests for testing the lazy reload of the FileStorage class."""
+
+    path = "test_lazy.json"
+
+    def setUp(self):
+        env = {"HBNB_FILE_PATH": self.path, "HBNB_STORAGE_LAZY": "1"}
+        with patch.dict(os.environ, env):
+            self.storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        self.us = User()
+        self.us.first_name = "Betty"
+        self.pl = Place()
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+
+    def tearDown(self):
+        self.storage = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__lazy = {}
+
+    def test_reload_builds_no_object(self):
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+        self.assertEqual(2, len(FileStorage._FileStorage__lazy))
+
+    def test_get_builds_one_object(self):
+        us = self.storage.get(User, self.us.id)
+        self.assertEqual("Betty", us.first_name)
+        self.assertEqual(us.created_at, self.us.created_at)
+        self.assertIs(us, self.storage.get("User", self.us.id))
+        objs = FileStorage._FileStorage__objects
+        self.assertEqual(["User." + us.id], list(objs))
+
+    def test_all_builds_every_object(self):
+        objs = self.storage.all()
+        keys = {"User." + self.us.id, "Place." + self.pl.id}
+        self.assertEqual(keys, set(objs))
+        self.assertEqual({}, FileStorage._FileStorage__lazy)
+
+    def test_save_keeps_objects_not_built(self):
+        us = self.storage.get(User, self.us.id)
+        us.last_name = "Holberton"
+        self.storage.save()
+        self.assertIn("Place." + self.pl.id, FileStorage._FileStorage__lazy)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual("Holberton", self.storage.get(User, us.id).last_name)
+        self.assertEqual(self.pl.id, self.storage.get(Place, self.pl.id).id)
+
+    def test_not_one_object_per_line_file(self):
+        with open(self.path, "w") as f:
+            json.dump({"User." + self.us.id: self.us.to_dict()}, f)
+        self.storage.reload()
+        self.assertEqual(["User." + self.us.id], list(self.storage.all()))
+        self.assertEqual({}, FileStorage._FileStorage__lazy)
+
+
+class TestFileStorage_streaming(unittest.TestCase):
+    """Unittests for testing the incremental json parser of reload."""
+
+    def test_items_across_chunks(self):
+        data = {
+            "User.1": {"id": "1", "name": "a \"quoted\" }, name"},
+            "Place.2": {"id": "2", "max_guest": 123456, "ids": [1, 2]},
+            "Place.3": {"latitude": -12.5e3, "empty": {}},
+        }
+        for text in (json.dumps(data), json.dumps(data, indent=4)):
+            for chunk_size in (1, 3, 7, 1024):
+                items = _iter_json_items(StringIO(text), chunk_size)
+                self.assertEqual(list(data.items()), list(items))
+
+    def test_empty_object(self):
+        self.assertEqual([], list(_iter_json_items(StringIO(" {} "))))
+
+    def test_items_are_yielded_before_the_end(self):
+        text = json.dumps({str(i): {"id": str(i)} for i in range(1000)})
+        file = StringIO(text)
+        items = _iter_json_items(file, 64)
+        self.assertEqual(("0", {"id": "0"}), next(items))
+        self.assertLess(file.tell(), 200)
+
+    def test_invalid_json(self):
+        invalid = ("", "[]", "{1: 2}", '{"a": 1', '{"a" 1}', '{"a": 1,}')
+        for text in invalid + ('{"a": }',):
+            with self.assertRaises(ValueError):
+                list(_iter_json_items(StringIO(text), 2))
+
+    def test_reload_streams_file(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        try:
+            FileStorage._FileStorage__objects = {}
+            us = User()
+            us.first_name = "Betty"
+            models.storage.save()
+            FileStorage._FileStorage__objects = {}
+            with patch("json.load", side_effect=AssertionError):
+                models.storage.reload()
+            loaded = models.storage.all()["User." + us.id]
+            self.assertEqual("Betty", loaded.first_name)
+        finally:
+            os.remove("file.json")
+            try:
+                os.rename("tmp", "file.json")
+            except IOError:
+                pass
+            FileStorage._FileStorage__objects = {}
+
+
+class TestFileStorage_binary(unittest.TestCase):
+    """Unittests for testing the binary format of the FileStorage class."""
+
+    path = "test_binary.json"
+
+    def setUp(self):
+        env = {"HBNB_FILE_PATH": self.path, "HBNB_STORAGE_FORMAT": "binary"}
+        with patch.dict(os.environ, env):
+            self.storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_save_and_reload(self):
+        pl = Place()
+        pl.name = "house"
+        pl.max_guest = 3
+        self.storage.save()
+        with open(self.path, "rb") as f:
+            self.assertTrue(f.read().startswith(b"HBNB"))
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        loaded = self.storage.get(Place, pl.id)
+        self.assertEqual(pl.to_dict(), loaded.to_dict())
+
+    def test_format_is_detected_on_reload(self):
+        us = User()
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        with patch.dict(os.environ, {"HBNB_FILE_PATH": self.path}):
+            json_storage = FileStorage()
+        json_storage.reload()
+        loaded = json_storage.get(User, us.id)
+        self.assertEqual(us.created_at, loaded.created_at)
+        json_storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertIn("User." + us.id, self.storage.all())
+
+
+class TestFileStorage_durability(unittest.TestCase):
+    """Unittests for testing atomic saves and group commit."""
+
+    path = "test_durability.json"
+
+    def setUp(self):
+        env = {"HBNB_FILE_PATH": self.path, "HBNB_GROUP_COMMIT_MS": "50"}
+        with patch.dict(os.environ, env):
+            self.storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_failed_save_keeps_old_file(self):
+        bm = BaseModel()
+        self.storage.save()
+        with open(self.path, "r") as f:
+            saved = f.read()
+        us = User()
+        with patch("os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.storage.save()
+        with open(self.path, "r") as f:
+            self.assertEqual(saved, f.read())
+        leftovers = [n for n in os.listdir(".") if n.endswith(".tmp")]
+        self.assertEqual([], leftovers)
+        self.storage.save()
+        with open(self.path, "r") as f:
+            text = f.read()
+        self.assertIn("User." + us.id, text)
+        self.assertIn("BaseModel." + bm.id, text)
+
+    def test_save_keeps_file_mode(self):
+        umask = os.umask(0o022)
+        try:
+            BaseModel()
+            self.storage.save()
+            self.assertEqual(0o644, stat.S_IMODE(os.stat(self.path).st_mode))
+            os.chmod(self.path, 0o640)
+            BaseModel()
+            self.storage.save()
+            self.assertEqual(0o640, stat.S_IMODE(os.stat(self.path).st_mode))
+        finally:
+            os.umask(umask)
+
+    def test_concurrent_saves_are_grouped(self):
+        writes = []
+        replace = FileStorage._FileStorage__replace
+
+        def counting_replace(storage, *args):
+            writes.append(args[0])
+            return replace(storage, *args)
+
+        objs = [BaseModel() for _ in range(8)]
+        with patch.object(
+            FileStorage, "_FileStorage__replace", counting_replace
+        ):
+            threads = [
+                threading.Thread(target=self.storage.save) for _ in objs
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertLess(len(writes), len(objs))
+        with open(self.path, "r") as f:
+            self.assertEqual(len(objs), len(json.load(f)))
+
+
+class TestFileStorage_write_behind(unittest.TestCase):
+    """Unittests for testing the background writer of FileStorage."""
+
+    path = "test_write_behind.json"
+
+    def setUp(self):
+        env = {"HBNB_FILE_PATH": self.path, "HBNB_WRITE_BEHIND": "1"}
+        with patch.dict(os.environ, env):
+            self.storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        self.storage.flush()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_save_returns_before_the_write(self):
+        writing = threading.Event()
+        release = threading.Event()
+        replace = FileStorage._FileStorage__replace
+
+        def blocked_replace(storage, *args):
+            writing.set()
+            release.wait(5)
+            return replace(storage, *args)
+
+        bm = BaseModel()
+        with patch.object(
+            FileStorage, "_FileStorage__replace", blocked_replace
+        ):
+            self.storage.save()
+            self.assertTrue(writing.wait(5))
+            self.assertFalse(os.path.exists(self.path))
+            release.set()
+            self.storage.flush()
+        with open(self.path, "r") as f:
+            self.assertIn("BaseModel." + bm.id, f.read())
+
+    def test_flush_writes_every_queued_save(self):
+        objs = []
+        for _ in range(20):
+            objs.append(User())
+            self.storage.save()
+        self.storage.flush()
+        with open(self.path, "r") as f:
+            self.assertEqual(len(objs), len(json.load(f)))
+
+    def test_flush_without_save_writes_nothing(self):
+        BaseModel()
+        self.storage.flush()
+        self.assertFalse(os.path.exists(self.path))
+
+
+class TestFileStorage_flush_policy(unittest.TestCase):
+    """Unittests for testing the flush policies of FileStorage."""
+
+    path = "test_flush_policy.json"
+
+    def make_storage(self, policy):
+        env = {"HBNB_FILE_PATH": self.path, "HBNB_FLUSH_POLICY": policy}
+        with patch.dict(os.environ, env):
+            return FileStorage()
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def stored_count(self):
+        with open(self.path, "r") as f:
+            return len(json.load(f))
+
+    def test_default_policy_is_immediate(self):
+        with patch.dict(os.environ, {"HBNB_FILE_PATH": self.path}):
+            storage = FileStorage()
+        self.assertEqual("immediate", storage.get_flush_policy())
+        BaseModel()
+        storage.save()
+        self.assertEqual(1, self.stored_count())
+
+    def test_ops_policy(self):
+        storage = self.make_storage("ops:3")
+        for _ in range(2):
+            BaseModel()
+            storage.save()
+        self.assertFalse(os.path.exists(self.path))
+        BaseModel()
+        storage.save()
+        self.assertEqual(3, self.stored_count())
+        BaseModel()
+        storage.save()
+        self.assertEqual(3, self.stored_count())
+        storage.flush()
+        self.assertEqual(4, self.stored_count())
+
+    def test_interval_policy(self):
+        storage = self.make_storage("interval:50")
+        BaseModel()
+        storage.save()
+        storage.save()
+        self.assertFalse(os.path.exists(self.path))
+        deadline = time.monotonic() + 5
+        while not os.path.exists(self.path):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        self.assertEqual(1, self.stored_count())
+
+    def test_exit_policy(self):
+        storage = self.make_storage("exit")
+        for _ in range(5):
+            BaseModel()
+            storage.save()
+        self.assertFalse(os.path.exists(self.path))
+        storage.flush()
+        self.assertEqual(5, self.stored_count())
+
+    def test_set_flush_policy(self):
+        storage = self.make_storage("exit")
+        storage.set_flush_policy("immediate")
+        self.assertEqual("immediate", storage.get_flush_policy())
+        BaseModel()
+        storage.save()
+        self.assertEqual(1, self.stored_count())
+
+    def test_invalid_policies(self):
+        storage = self.make_storage("immediate")
+        for policy in ("never", "ops", "ops:0", "ops:x", "interval:-1",
+                       "exit:1", ""):
+            with self.assertRaises(ValueError):
+                storage.set_flush_policy(policy)
+        self.assertEqual("immediate", storage.get_flush_policy())
+        with self.assertRaises(ValueError):
+            self.make_storage("ops:")
+
+
+class TestFileStorage_partitions(unittest.TestCase):
+    """Unittests for testing all(cls) and count(cls) of FileStorage."""
+
+    path = "test_partitions.json"
+
+    def setUp(self):
+        with patch.dict(os.environ, {"HBNB_FILE_PATH": self.path}):
+            self.storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        self.states = [State() for _ in range(3)]
+        self.us = User()
+
+    def tearDown(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__lazy = {}
+
+    def test_all_of_a_class(self):
+        keys = {"State." + st.id for st in self.states}
+        self.assertEqual(keys, set(self.storage.all(State)))
+        self.assertEqual(keys, set(self.storage.all("State")))
+        self.assertEqual({}, self.storage.all(City))
+        self.assertEqual({}, self.storage.all("MyModel"))
+
+    def test_all_of_a_class_is_a_copy(self):
+        self.storage.all(State).clear()
+        self.assertEqual(3, self.storage.count(State))
+
+    def test_count(self):
+        self.assertEqual(3, self.storage.count(State))
+        self.assertEqual(1, self.storage.count("User"))
+        self.assertEqual(0, self.storage.count(Review))
+        self.assertEqual(4, self.storage.count())
+
+    def test_new_and_delete(self):
+        st = State()
+        self.assertEqual(4, self.storage.count(State))
+        self.assertIn("State." + st.id, self.storage.all(State))
+        self.storage.delete(st)
+        self.storage.delete(self.states[0])
+        self.assertEqual(2, self.storage.count(State))
+        self.assertNotIn("State." + st.id, self.storage.all(State))
+
+    def test_objects_replaced(self):
+        self.assertEqual(3, self.storage.count(State))
+        FileStorage._FileStorage__objects = {}
+        self.assertEqual(0, self.storage.count(State))
+        State()
+        self.assertEqual(1, self.storage.count(State))
+
+    def test_reload(self):
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(3, self.storage.count(State))
+        self.assertEqual(1, len(self.storage.all(User)))
+
+    def test_lazy_reload(self):
+        self.storage.save()
+        env = {"HBNB_FILE_PATH": self.path, "HBNB_STORAGE_LAZY": "1"}
+        with patch.dict(os.environ, env):
+            storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        self.assertEqual(3, storage.count(State))
+        self.assertEqual(0, len(FileStorage._FileStorage__objects))
+        users = storage.all(User)
+        self.assertEqual(["User." + self.us.id], list(users))
+        self.assertIsInstance(users["User." + self.us.id], User)
+        self.assertEqual(1, len(FileStorage._FileStorage__objects))
+        self.assertEqual(4, storage.count())
+
+
+class TestFileStorage_indexes(unittest.TestCase):
+    """Unittests for testing the secondary indexes of FileStorage."""
+
+    path = "test_indexes.json"
+
+    def setUp(self):
+        with patch.dict(os.environ, {"HBNB_FILE_PATH": self.path}):
+            self.storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        self.cy = City()
+        self.places = [Place() for _ in range(3)]
+        for pl in self.places[:2]:
+            pl.city_id = self.cy.id
+
+    def tearDown(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__lazy = {}
+
+    def keys(self, objs):
+        return {"{}.{}".format(type(o).__name__, o.id) for o in objs}
+
+    def test_lookup(self):
+        found = self.storage.lookup(Place, "city_id", self.cy.id)
+        self.assertEqual(self.keys(self.places[:2]), set(found))
+        self.assertEqual({}, self.storage.lookup("Place", "city_id", "none"))
+        self.assertIn("city_id", FileStorage._FileStorage__indexes["Place"])
+
+    def test_lookup_without_index(self):
+        self.places[2].name = "house"
+        found = self.storage.lookup(Place, "name", "house")
+        self.assertEqual(self.keys(self.places[2:]), set(found))
+
+    def test_index_follows_new_update_and_delete(self):
+        self.storage.lookup(Place, "city_id", self.cy.id)
+        pl = Place()
+        pl.city_id = self.cy.id
+        self.places[0].city_id = "other"
+        self.storage.delete(self.places[1])
+        found = self.storage.lookup(Place, "city_id", self.cy.id)
+        self.assertEqual(self.keys([pl]), set(found))
+        found = self.storage.lookup(Place, "city_id", "other")
+        self.assertEqual(self.keys(self.places[:1]), set(found))
+
+    def test_indexes_dropped_with_objects(self):
+        self.storage.lookup(Place, "city_id", self.cy.id)
+        FileStorage._FileStorage__objects = {}
+        self.assertEqual({}, self.storage.lookup(Place, "city_id", self.cy.id))
+
+    def test_lookup_after_lazy_reload(self):
+        self.storage.save()
+        env = {"HBNB_FILE_PATH": self.path, "HBNB_STORAGE_LAZY": "1"}
+        with patch.dict(os.environ, env):
+            storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        found = storage.lookup(Place, "city_id", self.cy.id)
+        self.assertEqual(self.keys(self.places[:2]), set(found))
+
+
+class TestFileStorage_query(unittest.TestCase):
+    """Unittests for testing query() and explain() of FileStorage."""
+
+    path = "test_query.json"
+
+    def setUp(self):
+        with patch.dict(os.environ, {"HBNB_FILE_PATH": self.path}):
+            self.storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        self.places = []
+        for price in range(10):
+            pl = Place()
+            pl.city_id = "c{}".format(price % 3)
+            pl.price_by_night = price * 10
+            self.places.append(pl)
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+
+    def test_query_through_index(self):
+        found = self.storage.query(
+            Place, city_id="c1", order_by="-price_by_night"
+        )
+        self.assertEqual(
+            [70, 40, 10], [pl.price_by_night for pl in found]
+        )
+        plan = self.storage.explain(Place, city_id="c1")
+        self.assertEqual("index", plan["plan"])
+        self.assertEqual("Place.city_id", plan["index"])
+        self.assertEqual(3, plan["candidates"])
+
+    def test_query_with_scan(self):
+        found = self.storage.query(
+            "Place", description="", limit=2, order_by="price_by_night"
+        )
+        self.assertEqual([0, 10], [pl.price_by_night for pl in found])
+        plan = self.storage.explain(Place, description__gt="a", limit=2)
+        self.assertEqual("scan", plan["plan"])
+        self.assertEqual(10, plan["candidates"])
+        self.assertEqual(2, plan["limit"])
+
+    def test_query_through_sorted_index(self):
+        found = self.storage.query(
+            "Place", price_by_night__between=(20, 50), limit=2,
+            order_by="price_by_night"
+        )
+        self.assertEqual([20, 30], [pl.price_by_night for pl in found])
+        plan = self.storage.explain(Place, price_by_night__gte=70)
+        self.assertEqual("index", plan["plan"])
+        self.assertEqual("sorted", plan["kind"])
+        self.assertEqual(3, plan["candidates"])
+        self.places[0].price_by_night = 75
+        found = self.storage.query(Place, price_by_night__gt=70)
+        self.assertEqual({75, 80, 90}, {pl.price_by_night for pl in found})
+
+    def test_query_picks_the_smallest_index(self):
+        plan = self.storage.explain(
+            Place, city_id="c0", price_by_night__gte=90
+        )
+        self.assertEqual("Place.price_by_night", plan["index"])
+        plan = self.storage.explain(
+            Place, city_id="c0", price_by_night__gte=10
+        )
+        self.assertEqual("Place.city_id", plan["index"])
+
+    def test_query_combines_predicates(self):
+        found = self.storage.query(
+            Place, city_id__in=["c0", "c2"], price_by_night__lt=30
+        )
+        self.assertEqual(
+            {0, 20}, {pl.price_by_night for pl in found}
+        )
+
+    def test_query_follows_updates(self):
+        self.storage.query(Place, city_id="c1")
+        self.places[0].city_id = "c1"
+        found = self.storage.query(Place, city_id="c1")
+        self.assertEqual(4, len(found))
+        self.assertIn(self.places[0], found)
+
+    def test_query_amenities_through_bitmap(self):
+        for pl in self.places[:4]:
+            pl.amenity_ids = ["wifi"]
+        self.places[1].amenity_ids = ["wifi", "pool"]
+        plan = self.storage.explain(Place, amenity_ids__all=["wifi", "pool"])
+        self.assertEqual(("bitmap", 1), (plan["kind"], plan["candidates"]))
+        self.places[2].amenity_ids.append("pool")
+        self.storage.touch(self.places[2])
+        found = self.storage.query(
+            Place, amenity_ids__all=["pool", "wifi"], order_by="price_by_night"
+        )
+        self.assertEqual(self.places[1:3], found)
+
+    def test_query_other_class(self):
+        self.assertEqual([], self.storage.query(City, name="x"))
+
+    def test_invalid_query(self):
+        with self.assertRaises(ValueError):
+            self.storage.query(Place, name__like="x")
+        with self.assertRaises(ValueError):
+            self.storage.explain(Place, name__like="x")
+
+
+class TestFileStorage_spatial(unittest.TestCase):
+    """Unittests for testing the location searches of FileStorage."""
+
+    path = "test_spatial.json"
+
+    def setUp(self):
+        with patch.dict(os.environ, {"HBNB_FILE_PATH": self.path}):
+            self.storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        self.places = []
+        for lat, lon in ((48.85, 2.35), (48.86, 2.34), (51.5, -0.12)):
+            pl = Place()
+            pl.latitude = lat
+            pl.longitude = lon
+            self.places.append(pl)
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+
+    def test_within_radius(self):
+        found = self.storage.within_radius(48.86, 2.35, 5)
+        self.assertEqual([self.places[1], self.places[0]], found)
+        found = self.storage.within_radius(48.86, 2.35, 500, Place)
+        self.assertEqual(self.places[2], found[2])
+
+    def test_within_bbox(self):
+        found = self.storage.within_bbox(48, 2, 49, 3)
+        self.assertEqual(set(self.places[:2]), set(found))
+
+    def test_nearest(self):
+        self.assertEqual(
+            [self.places[2], self.places[1]],
+            self.storage.nearest(51, 0, 2),
+        )
+
+    def test_index_follows_updates(self):
+        self.storage.nearest(0, 0, 1)
+        self.places[2].latitude = 48.85
+        self.places[2].longitude = 2.36
+        pl = Place()
+        pl.latitude = 48.851
+        pl.longitude = 2.351
+        self.storage.delete(self.places[0])
+        found = self.storage.within_radius(48.85, 2.35, 1)
+        self.assertEqual([pl, self.places[2]], found)
+
+    def test_class_without_location(self):
+        with self.assertRaises(ValueError):
+            self.storage.nearest(0, 0, 1, City)
+
+
+class TestFileStorage_search(unittest.TestCase):
+    """Unittests for testing the text search of FileStorage."""
+
+    path = "test_search.json"
+
+    def setUp(self):
+        with patch.dict(os.environ, {"HBNB_FILE_PATH": self.path}):
+            self.storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        self.reviews = []
+        for text in ("Great view", "great great host", "noisy street"):
+            rv = Review()
+            rv.text = text
+            self.reviews.append(rv)
+
+    def tearDown(self):
+        for path in (self.path, self.path + ".fts"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__lazy = {}
+
+    def reopen(self, lazy="0"):
+        env = {"HBNB_FILE_PATH": self.path, "HBNB_STORAGE_LAZY": lazy}
+        with patch.dict(os.environ, env):
+            storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        return storage
+
+    def test_search(self):
+        self.assertEqual(
+            self.reviews[1::-1], self.storage.search(Review, "great")
+        )
+        self.assertEqual(
+            [self.reviews[1]], self.storage.search("Review", "great", 1)
+        )
+        self.reviews[2].text = "great street"
+        self.storage.delete(self.reviews[0])
+        self.assertEqual(
+            [self.reviews[1], self.reviews[2]],
+            self.storage.search(Review, "great"),
+        )
+        with self.assertRaises(ValueError):
+            self.storage.search(User, "great")
+
+    def saved(self):
+        self.storage.save()
+        self.storage.search(Review, "great")
+        self.storage.flush()
+        self.assertTrue(os.path.exists(self.path + ".fts"))
+
+    def test_saved_by_flush_and_loaded(self):
+        self.saved()
+        storage = self.reopen()
+        keys = ["Review." + rv.id for rv in self.reviews]
+        with patch.object(TextIndex, "build", side_effect=AssertionError):
+            found = storage.search(Review, "great")
+        self.assertEqual(keys[1::-1], ["Review." + rv.id for rv in found])
+
+    def test_not_saved_by_background_writes(self):
+        env = {"HBNB_FILE_PATH": self.path, "HBNB_WRITE_BEHIND": "1"}
+        with patch.dict(os.environ, env):
+            storage = FileStorage()
+        storage.search(Review, "great")
+        with patch.object(
+            FileStorage, "_FileStorage__save_text_indexes", autospec=True
+        ) as saver:
+            for rv in self.reviews:
+                rv.text += " again"
+                storage.save()
+            deadline = time.time() + 5
+            while (storage._FileStorage__committed <
+                   storage._FileStorage__requests and time.time() < deadline):
+                time.sleep(0.01)
+            self.assertTrue(os.path.exists(self.path))
+            self.assertEqual(0, saver.call_count)
+            storage.flush()
+            self.assertEqual(1, saver.call_count)
+
+    def test_read_by_the_first_search(self):
+        self.saved()
+        read = FileStorage._FileStorage__read_text_indexes
+        with patch.object(
+            FileStorage, "_FileStorage__read_text_indexes",
+            autospec=True, side_effect=read,
+        ) as reader:
+            storage = self.reopen()
+            self.assertEqual(0, reader.call_count)
+            storage.search(Review, "great")
+            storage.search(Review, "view")
+            self.assertEqual(1, reader.call_count)
+
+    def test_changes_since_the_reload_are_indexed(self):
+        self.saved()
+        storage = self.reopen()
+        rv = storage.get(Review, self.reviews[2].id)
+        rv.text = "great garden"
+        storage.delete(storage.get(Review, self.reviews[0].id))
+        with patch.object(TextIndex, "build", side_effect=AssertionError):
+            found = storage.search(Review, "great")
+        self.assertEqual(
+            {self.reviews[1].id, rv.id}, {obj.id for obj in found}
+        )
+
+    def test_not_used_after_a_save(self):
+        self.saved()
+        storage = self.reopen()
+        rv = Review()
+        rv.text = "great"
+        storage.save()
+        with patch.object(TextIndex, "load", side_effect=AssertionError):
+            self.assertEqual(3, len(storage.search(Review, "great")))
+
+    def test_import_console_with_saved_indexes(self):
+        self.saved()
+        os.remove(self.path)
+        for layout in ("", "sharded"):
+            env = dict(os.environ)
+            env["HBNB_FILE_PATH"] = self.path
+            env["HBNB_STORAGE_LAYOUT"] = layout
+            result = subprocess.run(
+                [sys.executable, "-c", "import console"],
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            self.assertEqual(0, result.returncode, result.stderr)
+
+    def test_loaded_without_building_lazy_objects(self):
+        self.storage.save()
+        self.storage.search(Review, "great")
+        self.storage.flush()
+        storage = self.reopen(lazy="1")
+        found = storage.search(Review, "noisy")
+        self.assertEqual(["Review." + self.reviews[2].id],
+                         list(FileStorage._FileStorage__objects))
+        self.assertEqual(self.reviews[2].id, found[0].id)
+
+    def test_ignored_if_data_changed(self):
+        self.storage.save()
+        self.storage.search(Review, "great")
+        self.storage.flush()
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        del data["Review." + self.reviews[0].id]
+        with open(self.path, "w") as f:
+            json.dump(data, f)
+        storage = self.reopen()
+        self.assertEqual(2, storage.count(Review))
+        self.assertNotIn("Review", FileStorage._FileStorage__indexes)
+        found = storage.search(Review, "great")
+        self.assertEqual([self.reviews[1].id], [rv.id for rv in found])
+
+    def test_saved_again_after_a_save(self):
+        self.saved()
+        rv = Review()
+        rv.text = "great"
+        self.storage.save()
+        self.storage.flush()
+        storage = self.reopen()
+        with patch.object(TextIndex, "build", side_effect=AssertionError):
+            self.assertEqual(3, len(storage.search(Review, "great")))
+
+
 if __name__ == "__main__":
     unittest.main()
+
+
+class TestFileStorage_unique(unittest.TestCase):
+    """Unittests for testing the unique index on User.email."""
+
+    path = "test_unique.json"
+
+    def setUp(self):
+        with patch.dict(os.environ, {"HBNB_FILE_PATH": self.path}):
+            self.storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        self.user = User()
+        self.user.email = "a@hbnb.io"
+
+    def tearDown(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_get_by(self):
+        other = User()
+        other.email = "b@hbnb.io"
+        self.assertIs(self.user, self.storage.get_by(User, email="a@hbnb.io"))
+        self.assertIs(other, self.storage.get_by("User", email="b@hbnb.io"))
+        self.assertIsNone(self.storage.get_by(User, email="c@hbnb.io"))
+        plan = self.storage.explain(User, email="a@hbnb.io")
+        self.assertEqual(("unique", 1), (plan["kind"], plan["candidates"]))
+        with self.assertRaises(ValueError):
+            self.storage.get_by(User)
+
+    def test_update_rejects_a_taken_email(self):
+        other = User()
+        with self.assertRaises(ValueError):
+            other.email = "a@hbnb.io"
+        self.assertEqual("", other.email)
+        self.user.email = "a@hbnb.io"
+        self.user.email = "b@hbnb.io"
+        other.email = "a@hbnb.io"
+        self.assertIs(other, self.storage.get_by(User, email="a@hbnb.io"))
+
+    def test_new_rejects_a_taken_email(self):
+        copy = User(**self.user.to_dict())
+        copy.id = "other"
+        with self.assertRaises(ValueError):
+            self.storage.new(copy)
+        self.assertNotIn("User.other", self.storage.all())
+        self.storage.new(User(**self.user.to_dict()))
+        self.assertEqual(1, self.storage.count(User))
+
+    def test_empty_emails_may_be_shared(self):
+        User()
+        User()
+        self.user.email = ""
+        self.assertEqual(3, self.storage.count(User))
+
+    def test_deleted_email_is_free(self):
+        self.storage.delete(self.user)
+        User().email = "a@hbnb.io"
+
+    def test_loaded_emails_are_checked(self):
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        with self.assertRaises(ValueError):
+            User().email = "a@hbnb.io"
+
+    def test_objects_being_initialized_are_not_checked(self):
+        attributes = self.user.to_dict()
+        with patch.object(
+            FileStorage, "check_unique", side_effect=AssertionError
+        ):
+            User(**attributes)
+
+
+class TestFileStorage_cascade(unittest.TestCase):
+    """Unittests for testing delete_cascade() of FileStorage."""
+
+    path = "test_cascade.json"
+
+    def setUp(self):
+        with patch.dict(os.environ, {"HBNB_FILE_PATH": self.path}):
+            self.storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        self.state = State()
+        self.user = User()
+        self.cities = [City(), City()]
+        self.places = []
+        self.reviews = []
+        for cy in self.cities:
+            cy.state_id = self.state.id
+            pl = Place()
+            pl.city_id = cy.id
+            pl.user_id = self.user.id
+            self.places.append(pl)
+            rv = Review()
+            rv.place_id = pl.id
+            rv.user_id = self.user.id
+            self.reviews.append(rv)
+        self.other = Place()
+        self.storage.save()
+
+    def tearDown(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_dry_run(self):
+        counts = self.storage.delete_cascade(self.state, dry_run=True)
+        self.assertEqual(
+            {"State": 1, "City": 2, "Place": 2, "Review": 2}, counts
+        )
+        self.assertEqual(9, self.storage.count())
+
+    def test_delete_state(self):
+        self.storage.delete_cascade(self.state)
+        self.assertEqual(
+            {"User." + self.user.id, "Place." + self.other.id},
+            set(self.storage.all()),
+        )
+        self.assertEqual([], self.user.places)
+        self.assertEqual([], self.user.reviews)
+
+    def test_delete_user(self):
+        counts = self.storage.delete_cascade(self.user)
+        self.assertEqual({"User": 1, "Place": 2, "Review": 2}, counts)
+        self.assertEqual(4, self.storage.count())
+        self.assertEqual([], self.cities[0].places)
+
+    def test_one_save(self):
+        self.storage.delete_cascade(self.cities[0])
+        with patch.object(
+            FileStorage, "_FileStorage__replace", autospec=True,
+            side_effect=FileStorage._FileStorage__replace
+        ) as replace:
+            self.storage.save()
+        self.assertEqual(1, replace.call_count)
+        with open(self.path) as f:
+            saved = json.load(f)
+        self.assertNotIn("City." + self.cities[0].id, saved)
+        self.assertNotIn("Review." + self.reviews[0].id, saved)
+        self.assertIn("Review." + self.reviews[1].id, saved)
+
+    def test_not_stored(self):
+        self.storage.delete(self.state)
+        with self.assertRaises(KeyError):
+            self.storage.delete_cascade(self.state)
+
+
+class TestFileStorage_transaction(unittest.TestCase):
+    """Unittests for testing the transactions of FileStorage."""
+
+    path = "test_transaction.json"
+
+    def setUp(self):
+        with patch.dict(os.environ, {"HBNB_FILE_PATH": self.path}):
+            self.storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        self.city = City()
+        self.place = Place()
+        self.place.city_id = self.city.id
+        self.user = User()
+        self.user.email = "a@hbnb.io"
+        self.storage.save()
+
+    def tearDown(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__undo = None
+
+    def replace(self):
+        return patch.object(
+            FileStorage, "_FileStorage__replace", autospec=True,
+            side_effect=FileStorage._FileStorage__replace
+        )
+
+    def test_commit_writes_once(self):
+        with self.replace() as replace:
+            with self.storage.transaction():
+                cy = City()
+                cy.save()
+                for _ in range(3):
+                    pl = Place()
+                    pl.city_id = cy.id
+                    pl.save()
+                self.assertEqual(0, replace.call_count)
+        self.assertEqual(1, replace.call_count)
+        with open(self.path) as f:
+            saved = json.load(f)
+        self.assertIn("City." + cy.id, saved)
+        self.assertEqual(7, len(saved))
+
+    def test_sharded_commit_is_one_journal_record(self):
+        path = "test_transaction_sharded.json"
+        env = {"HBNB_FILE_PATH": path, "HBNB_STORAGE_LAYOUT": "sharded"}
+        with patch.dict(os.environ, env):
+            storage = FileStorage()
+        try:
+            storage.save()
+            with self.replace() as replace:
+                with storage.transaction():
+                    cy = City()
+                    pl = Place()
+                    pl.city_id = cy.id
+                    storage.save()
+            # no shard is replaced, a crash can not split the transaction
+            self.assertEqual(0, replace.call_count)
+            with open(path + ".journal") as f:
+                self.assertEqual(1, len(f.readlines()))
+            FileStorage._FileStorage__objects = {}
+            with patch.dict(os.environ, env):
+                storage = FileStorage()
+            storage.reload()
+            self.assertEqual(cy.id, storage.get(Place, pl.id).city_id)
+            # the next save folds the journal into the shards
+            storage.save()
+            self.assertFalse(os.path.exists(path + ".journal"))
+            with open("test_transaction_sharded.Place.json") as f:
+                self.assertIn(pl.id, f.read())
+        finally:
+            for name in glob.glob("test_transaction_sharded.*"):
+                os.remove(name)
+
+    def test_rollback_on_error(self):
+        with open(self.path) as f:
+            before = f.read()
+        with self.assertRaises(RuntimeError):
+            with self.storage.transaction():
+                created = Place()
+                created.city_id = self.city.id
+                self.place.city_id = "other"
+                self.place.name = "moved"
+                self.storage.delete(self.city)
+                self.user.email = "b@hbnb.io"
+                self.storage.save()
+                raise RuntimeError
+        self.assertEqual(
+            {"City." + self.city.id, "Place." + self.place.id,
+             "User." + self.user.id},
+            set(self.storage.all()),
+        )
+        self.assertEqual(self.city.id, self.place.city_id)
+        self.assertNotIn("name", self.place.__dict__)
+        self.assertEqual([self.place], self.city.places)
+        self.assertIs(self.user, self.storage.get_by(User, email="a@hbnb.io"))
+        self.assertIsNone(self.storage.get_by(User, email="b@hbnb.io"))
+        self.assertEqual({}, FileStorage._FileStorage__changes)
+        with open(self.path) as f:
+            self.assertEqual(before, f.read())
+
+    def test_rollback_keeps_the_changes_made_before(self):
+        self.place.name = "house"
+        self.storage.begin()
+        self.place.name = "flat"
+        self.city.name = "Paris"
+        self.storage.rollback()
+        self.assertEqual("house", self.place.name)
+        self.assertEqual(
+            {"Place." + self.place.id: self.place},
+            FileStorage._FileStorage__changes,
+        )
+
+    def test_flush_waits_for_commit(self):
+        self.storage.begin()
+        City().save()
+        self.storage.flush()
+        with open(self.path) as f:
+            self.assertEqual(3, len(json.load(f)))
+        self.storage.commit()
+        with open(self.path) as f:
+            self.assertEqual(4, len(json.load(f)))
+
+    def test_no_transaction_open(self):
+        with self.assertRaises(ValueError):
+            self.storage.commit()
+        with self.assertRaises(ValueError):
+            self.storage.rollback()
+        self.storage.begin()
+        with self.assertRaises(ValueError):
+            self.storage.begin()
+        self.storage.commit()
+
+
+class TestFileStorage_bulk(unittest.TestCase):
+    """Unittests for testing the bulk methods of FileStorage."""
+
+    path = "test_bulk.json"
+
+    def setUp(self):
+        with patch.dict(os.environ, {"HBNB_FILE_PATH": self.path}):
+            self.storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        self.storage.lookup(Review, "place_id", "p1")
+        now = datetime.now()
+        self.reviews = [
+            Review(id="r{}".format(i), created_at=now, updated_at=now,
+                   place_id="p{}".format(i % 2), text="nice")
+            for i in range(10)
+        ]
+
+    def tearDown(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__undo = None
+
+    def replace(self):
+        return patch.object(
+            FileStorage, "_FileStorage__replace", autospec=True,
+            side_effect=FileStorage._FileStorage__replace
+        )
+
+    def test_bulk_new(self):
+        with self.replace() as replace:
+            self.assertEqual(10, self.storage.bulk_new(self.reviews))
+        self.assertEqual(1, replace.call_count)
+        self.assertEqual(5, len(self.storage.lookup(Review, "place_id", "p1")))
+        with open(self.path) as f:
+            self.assertEqual(10, len(json.load(f)))
+
+    def test_bulk_update(self):
+        self.storage.bulk_new(self.reviews)
+        with self.replace() as replace:
+            count = self.storage.bulk_update(
+                Review, ["r0", "r2", "r4"], place_id="p1", text="great"
+            )
+        self.assertEqual((3, 1), (count, replace.call_count))
+        self.assertEqual(8, len(self.storage.lookup(Review, "place_id", "p1")))
+        self.assertEqual("great", self.reviews[0].text)
+        self.assertGreater(
+            self.reviews[0].updated_at, self.reviews[1].updated_at
+        )
+        self.assertEqual(3, len(self.storage.search(Review, "great")))
+        with self.assertRaises(KeyError):
+            self.storage.bulk_update(Review, ["r1", "nope"], text="x")
+        self.assertEqual("nice", self.reviews[1].text)
+
+    def test_bulk_delete(self):
+        self.storage.bulk_new(self.reviews)
+        with self.assertRaises(KeyError):
+            self.storage.bulk_delete("Review", ["r1", "nope"])
+        self.assertEqual(10, self.storage.count(Review))
+        with self.replace() as replace:
+            self.assertEqual(
+                2, self.storage.bulk_delete("Review", ["r1", "r3"])
+            )
+        self.assertEqual(1, replace.call_count)
+        self.assertEqual(3, len(self.storage.lookup(Review, "place_id", "p1")))
+        self.assertEqual(8, self.storage.count(Review))
+
+    def test_bulk_unique(self):
+        now = datetime.now()
+        users = [
+            User(id=str(i), created_at=now, updated_at=now, email=email)
+            for i, email in enumerate(["a@hbnb.io", "", "", "a@hbnb.io"])
+        ]
+        with self.assertRaises(ValueError):
+            self.storage.bulk_new(users)
+        self.assertEqual(0, self.storage.count(User))
+        self.storage.bulk_new(users[:3])
+        with self.assertRaises(ValueError):
+            self.storage.bulk_new(users[3:])
+        with self.assertRaises(ValueError):
+            self.storage.bulk_update(User, ["1", "2"], email="b@hbnb.io")
+        self.storage.bulk_update(User, ["1"], email="b@hbnb.io")
+        self.storage.bulk_update(User, ["1", "2"], email="")
+        self.assertEqual(3, self.storage.count(User))
+
+    def test_bulk_in_transaction(self):
+        self.storage.bulk_new(self.reviews[:5])
+        with self.assertRaises(RuntimeError):
+            with self.storage.transaction():
+                self.storage.bulk_new(self.reviews[5:])
+                self.storage.bulk_update(Review, ["r0"], place_id="p9")
+                self.storage.bulk_delete(Review, ["r1"])
+                raise RuntimeError
+        self.assertEqual(5, self.storage.count(Review))
+        self.assertEqual("p0", self.reviews[0].place_id)
+        self.assertEqual(3, len(self.storage.lookup(Review, "place_id", "p0")))
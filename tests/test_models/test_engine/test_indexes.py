@@ -0,0 +1,440 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/indexes.py.
+Unittest classes:
+    TestHashIndex
+    TestUniqueIndex
+    TestSortedIndex
+    TestGridIndex
+    TestTextIndex
+    TestBitmapIndex
+    TestDependents
+"""
+import pep8
+import random
+import unittest
+from models.place import Place
+from models.engine.indexes import HashIndex, SortedIndex, GridIndex
+from models.engine.indexes import TextIndex, BitmapIndex, UniqueIndex
+from models.engine.indexes import declared_indexes, distance_km
+from models.engine.indexes import dependents, unique_attrs
+from models.user import User
+from models.state import State
+from models.city import City
+from models.review import Review
+
+
+class TestHashIndex(unittest.TestCase):
+    """Unittests for testing the HashIndex class."""
+
+    def setUp(self):
+        self.index = HashIndex("city_id")
+        self.pl = Place()
+        self.pl.city_id = "c1"
+        self.key = "Place." + self.pl.id
+
+    def test_style_check(self):
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(["models/engine/indexes.py"])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_add_and_lookup(self):
+        self.index.add(self.key, self.pl)
+        self.assertEqual({self.key: self.pl}, self.index.lookup("c1"))
+        self.assertEqual({}, self.index.lookup("c2"))
+        self.assertEqual(1, len(self.index))
+
+    def test_add_again_moves_the_object(self):
+        self.index.add(self.key, self.pl)
+        self.pl.city_id = "c2"
+        self.index.add(self.key, self.pl)
+        self.assertEqual({}, self.index.lookup("c1"))
+        self.assertEqual({self.key: self.pl}, self.index.lookup("c2"))
+        self.assertEqual(1, len(self.index))
+
+    def test_remove(self):
+        self.index.add(self.key, self.pl)
+        self.index.remove(self.key)
+        self.index.remove(self.key)
+        self.assertEqual({}, self.index.lookup("c1"))
+        self.assertEqual(0, len(self.index))
+
+    def test_unhashable_values(self):
+        index = HashIndex("amenity_ids")
+        self.pl.amenity_ids = ["a1"]
+        index.add(self.key, self.pl)
+        self.assertEqual(0, len(index))
+        self.assertEqual({}, index.lookup(["a1"]))
+
+    def test_lookup_returns_a_copy(self):
+        self.index.add(self.key, self.pl)
+        self.index.lookup("c1").clear()
+        self.assertEqual(1, len(self.index.lookup("c1")))
+
+    def test_declared_indexes(self):
+        indexes = declared_indexes("Place")
+        self.assertEqual("hash", indexes["city_id"].kind)
+        self.assertEqual("hash", indexes["user_id"].kind)
+        self.assertEqual("sorted", indexes["price_by_night"].kind)
+        self.assertEqual("sorted", indexes["max_guest"].kind)
+        self.assertEqual("sorted", indexes["number_rooms"].kind)
+        self.assertEqual({"state_id"}, set(declared_indexes("City")))
+        self.assertEqual({}, declared_indexes("BaseModel"))
+        self.assertIsNot(
+            declared_indexes("City")["state_id"],
+            declared_indexes("City")["state_id"],
+        )
+
+
+class TestUniqueIndex(unittest.TestCase):
+    """Unittests for testing the UniqueIndex class."""
+
+    def setUp(self):
+        self.index = UniqueIndex("email")
+        self.users = {}
+        for email in ("a@hbnb.io", "b@hbnb.io", "", ""):
+            us = User()
+            us.__dict__["email"] = email
+            self.users["User." + us.id] = us
+        self.index.build(self.users)
+        self.keys = list(self.users)
+
+    def test_conflict(self):
+        self.assertEqual(self.keys[0], self.index.conflict("x", "a@hbnb.io"))
+        self.assertIsNone(self.index.conflict(self.keys[0], "a@hbnb.io"))
+        self.assertIsNone(self.index.conflict("x", "c@hbnb.io"))
+
+    def test_empty_values_may_be_shared(self):
+        self.assertIsNone(self.index.conflict("x", ""))
+        self.assertIsNone(self.index.conflict("x", None))
+        self.assertEqual(2, len(self.index.lookup("")))
+
+    def test_conflict_follows_updates(self):
+        us = self.users[self.keys[0]]
+        us.__dict__["email"] = "c@hbnb.io"
+        self.index.add(self.keys[0], us)
+        self.assertIsNone(self.index.conflict("x", "a@hbnb.io"))
+        self.assertEqual(self.keys[0], self.index.conflict("x", "c@hbnb.io"))
+        self.index.remove(self.keys[0])
+        self.assertIsNone(self.index.conflict("x", "c@hbnb.io"))
+
+    def test_declared_unique_attributes(self):
+        self.assertEqual(("email",), unique_attrs("User"))
+        self.assertEqual("unique", declared_indexes("User")["email"].kind)
+        self.assertEqual((), unique_attrs("Place"))
+        self.assertEqual((), unique_attrs("BaseModel"))
+
+
+class TestSortedIndex(unittest.TestCase):
+    """Unittests for testing the SortedIndex class."""
+
+    def setUp(self):
+        self.index = SortedIndex("price_by_night")
+        self.places = {}
+        for price in (50, 10, 30, 30, 20.5):
+            pl = Place()
+            pl.price_by_night = price
+            self.places["Place." + pl.id] = pl
+            self.index.add("Place." + pl.id, pl)
+
+    def prices(self, found):
+        return [pl.price_by_night for pl in found.values()]
+
+    def test_ranges(self):
+        self.assertEqual([10, 20.5], self.prices(self.index.search("lt", 30)))
+        self.assertEqual(
+            [10, 20.5, 30, 30], self.prices(self.index.search("lte", 30))
+        )
+        self.assertEqual([50], self.prices(self.index.search("gt", 30)))
+        self.assertEqual(
+            [30, 30, 50], self.prices(self.index.search("gte", 30))
+        )
+        self.assertEqual(
+            [20.5, 30, 30], self.prices(self.index.search("between", (20, 30)))
+        )
+        self.assertEqual([], self.prices(self.index.search("between", (9, 1))))
+        self.assertEqual([30, 30], self.prices(self.index.search("eq", 30)))
+        self.assertEqual(
+            [10, 50], sorted(self.prices(self.index.search("in", [50, 10])))
+        )
+
+    def test_estimate(self):
+        self.assertEqual(2, self.index.estimate("eq", 30))
+        self.assertEqual(4, self.index.estimate("gte", 15))
+        self.assertEqual(0, self.index.estimate("between", (40, 20)))
+        self.assertEqual(3, self.index.estimate("in", [10, 30, 30]))
+        self.assertIsNone(self.index.estimate("eq", "30"))
+        self.assertIsNone(self.index.estimate("between", (1, None)))
+        self.assertIsNone(self.index.estimate("gt", float("nan")))
+
+    def test_update_and_remove(self):
+        key, pl = next(iter(self.places.items()))
+        pl.price_by_night = 5
+        self.index.add(key, pl)
+        self.assertEqual([5, 10], self.prices(self.index.search("lt", 15)))
+        self.index.remove(key)
+        self.index.remove(key)
+        self.assertEqual([10], self.prices(self.index.search("lt", 15)))
+        self.assertEqual(4, len(self.index))
+
+    def test_values_that_are_not_numbers(self):
+        key, pl = next(iter(self.places.items()))
+        pl.price_by_night = "cheap"
+        self.index.add(key, pl)
+        self.assertEqual(4, len(self.index))
+        pl.price_by_night = float("nan")
+        self.index.add(key, pl)
+        self.assertEqual(4, len(self.index))
+        pl.price_by_night = 60
+        self.index.add(key, pl)
+        self.assertEqual([60], self.prices(self.index.search("gt", 50)))
+
+
+class TestGridIndex(unittest.TestCase):
+    """Unittests for testing the GridIndex class."""
+
+    def setUp(self):
+        self.index = GridIndex("latitude", "longitude")
+        self.places = {}
+        rand = random.Random(7)
+        for _ in range(300):
+            self.add(rand.uniform(-3, 3), rand.uniform(-3, 3))
+        # around the 180th meridian
+        self.east = self.add(0.5, 179.95)
+        self.west = self.add(0.5, -179.95)
+
+    def add(self, lat, lon):
+        pl = Place()
+        pl.latitude = lat
+        pl.longitude = lon
+        self.places["Place." + pl.id] = pl
+        self.index.add("Place." + pl.id, pl)
+        return pl
+
+    def brute_force(self, lat, lon):
+        return sorted(
+            (distance_km(lat, lon, pl.latitude, pl.longitude), key)
+            for key, pl in self.places.items()
+        )
+
+    def test_distance_km(self):
+        self.assertAlmostEqual(111.19, distance_km(0, 0, 1, 0), delta=0.01)
+        self.assertAlmostEqual(0, distance_km(10, 20, 10, 20))
+        self.assertAlmostEqual(
+            distance_km(0, 179.9, 0, -179.9), distance_km(0, 0, 0, 0.2)
+        )
+
+    def test_within_bbox(self):
+        found = self.index.within_bbox(-1, -1, 1, 2)
+        expected = {
+            key
+            for key, pl in self.places.items()
+            if -1 <= pl.latitude <= 1 and -1 <= pl.longitude <= 2
+        }
+        self.assertEqual(expected, set(found))
+        found = self.index.within_bbox(0, 179, 1, -179)
+        self.assertEqual(
+            {"Place." + self.east.id, "Place." + self.west.id}, set(found)
+        )
+
+    def test_within_radius(self):
+        for lat, lon, km in ((0, 0, 100), (1, -2, 250), (0.5, 180, 20)):
+            found = self.index.within_radius(lat, lon, km)
+            expected = [
+                item for item in self.brute_force(lat, lon) if item[0] <= km
+            ]
+            self.assertEqual(
+                [key for _, key in expected], [key for _, key, _ in found]
+            )
+
+    def test_nearest(self):
+        for lat, lon, k in ((0, 0, 5), (2.9, 2.9, 20), (-60, 100, 3)):
+            found = self.index.nearest(lat, lon, k)
+            expected = self.brute_force(lat, lon)[:k]
+            self.assertEqual(
+                [key for _, key in expected], [key for _, key, _ in found]
+            )
+        self.assertEqual(302, len(self.index.nearest(0, 0, 1000)))
+        self.assertEqual([], self.index.nearest(0, 0, 0))
+
+    def test_move_and_remove(self):
+        key = "Place." + self.east.id
+        self.east.longitude = 0
+        self.east.latitude = 89
+        self.index.add(key, self.east)
+        self.assertEqual([key], list(self.index.within_bbox(88, -1, 90, 1)))
+        self.index.remove(key)
+        self.assertEqual({}, self.index.within_bbox(88, -1, 90, 1))
+        self.assertEqual(301, len(self.index))
+
+    def test_invalid_points(self):
+        pl = Place()
+        pl.latitude = 91.0
+        self.index.add("Place." + pl.id, pl)
+        pl.latitude = "north"
+        self.index.add("Place." + pl.id, pl)
+        self.assertEqual(302, len(self.index))
+        with self.assertRaises(ValueError):
+            self.index.within_radius(100, 0, 10)
+        with self.assertRaises(ValueError):
+            self.index.within_radius(0, 0, -1)
+        with self.assertRaises(ValueError):
+            self.index.nearest(0, 0, -1)
+        with self.assertRaises(ValueError):
+            self.index.within_bbox(0, 0, 0, 200)
+
+
+class TestTextIndex(unittest.TestCase):
+    """Unittests for testing the TextIndex class."""
+
+    def setUp(self):
+        self.index = TextIndex("name", "description")
+        self.keys = []
+        for name, description in (
+            ("Sea house", "A house by the sea, quiet."),
+            ("Loft", "Loud loft downtown"),
+            ("Cabin", "quiet cabin, quiet woods, quiet nights"),
+        ):
+            pl = Place()
+            pl.name = name
+            pl.description = description
+            self.keys.append("Place." + pl.id)
+            self.index.add(self.keys[-1], pl)
+            setattr(self, name.split()[0].lower(), pl)
+
+    def test_tokenize(self):
+        self.assertEqual(
+            ["a", "café", "by", "the", "sea_2"],
+            TextIndex.tokenize("A Café, by the SEA_2!"),
+        )
+
+    def test_search_ranks_with_bm25(self):
+        found = self.index.search("quiet")
+        self.assertEqual([self.keys[2], self.keys[0]], [k for _, k in found])
+        self.assertGreater(found[0][0], found[1][0])
+        found = self.index.search("HOUSE loud")
+        self.assertEqual({self.keys[0], self.keys[1]}, {k for _, k in found})
+        self.assertEqual([], self.index.search("castle"))
+        self.assertEqual(1, len(self.index.search("quiet", 1)))
+
+    def test_update_and_remove(self):
+        self.loft.description = "quiet loft"
+        self.index.add(self.keys[1], self.loft)
+        self.assertEqual([], self.index.search("loud"))
+        self.assertIn(self.keys[1], [k for _, k in self.index.search("quiet")])
+        self.index.remove(self.keys[1])
+        self.index.remove(self.keys[1])
+        self.assertEqual([], self.index.search("loft"))
+        self.assertEqual(2, len(self.index))
+
+    def test_changed(self):
+        self.assertTrue(self.index.changed)
+        self.index.changed = False
+        self.cabin.price_by_night = 10
+        self.index.add(self.keys[2], self.cabin)
+        self.assertFalse(self.index.changed)
+        self.cabin.name = "Hut"
+        self.index.add(self.keys[2], self.cabin)
+        self.assertTrue(self.index.changed)
+
+    def test_dump_and_load(self):
+        index = TextIndex("name", "description")
+        index.load(self.index.dump())
+        self.assertFalse(index.changed)
+        self.assertEqual(self.index.search("quiet sea"), index.search(
+            "quiet sea"
+        ))
+        index.add(self.keys[0], self.sea)
+        self.assertFalse(index.changed)
+
+
+class TestBitmapIndex(unittest.TestCase):
+    """Unittests for testing the BitmapIndex class."""
+
+    def setUp(self):
+        self.index = BitmapIndex("amenity_ids")
+        self.places = {}
+        for amenities in (["wifi", "pool"], ["wifi"], ["pool", "parking"],
+                          ["wifi", "pool", "parking"]):
+            pl = Place()
+            pl.amenity_ids = amenities
+            self.places["Place." + pl.id] = pl
+        self.index.build(self.places)
+        self.keys = list(self.places)
+
+    def test_search_all(self):
+        found = self.index.search("all", ["wifi", "pool"])
+        self.assertEqual({self.keys[0], self.keys[3]}, set(found))
+        self.assertIs(self.places[self.keys[0]], found[self.keys[0]])
+        self.assertEqual(2, self.index.estimate("all", ["wifi", "pool"]))
+        self.assertEqual({}, self.index.search("all", ["wifi", "spa"]))
+        self.assertEqual(0, self.index.estimate("all", ["wifi", "spa"]))
+        self.assertEqual(4, len(self.index.search("all", [])))
+
+    def test_update(self):
+        pl = self.places[self.keys[1]]
+        pl.amenity_ids.append("pool")
+        self.index.add(self.keys[1], pl)
+        self.assertEqual(3, self.index.estimate("all", ["wifi", "pool"]))
+        pl.amenity_ids = []
+        self.index.add(self.keys[1], pl)
+        self.assertEqual(2, self.index.estimate("all", ["wifi"]))
+
+    def test_remove_reuses_the_slot(self):
+        self.index.remove(self.keys[0])
+        self.index.remove(self.keys[0])
+        self.assertEqual(3, len(self.index))
+        self.assertEqual({self.keys[3]}, set(
+            self.index.search("all", ["wifi", "pool"])
+        ))
+        pl = Place()
+        pl.amenity_ids = ["spa"]
+        self.index.add("Place." + pl.id, pl)
+        self.assertEqual(["Place." + pl.id], list(
+            self.index.search("all", ["spa"])
+        ))
+        self.assertEqual(4, len(self.index.search("all", [])))
+
+    def test_values_that_are_not_lists(self):
+        pl = Place()
+        pl.amenity_ids = "wifi"
+        self.index.add("Place." + pl.id, pl)
+        self.assertEqual(3, self.index.estimate("all", ["wifi"]))
+        self.assertEqual(5, self.index.estimate("all", []))
+
+
+class TestDependents(unittest.TestCase):
+    """Unittests for testing the dependents() function."""
+
+    def setUp(self):
+        self.index = {}
+
+    def link(self, child, attr, parent):
+        setattr(child, attr, parent.id)
+        key = (child.__class__.__name__, attr, parent.id)
+        self.index.setdefault(key, {})["{}.{}".format(
+            child.__class__.__name__, child.id
+        )] = child
+
+    def lookup(self, cls_name, attr, value):
+        return self.index.get((cls_name, attr, value), {})
+
+    def test_walks_the_cascades(self):
+        st, cy, pl, rv = State(), City(), Place(), Review()
+        self.link(cy, "state_id", st)
+        self.link(pl, "city_id", cy)
+        self.link(rv, "place_id", pl)
+        found = dependents(st, self.lookup)
+        self.assertEqual([st, cy, pl, rv], list(found.values()))
+        self.assertEqual("State." + st.id, list(found)[0])
+        self.assertEqual([rv], list(dependents(rv, self.lookup).values()))
+
+    def test_objects_found_once(self):
+        us, pl, rv = User(), Place(), Review()
+        self.link(pl, "user_id", us)
+        self.link(rv, "user_id", us)
+        self.link(rv, "place_id", pl)
+        self.assertEqual(3, len(dependents(us, self.lookup)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/query.py.
+Unittest classes:
+    TestQuery_parse_predicates
+    TestQuery_select
+"""
+import pep8
+import unittest
+from models.place import Place
+from models.engine.indexes import HashIndex
+from models.engine.query import choose_index, matches, parse_predicates
+from models.engine.query import select
+
+
+class TestQuery_parse_predicates(unittest.TestCase):
+    """Unittests for testing the parsing of query predicates."""
+
+    def test_style_check(self):
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(["models/engine/query.py"])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_operators(self):
+        conditions = parse_predicates(
+            {
+                "city_id": "c1",
+                "max_guest__gte": 2,
+                "user_id__in": ("u1", "u2"),
+                "price_by_night__between": [10, 20],
+            }
+        )
+        self.assertEqual(
+            [
+                ("city_id", "eq", "c1"),
+                ("max_guest", "gte", 2),
+                ("user_id", "in", ["u1", "u2"]),
+                ("price_by_night", "between", (10, 20)),
+            ],
+            conditions,
+        )
+
+    def test_invalid_predicates(self):
+        for predicates in (
+            {"name__like": "a"},
+            {"__gt": 1},
+            {"user_id__in": "u1"},
+            {"amenity_ids__all": "a1"},
+            {"price_by_night__between": 10},
+            {"price_by_night__between": (1, 2, 3)},
+        ):
+            with self.assertRaises(ValueError):
+                parse_predicates(predicates)
+
+
+class TestQuery_select(unittest.TestCase):
+    """Unittests for testing matching, ordering and index choice."""
+
+    def setUp(self):
+        self.places = []
+        for price in (30, 10, 20, 40):
+            pl = Place()
+            pl.price_by_night = price
+            pl.city_id = "c1" if price < 35 else "c2"
+            self.places.append(pl)
+
+    def prices(self, objs):
+        return [obj.price_by_night for obj in objs]
+
+    def test_matches(self):
+        pl = self.places[0]
+        self.assertTrue(matches(pl, parse_predicates({"city_id": "c1"})))
+        self.assertFalse(matches(pl, parse_predicates({"city_id": "c2"})))
+        self.assertFalse(matches(pl, parse_predicates({"name__gt": 1})))
+        pl.amenity_ids = ["a1", "a2"]
+        self.assertTrue(
+            matches(pl, parse_predicates({"amenity_ids__all": ["a2"]}))
+        )
+        self.assertFalse(
+            matches(pl, parse_predicates({"amenity_ids__all": ["a2", "a3"]}))
+        )
+        self.assertFalse(
+            matches(pl, parse_predicates({"city_id__all": ["a2"]}))
+        )
+
+    def test_order_and_limit(self):
+        conditions = parse_predicates({"price_by_night__gt": 10})
+        found = select(self.places, conditions, "price_by_night")
+        self.assertEqual([20, 30, 40], self.prices(found))
+        found = select(self.places, conditions, "-price_by_night", 2)
+        self.assertEqual([40, 30], self.prices(found))
+        found = select(self.places, [], None, 2)
+        self.assertEqual([30, 10], self.prices(found))
+
+    def test_order_puts_missing_values_last(self):
+        self.places[1].rank = 2
+        self.places[2].rank = 1
+        found = select(self.places, [], "rank")
+        self.assertEqual([20, 10], self.prices(found[:2]))
+        found = select(self.places, [], "-rank")
+        self.assertEqual([10, 20], self.prices(found[:2]))
+
+    def test_invalid_limit_and_order(self):
+        with self.assertRaises(ValueError):
+            select(self.places, [], None, -1)
+        self.places[0].rank = "a"
+        self.places[1].rank = 1
+        with self.assertRaises(ValueError):
+            select(self.places, [], "rank")
+
+    def test_choose_index(self):
+        index = HashIndex("city_id")
+        for pl in self.places:
+            index.add(pl.id, pl)
+        indexes = {"city_id": index}
+        conditions = parse_predicates({"price_by_night__gt": 1})
+        self.assertIsNone(choose_index(indexes, conditions))
+        conditions = parse_predicates(
+            {"city_id__in": ["c1", "c2"], "price_by_night__gt": 1}
+        )
+        self.assertEqual(
+            (4, conditions[0], index), choose_index(indexes, conditions)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
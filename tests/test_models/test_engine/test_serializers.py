@@ -0,0 +1,129 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/serializers.py.
+Unittest classes:
+    TestJSONSerializer
+    TestBinarySerializer
+"""
+import pep8
+import struct
+import unittest
+from io import BytesIO
+from unittest.mock import patch
+from datetime import datetime
+from models.base_model import BaseModel
+from models.place import Place
+from models.engine.serializers import BinarySerializer, JSONSerializer
+from models.engine.serializers import detect
+
+
+def round_trip(serializer, objs):
+    """Writes objects with a serializer and reads them back"""
+    file = BytesIO()
+    records = [
+        ("{}.{}".format(type(obj).__name__, obj.id), serializer.encode(obj))
+        for obj in objs
+    ]
+    offsets = serializer.write(file, records)
+    file.seek(0)
+    return offsets, file, dict(detect(file).read(file))
+
+
+class TestJSONSerializer(unittest.TestCase):
+    """Unittests for testing the JSONSerializer class."""
+
+    def test_style_check(self):
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(["models/engine/serializers.py"])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_round_trip(self):
+        pl = Place()
+        pl.name = "house"
+        offsets, file, loaded = round_trip(JSONSerializer(), [pl])
+        self.assertEqual(pl.to_dict(), loaded["Place." + pl.id])
+        self.assertEqual("json", detect(file).name)
+
+    def test_index_matches_offsets(self):
+        objs = [BaseModel(), Place()]
+        offsets, file, loaded = round_trip(JSONSerializer(), objs)
+        self.assertEqual(offsets, JSONSerializer().index(file))
+        data = file.getvalue()
+        for key, (offset, length) in offsets.items():
+            value = JSONSerializer().decode(data[offset: offset + length])
+            self.assertEqual(loaded[key], value)
+
+
+class TestBinarySerializer(unittest.TestCase):
+    """Unittests for testing the BinarySerializer class."""
+
+    def test_round_trip_types(self):
+        pl = Place()
+        pl.name = "maison été"
+        pl.max_guest = 4
+        pl.latitude = 37.77
+        pl.amenity_ids = ["a", "b"]
+        pl.big = 2**70
+        pl.flag = True
+        pl.nothing = None
+        offsets, file, loaded = round_trip(BinarySerializer(), [pl])
+        attributes = loaded["Place." + pl.id]
+        self.assertEqual("binary", detect(file).name)
+        for name, value in pl.__dict__.items():
+            self.assertEqual(value, attributes[name])
+            self.assertEqual(type(value), type(attributes[name]))
+
+    def test_timestamps_are_datetimes(self):
+        bm = BaseModel()
+        offsets, file, loaded = round_trip(BinarySerializer(), [bm])
+        attributes = loaded["BaseModel." + bm.id]
+        self.assertEqual(datetime, type(attributes["created_at"]))
+        rebuilt = BaseModel(**attributes)
+        self.assertEqual(bm.created_at, rebuilt.created_at)
+        self.assertEqual(bm.updated_at, rebuilt.updated_at)
+
+    def test_smaller_than_json(self):
+        objs = [Place() for _ in range(50)]
+        for i, pl in enumerate(objs):
+            pl.name = "place {}".format(i)
+            pl.price_by_night = i
+        binary = round_trip(BinarySerializer(), objs)[1].getvalue()
+        text = round_trip(JSONSerializer(), objs)[1].getvalue()
+        self.assertLess(len(binary) * 2, len(text))
+
+    def test_tables_of_the_file(self):
+        first = Place()
+        first.name = "a"
+        first.max_guest = 2
+        second = Place()
+        second.max_guest = 3
+        second.name = "b"
+        other = Place()
+        other.number_rooms = 1
+        file = round_trip(BinarySerializer(), [first, second])[1]
+        # one table for both orders of the attributes, not the other shape
+        count = struct.unpack_from(">I", file.getvalue(), 6)[0]
+        self.assertEqual(1, count)
+        loaded = round_trip(BinarySerializer(), [other, first])[2]
+        self.assertEqual(2, loaded["Place." + first.id]["max_guest"])
+        self.assertEqual(1, loaded["Place." + other.id]["number_rooms"])
+
+    def test_too_many_tables(self):
+        objs = [BaseModel() for _ in range(3)]
+        for i, bm in enumerate(objs):
+            setattr(bm, "field_{}".format(i), i)
+        with patch.object(
+            BinarySerializer, "_BinarySerializer__max_tables", 2
+        ):
+            round_trip(BinarySerializer(), objs[:2])
+            with self.assertRaises(ValueError):
+                round_trip(BinarySerializer(), objs)
+
+    def test_truncated_file(self):
+        bm = BaseModel()
+        data = round_trip(BinarySerializer(), [bm])[1].getvalue()
+        with self.assertRaises(ValueError):
+            list(BinarySerializer().read(BytesIO(data[:-3])))
+
+
+if __name__ == "__main__":
+    unittest.main()
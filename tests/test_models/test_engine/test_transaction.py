@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/transaction.py.
+Unittest classes:
+    TestUndoLog
+"""
+import pep8
+import unittest
+from models.place import Place
+from models.engine.transaction import UndoLog
+
+
+class TestUndoLog(unittest.TestCase):
+    """Unittests for testing the UndoLog class."""
+
+    def setUp(self):
+        self.pl = Place()
+        self.pl.name = "house"
+        self.pl.amenity_ids = ["wifi"]
+        self.key = "Place." + self.pl.id
+        self.undo = UndoLog({"Place.x": None})
+
+    def test_style_check(self):
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(["models/engine/transaction.py"])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_changes_are_copied(self):
+        changes = {}
+        undo = UndoLog(changes)
+        changes["Place.y"] = None
+        self.assertEqual({}, undo.changes)
+        self.assertEqual({"Place.x": None}, self.undo.changes)
+
+    def test_undo_puts_back_the_first_state(self):
+        self.undo.record(self.key, self.pl)
+        self.pl.name = "flat"
+        self.pl.amenity_ids.append("pool")
+        self.pl.max_guest = 4
+        self.undo.record(self.key, self.pl)
+        self.assertEqual(1, len(self.undo))
+        self.assertEqual({self.key: self.pl}, self.undo.undo())
+        self.assertEqual("house", self.pl.name)
+        self.assertEqual(["wifi"], self.pl.amenity_ids)
+        self.assertNotIn("max_guest", self.pl.__dict__)
+
+    def test_free_keys(self):
+        self.undo.record("Place.new", None)
+        self.undo.record("Place.new", self.pl)
+        self.assertEqual({"Place.new": None}, self.undo.undo())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,7 @@ Unittest classes:
     TestPlace_instantiation
     TestPlace_save
     TestPlace_to_dict
+    TestPlace_relations
 """
 import os
 import models
@@ -11,6 +12,7 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.place import Place
+from models.review import Review
 
 
 class TestPlace_instantiation(unittest.TestCase):
@@ -244,5 +246,17 @@ class TestPlace_to_dict(unittest.TestCase):
             pl.to_dict(None)
 
 
+class TestPlace_relations(unittest.TestCase):
+    """Unittests for testing the relationship properties of Place."""
+
+    def test_reviews(self):
+        pl = Place()
+        rv = Review()
+        rv.place_id = pl.id
+        self.assertEqual([rv], pl.reviews)
+        with self.assertRaises(AttributeError):
+            pl.reviews = []
+
+
 if __name__ == "__main__":
     unittest.main()
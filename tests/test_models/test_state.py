@@ -4,6 +4,7 @@ Unittest classes:
     TestState_instantiation
     TestState_save
     TestState_to_dict
+    TestState_relations
 """
 import os
 import models
@@ -11,6 +12,7 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.state import State
+from models.city import City
 
 
 class TestState_instantiation(unittest.TestCase):
@@ -184,5 +186,22 @@ class TestState_to_dict(unittest.TestCase):
             st.to_dict(None)
 
 
+class TestState_relations(unittest.TestCase):
+    """Unittests for testing the relationship properties of State."""
+
+    def test_cities(self):
+        st = State()
+        cities = [City(), City()]
+        for cy in cities:
+            cy.state_id = st.id
+        City().state_id = "other"
+        self.assertEqual(cities, st.cities)
+        cities[0].state_id = "other"
+        self.assertEqual(cities[1:], st.cities)
+        models.storage.delete(cities[1])
+        self.assertEqual([], st.cities)
+        self.assertNotIn("cities", st.to_dict())
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -4,6 +4,7 @@ Unittest classes:
     TestUser_instantiation
     TestUser_save
     TestUser_to_dict
+    TestUser_relations
 """
 import os
 import models
@@ -11,6 +12,8 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.user import User
+from models.place import Place
+from models.review import Review
 
 
 class TestUser_instantiation(unittest.TestCase):
@@ -190,5 +193,19 @@ class TestUser_to_dict(unittest.TestCase):
             us.to_dict(None)
 
 
+class TestUser_relations(unittest.TestCase):
+    """Unittests for testing the relationship properties of User."""
+
+    def test_places_and_reviews(self):
+        us = User()
+        pl = Place()
+        pl.user_id = us.id
+        rv = Review()
+        rv.user_id = us.id
+        self.assertEqual([pl], us.places)
+        self.assertEqual([rv], us.reviews)
+        self.assertEqual([], User().reviews)
+
+
 if __name__ == "__main__":
     unittest.main()